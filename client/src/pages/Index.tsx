@@ -11,7 +11,6 @@ import EmailModel from '@/components/EmailModel';
 
 
 const Index = () => {
-  const [convertedMarkdown, setConvertedMarkdown] = useState<string | null>(null);
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [isProcessing, setIsProcessing] = useState(false);
   const [agents, setAgents] = useState<Agent[]>([
@@ -59,39 +58,11 @@ const Index = () => {
 
   const { toast } = useToast();
 
-  const handleFileConvert = async (file: File) => {
-    try {
-      setIsProcessing(true);
-      setConvertedMarkdown(null);
-      setSelectedFile(file);
-
-      const formData = new FormData();
-      formData.append("file", file);
-
-      const convertRes = await fetch("/convert", {method: "POST", body: formData,});
-      if (!convertRes.ok) throw new Error(`Conversion failed: ${convertRes.status}`);
-
-      const markdown = await convertRes.text(); 
-
-      setConvertedMarkdown(markdown)
-
-      toast({
-        title: "File converted",
-        description: "Markdown version is ready. Click Start Analysis to continue.",
-      });
-
-      setIsProcessing(false);
-      setShowEmailModel(true);
-
-      return markdown;            
-    } catch (err) {
-      console.error(err);
-      toast({
-        title: "Error",
-        description: "File conversion failed. See console for details.",
-      });
-      return null;
-    }
+  const handleFileSelect = (file: File) => {
+    // Conversion now happens server-side in /convert-and-analyze, so the
+    // markdown never has to round-trip through the browser.
+    setSelectedFile(file);
+    setShowEmailModel(true);
   };
 
   const handleEmailSubmit = () => {
@@ -103,7 +74,7 @@ const Index = () => {
   };
 
   const AnalyzeProcessing = async () => {
-    if (!convertedMarkdown) return;
+    if (!selectedFile) return;
 
     setIsProcessing(true);
 
@@ -134,13 +105,14 @@ const Index = () => {
 
     try {
       // Start both fetch and agent animation concurrently
-      const analyzePromise = fetch("/analyze", {
+      const formData = new FormData();
+      formData.append("file", selectedFile);
+      formData.append("name", userName);
+      formData.append("email", userEmail);
+
+      const analyzePromise = fetch("/convert-and-analyze", {
         method: "POST",
-        headers: { "Content-Type": "text/markdown" },
-          body: JSON.stringify({
-            name: userName,
-            email: userEmail,
-            markdown: convertedMarkdown  }),
+        body: formData,
       });
 
       // Start agent animation without awaiting yet
@@ -174,7 +146,6 @@ const Index = () => {
 
   const resetProcess = () => {
     setSelectedFile(null);
-    setConvertedMarkdown(null)
     setIsProcessing(false);
     setAgents(prev => prev.map(agent => ({ ...agent, status: 'pending', progress: undefined })));
     setDashboardData(null);
@@ -222,18 +193,8 @@ const Index = () => {
           {!selectedFile ? (
             /* Upload Section */
             <div className="max-w-2xl mx-auto">
-              <FileUpload onFileSelect={handleFileConvert} isProcessing={isProcessing} />
+              <FileUpload onFileSelect={handleFileSelect} isProcessing={isProcessing} />
             </div>
-          ) : !convertedMarkdown ? (
-            <Card className="p-12 shadow-large bg-gradient-hero border-0 text-center">
-              <div className="space-y-4">
-                <div className="w-16 h-16 mx-auto bg-gradient-primary rounded-full flex items-center justify-center animate-glow">
-                  <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-primary-foreground"></div>
-                </div>
-                <p className="text-lg font-medium text-foreground">Processing your file...</p>
-                <p className="text-muted-foreground">Please wait while we process your document</p>
-              </div>
-            </Card>
         ) : (
           /* Processing & Results */
           <div className="space-y-8">
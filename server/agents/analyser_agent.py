@@ -1,13 +1,15 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Dict, Any, Optional, Tuple, Union
 from server.agents.base_agent import BaseAgent
-import yaml
-import os
-import json
+from server.util.deadline import Deadline, DeadlineExceeded
+from server.util.serialization import write_json
 
-from server.agents.schema import AnalysisResult
-
-RULEBOOK_PATH = os.path.join(os.path.dirname(__file__), "rules", "rulebook.yaml")
+from server.agents.clause_anchor import ClauseAnchorIndex
+from server.agents.clause_dedup import cluster_clauses, fan_out
+from server.agents.clause_diff import clause_key, diff_clauses
+from server.agents.json_repair import PartialOutputError
+from server.agents.schema import AnalysisResult, Issue, Summary
 
 
 class AnalyserAgent(BaseAgent):
@@ -16,33 +18,383 @@ class AnalyserAgent(BaseAgent):
     Uses LangChain for LLM-based analysis.
     """
 
-    def __init__(self):
-        super().__init__()
-        self.rules = self._load_rules()
+    agent_type = "analyser_agent"
 
-    def _load_rules(self) -> List[Dict[str, Any]]:
-        with open(RULEBOOK_PATH, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-        return data.get("rules", [])
+    @property
+    def rules(self) -> List[Dict[str, Any]]:
+        return self.registry.current().rules
 
-    def analyze(self, intake_json: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze(
+        self,
+        intake_json: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        save: bool = True,
+    ) -> Dict[str, Any]:
+        """Analyse an intake's clauses; saved to analysis_result.json unless save is off."""
         clauses = self._extract_clauses(intake_json)
-        rulebook_text = yaml.dump({"rules": self.rules}, allow_unicode=True)
-        system_prompt = self.get_system_prompt("analyser_agent")
-        input_text = f"Rulebook YAML:\n{rulebook_text}\n\nClauses:\n{clauses}\n\nOutput JSON as specified."
         try:
-            result: AnalysisResult = self.run(system_prompt, input_text, AnalysisResult)
+            result = self._analyze_clauses(clauses, deadline)
+            if save:
+                self.save_result(result)
+            return result.model_dump()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Analysis failed: {e}")
 
-            # delete later
-            with open(
-                "./agents/outputs/analysis_result.json", "w", encoding="utf-8"
-            ) as f:
-                json.dump(result.dict(), f, ensure_ascii=False, indent=2)
+    def analyze_batches(
+        self,
+        batches: Iterable[List[str]],
+        max_workers: int = 4,
+        deadline: Optional[Deadline] = None,
+        save: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Analyse clause batches as they are produced (e.g. by
+        IntakeAgent.stream_clauses) and reassemble the results in clause order.
+        Batches that have not started when the deadline passes are cancelled.
+        """
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [
+                pool.submit(self._analyze_clauses, batch, deadline) for batch in batches
+            ]
+            results = [future.result() for future in futures]
 
-            print("Saved JSON to analysis_result.json")
+            result = self._merge_results(results)
+            if save:
+                self.save_result(result)
             return result.model_dump()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Analysis failed: {e}")
+        finally:
+            # Drop batches that have not started yet if anything failed
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def analyze_revision(
+        self,
+        intake_json: Dict[str, Any],
+        previous: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        reuse: bool = True,
+        save: bool = True,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Analyse a revised version of a previously analysed document. Only added
+        or changed clauses go to the model; verdicts for unchanged clauses are
+        reused from the previous version's analysis unless reuse is off (e.g.
+        the rulebook changed since).
+
+        Returns the analysis and the clause diff against the previous version.
+        """
+        clauses = self._extract_clauses(intake_json)
+        old_clauses = previous.get("clauses", [])
+        diff = diff_clauses(old_clauses, clauses)
+
+        old_issues = [
+            Issue(**issue) for issue in previous["analysis"].get("issues", [])
+        ]
+        known: Dict[int, List[Issue]] = {}
+        for new_index, old_index in diff["unchanged"].items() if reuse else []:
+            old_clause = old_clauses[old_index]
+            known[new_index] = [
+                issue.model_copy(update={"clause": clauses[new_index]})
+                for issue in old_issues
+                if issue.clause in old_clause or old_clause in issue.clause
+            ]
+
+        print(
+            f"Revision diff: {len(diff['unchanged'])} unchanged, "
+            f"{len(diff['changed'])} changed, {len(diff['added'])} added, "
+            f"{len(diff['removed'])} removed"
+        )
+        try:
+            result = self._analyze_reusing(
+                clauses,
+                known,
+                deadline,
+                previous["analysis"].get("buckets", []) if reuse else [],
+            )
+            if save:
+                self.save_result(result)
+            return result.model_dump(), diff
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             raise RuntimeError(f"Analysis failed: {e}")
 
+    def analyze_cached(
+        self,
+        intake_json: Dict[str, Any],
+        cache: Dict[str, List[Dict[str, Any]]],
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """
+        Analyse a document, reusing verdicts from cache (keyed by clause_key)
+        and adding the new ones to it. Batch runs share one cache across a
+        portfolio, where leases drafted from the same template repeat most
+        of their clauses.
+        """
+        clauses = self._extract_clauses(intake_json)
+        known = {
+            i: [
+                Issue(**issue).model_copy(update={"clause": clause})
+                for issue in cache[clause_key(clause)]
+            ]
+            for i, clause in enumerate(clauses)
+            if clause_key(clause) in cache
+        }
+        print(f"Reusing cached verdicts for {len(known)}/{len(clauses)} clauses")
+        try:
+            result = self._analyze_reusing(clauses, known, deadline)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Analysis failed: {e}")
+
+        fresh: Dict[str, List[Dict[str, Any]]] = {}
+        for issue in result.issues:
+            for i, clause in enumerate(clauses):
+                if i not in known and (
+                    issue.clause in clause or clause in issue.clause
+                ):
+                    fresh.setdefault(clause_key(clause), []).append(issue.model_dump())
+                    break
+        cache.update(fresh)
+        return result.model_dump()
+
+    def _analyze_reusing(
+        self,
+        clauses: List[str],
+        known: Dict[int, List[Issue]],
+        deadline: Optional[Deadline] = None,
+        buckets: Optional[List[str]] = None,
+    ) -> AnalysisResult:
+        """Analyse the clauses whose index is not in known and merge in clause order."""
+        issues = [issue for i in sorted(known) for issue in known[i]]
+        buckets = list(buckets or [])
+        pending = [clause for i, clause in enumerate(clauses) if i not in known]
+        if pending:
+            fresh = self._analyze_clauses(pending, deadline)
+            issues = self._in_clause_order(clauses, issues + fresh.issues)
+            buckets += fresh.buckets
+        if not buckets:
+            buckets = [issue.category for issue in issues]
+
+        return AnalysisResult(
+            summary=self._summarize(clauses, issues),
+            issues=issues,
+            buckets=list(dict.fromkeys(buckets)),
+        )
+
+    def _analyze_clauses(
+        self, clauses: List[str], deadline: Optional[Deadline] = None
+    ) -> AnalysisResult:
+        if not self.config.get_clause_dedup():
+            return self._analyze_unique(clauses, deadline)
+
+        clusters = cluster_clauses(
+            clauses, threshold=self.config.get_clause_dedup_threshold()
+        )
+        if len(clusters) == len(clauses):
+            return self._analyze_unique(clauses, deadline)
+
+        print(f"Collapsed {len(clauses)} clauses into {len(clusters)} for analysis")
+        result = self._analyze_unique(
+            [clauses[members[0]] for members in clusters], deadline
+        )
+        issues = fan_out(clauses, clusters, result.issues)
+        return AnalysisResult(
+            summary=self._summarize(clauses, issues),
+            issues=issues,
+            buckets=result.buckets,
+        )
+
+    def _analyze_unique(
+        self, clauses: List[str], deadline: Optional[Deadline] = None
+    ) -> AnalysisResult:
+        if self.config.get_analyser_escalation():
+            return self._analyze_with_escalation(clauses, deadline)
+        return self._run_analysis(clauses, deadline)
+
+    def _run_analysis(
+        self,
+        clauses: List[str],
+        deadline: Optional[Deadline] = None,
+        model: Optional[str] = None,
+        reask: bool = True,
+    ) -> AnalysisResult:
+        snapshot = self.registry.current()
+        rulebook_text = snapshot.rulebook_yaml
+        system_prompt = snapshot.prompt("analyser_agent")
+        input_text = f"Rulebook YAML:\n{rulebook_text}\n\nClauses:\n{clauses}\n\nOutput JSON as specified."
+        try:
+            return self.run(
+                system_prompt,
+                input_text,
+                AnalysisResult,
+                deadline=deadline,
+                model=model,
+            )
+        except PartialOutputError as e:
+            if not reask:
+                raise
+            return self._complete_partial(clauses, e.partial, deadline, model)
+
+    def _complete_partial(
+        self,
+        clauses: List[str],
+        partial: Dict[str, Any],
+        deadline: Optional[Deadline],
+        model: Optional[str],
+    ) -> AnalysisResult:
+        """
+        Keep the issues salvaged from a truncated response and re-ask the model
+        only for the clauses none of them cover.
+        """
+        issues: List[Issue] = partial.get("issues", [])
+        missing = [
+            clause
+            for clause in clauses
+            if not any(
+                issue.clause in clause or clause in issue.clause for issue in issues
+            )
+        ]
+        print(f"Salvaged {len(issues)} issues; re-asking for {len(missing)} clauses")
+
+        buckets = partial.get("buckets", [])
+        if missing:
+            rest = self._run_analysis(missing, deadline, model, reask=False)
+            issues = self._in_clause_order(clauses, issues + rest.issues)
+            buckets = buckets + rest.buckets
+
+        buckets = list(dict.fromkeys(buckets or [issue.category for issue in issues]))
+        return AnalysisResult(
+            summary=self._summarize(clauses, issues), issues=issues, buckets=buckets
+        )
+
+    def _in_clause_order(self, clauses: List[str], issues: List[Issue]) -> List[Issue]:
+        def position(issue: Issue) -> int:
+            for i, clause in enumerate(clauses):
+                if issue.clause in clause or clause in issue.clause:
+                    return i
+            return len(clauses)
+
+        return sorted(issues, key=position)
+
+    def _analyze_with_escalation(
+        self, clauses: List[str], deadline: Optional[Deadline] = None
+    ) -> AnalysisResult:
+        """
+        Classify every clause with the fast model, then re-check only HIGH-risk
+        or low-confidence verdicts with the analyser's own (stronger) model.
+        The stronger model's verdict replaces the fast one; an escalated
+        clause it leaves out is downgraded to OK.
+        """
+        fast_model = self.config.get_analyser_fast_model()
+        first = self._run_analysis(clauses, deadline, model=fast_model)
+
+        threshold = self.config.get_escalation_confidence()
+        escalate = [
+            i
+            for i, issue in enumerate(first.issues)
+            if issue.risk == "HIGH"
+            or issue.confidence is None
+            or issue.confidence < threshold
+        ]
+        if not escalate:
+            return first
+
+        print(f"Escalating {len(escalate)}/{len(first.issues)} clauses to {self.model}")
+        second = self._run_analysis(
+            [first.issues[i].clause for i in escalate], deadline
+        )
+
+        # Place each re-checked verdict on the escalated clause it quotes
+        anchors = ClauseAnchorIndex([first.issues[i].clause for i in escalate])
+        rechecked: Dict[int, Issue] = {}
+        unplaced = []
+        for n, issue in enumerate(second.issues):
+            anchor = anchors.find(issue.clause)
+            if anchor < 0:
+                unplaced.append((n, issue))
+            else:
+                rechecked.setdefault(anchor, issue)
+        if len(second.issues) == len(escalate):
+            # One verdict per clause: a reworded quote keeps its position
+            for n, issue in unplaced:
+                rechecked.setdefault(n, issue)
+
+        issues = list(first.issues)
+        for n, i in enumerate(escalate):
+            if n in rechecked:
+                issues[i] = rechecked[n]
+            else:
+                # The stronger model did not flag the clause, so it is not an
+                # issue; keeping the fast verdict would make escalation unable
+                # to downgrade anything
+                issues[i] = issues[i].model_copy(
+                    update={
+                        "risk": "OK",
+                        "rationale": f"Not flagged when re-checked with {self.model}.",
+                        "recommendation": "",
+                        "confidence": None,
+                    }
+                )
+
+        buckets = list(dict.fromkeys(first.buckets + second.buckets))
+        return AnalysisResult(
+            summary=self._summarize(clauses, issues), issues=issues, buckets=buckets
+        )
+
+    def _summarize(self, clauses: List[str], issues: List[Issue]) -> Summary:
+        """
+        Per-clause counts: each clause is counted once under its most severe
+        issue, and clauses without a HIGH or MEDIUM issue count as ok.
+        Repeated clauses share the verdict of their text.
+        """
+        severity = {"OK": 0, "MEDIUM": 1, "HIGH": 2}
+        texts = set(clauses)
+        by_text: Dict[str, int] = {}
+        for issue in issues:
+            # Exact text first: fanned-out copies may contain their original
+            clause = issue.clause if issue.clause in texts else None
+            if clause is None:
+                clause = next(
+                    (c for c in clauses if issue.clause in c or c in issue.clause),
+                    None,
+                )
+            if clause is not None:
+                by_text[clause] = max(by_text.get(clause, 0), severity[issue.risk])
+        worst = [by_text.get(clause, 0) for clause in clauses]
+        return Summary(
+            high_risk=worst.count(2),
+            medium_risk=worst.count(1),
+            ok=worst.count(0),
+            total=len(clauses),
+        )
+
+    def _merge_results(self, results: List[AnalysisResult]) -> AnalysisResult:
+        """Concatenate per-batch results, keeping batch order for issues and buckets."""
+        issues = [issue for result in results for issue in result.issues]
+        buckets = list(
+            dict.fromkeys(bucket for result in results for bucket in result.buckets)
+        )
+        summary = Summary(
+            high_risk=sum(r.summary.high_risk for r in results),
+            medium_risk=sum(r.summary.medium_risk for r in results),
+            ok=sum(r.summary.ok for r in results),
+            total=sum(r.summary.total for r in results),
+        )
+        return AnalysisResult(summary=summary, issues=issues, buckets=buckets)
+
+    def save_result(self, result: Union[AnalysisResult, Dict[str, Any]]) -> None:
+        # delete later
+        write_json("./agents/outputs/analysis_result.json", result)
+
+        print("Saved JSON to analysis_result.json")
+
     def _extract_clauses(self, intake_json: Dict[str, Any]) -> List[str]:
         return intake_json.get("clauses", [])
@@ -0,0 +1,63 @@
+from typing import Any, Dict, List
+
+RISK_LEVELS = ("HIGH", "MEDIUM", "OK")
+
+
+class AnalysisIndex:
+    """
+    Everything the packager's builders derive from analyser output, computed
+    in one pass over the issues and shared by all of them for a packaging
+    run: issues bucketed by risk and by category, per-category risk counts,
+    the ranked slices the artifacts show and deduplicated recommendations.
+    Issues keep the analyser's order (clause order) within every bucket.
+    """
+
+    def __init__(self, analysis_json: Dict[str, Any]):
+        self.summary: Dict[str, Any] = analysis_json.get("summary", {})
+        self.issues: List[Dict[str, Any]] = analysis_json.get("issues", [])
+        self.buckets: List[Any] = analysis_json.get("buckets", [])
+
+        self.by_risk: Dict[str, List[Dict[str, Any]]] = {r: [] for r in RISK_LEVELS}
+        self.by_category: Dict[str, List[Dict[str, Any]]] = {}
+        self.category_breakdown: Dict[str, Dict[str, int]] = {}
+        for issue in self.issues:
+            risk = issue.get("risk", "OK")
+            category = issue.get("category", "Unknown")
+            self.by_risk.setdefault(risk, []).append(issue)
+            self.by_category.setdefault(category, []).append(issue)
+
+            counts = self.category_breakdown.setdefault(
+                category, {"total": 0, "high": 0, "medium": 0, "ok": 0}
+            )
+            counts["total"] += 1
+            if risk.upper() in RISK_LEVELS:
+                counts[risk.lower()] += 1
+
+        self.high_risk = self.by_risk["HIGH"]
+        # Recommendations of the first ten issues, without repeats
+        self.top_recommendations: List[str] = []
+        for issue in self.issues[:10]:
+            recommendation = issue.get("recommendation", "")
+            if recommendation and recommendation not in self.top_recommendations:
+                self.top_recommendations.append(recommendation)
+        self.high_risk_recommendations = [
+            issue.get("recommendation", "") for issue in self.high_risk[:5]
+        ]
+        # Negotiation rider entries for the top 15 high-risk issues
+        self.proposed_changes = [
+            {
+                "original_clause": issue.get("clause", ""),
+                "proposed_change": issue.get("recommendation", ""),
+                "rationale": issue.get("rationale", ""),
+                "category": issue.get("category", ""),
+            }
+            for issue in self.high_risk[:15]
+        ]
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        return self.issues[:n]
+
+    def risk_percentage(self, key: str) -> float:
+        """Share of the summary's total in the given summary count, in percent."""
+        total = max(self.summary.get("total", 1), 1)
+        return round((self.summary.get(key, 0) / total) * 100, 1)
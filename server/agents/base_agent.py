@@ -3,11 +3,15 @@ from langchain_core.prompts import ChatPromptTemplate
 import sys
 import os
 from server.agents.guardrail_agent import GuardrailAgent
+from server.agents.json_repair import recover
+from server.agents.registry import get_registry
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "util")))
 from server.util.config import getConfig
-from typing import Type, TypeVar
-import yaml
+from server.util.deadline import Deadline, DeadlineExceeded
+from server.util.hedging import hedged_call
+from server.util.rate_limiter import current_lane, estimate_tokens, get_rate_limiter
+from typing import Dict, Optional, Type, TypeVar
 from pydantic import BaseModel
 
 T = TypeVar("T", bound=BaseModel)
@@ -16,40 +20,90 @@ T = TypeVar("T", bound=BaseModel)
 class BaseAgent:
     config = getConfig()
     API_KEY = config.get_gemini_api()
+    limiter = get_rate_limiter()
+    registry = get_registry()
+    # Prompt key and model tier key; subclasses override
+    agent_type = "base"
+    _clients: Dict[str, ChatGoogleGenerativeAI] = {}
 
-    def __init__(self):
-        self.client = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            google_api_key=self.API_KEY,
-        )
+    def __init__(self, client=None, model: Optional[str] = None):
+        # A client can be injected (e.g. a local fake chat model) in place of Gemini
+        self.model = model or self.config.get_agent_model(self.agent_type)
+        self.client = client or self.get_client(self.model)
 
         self.prompt = ChatPromptTemplate.from_messages(
             [("system", "{system_prompt}"), ("human", "{input}")]
         )
         self.guardrail = GuardrailAgent()
 
+    @classmethod
+    def get_client(cls, model: str) -> ChatGoogleGenerativeAI:
+        """Gemini client for a model name, shared by every agent using that model."""
+        if model not in cls._clients:
+            cls._clients[model] = ChatGoogleGenerativeAI(
+                model=model,
+                google_api_key=cls.API_KEY,
+            )
+        return cls._clients[model]
+
     def get_system_prompt(self, agent_type: str) -> str:
-        try:
-            with open("./agents/prompts/agent_prompts.yaml", "r") as f:
-                data = yaml.safe_load(f)
-                system_prompt = data["prompts"].get(agent_type, data["prompts"]["base"])
-            return system_prompt
-        except Exception as e:
-            print(f"Error getting system prompt for {agent_type}: {e} ")
+        return self.registry.current().prompt(agent_type)
 
-    def run(self, system_prompt: str, input: str, schema: Type[T]) -> T:
-        """Run the agent with human input."""
-        try:
-            safe_input = self.guardrail.process(input)
+    def run(
+        self,
+        system_prompt: str,
+        input: str,
+        schema: Type[T],
+        priority: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        model: Optional[str] = None,
+    ) -> T:
+        """
+        Run the agent with human input through the shared rate limiter.
+        priority is the limiter lane: "interactive" calls go before "batch".
+        It defaults to the lane set by rate_limiter.lane() for the current
+        context, "interactive" otherwise.
+        The call is abandoned with DeadlineExceeded once deadline passes, and
+        hedged past its p95 model latency (time queued for quota excluded)
+        when HEDGE_REQUESTS is enabled. model overrides the agent's
+        configured model for this call.
 
-            structured_client = self.client.with_structured_output(schema)
+        Malformed or truncated JSON is repaired locally; if only part of the
+        output can be recovered PartialOutputError is raised with the valid
+        parts so the caller can re-ask for just what is missing.
+        """
+        priority = priority or current_lane.get()
+        safe_input = self.guardrail.process(input)
 
-            chain = self.prompt | structured_client
+        client = self.get_client(model) if model else self.client
+        structured_client = client.with_structured_output(schema, include_raw=True)
 
-            response: T = chain.invoke(
-                {"system_prompt": system_prompt, "input": safe_input}
-            )
+        chain = self.prompt | structured_client
+
+        tokens = estimate_tokens(system_prompt + safe_input)
 
-            return response
+        try:
+            # Only the model call is hedged; each attempt takes its own slot
+            output = hedged_call(
+                lambda: chain.invoke(
+                    {"system_prompt": system_prompt, "input": safe_input}
+                ),
+                key=f"{schema.__name__}@{model or self.model}",
+                deadline=deadline,
+                hedge=self.config.get_hedge_requests(),
+                limiter=self.limiter,
+                tokens=tokens,
+                priority=priority,
+            )
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"Error running client: {e}")
+            raise RuntimeError(f"Error running client: {e}") from e
+
+        response: Optional[T] = output.get("parsed")
+        if response is None:
+            print(
+                f"Repairing malformed {schema.__name__}: {output.get('parsing_error')}"
+            )
+            response = recover(schema, output.get("raw"))
+        return response
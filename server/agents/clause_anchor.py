@@ -0,0 +1,98 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from server.agents.clause_diff import clause_key
+
+
+def word_grams(key: str, k: int) -> Set[Tuple[str, ...]]:
+    """Word k-grams of a normalised clause (the whole clause if shorter)."""
+    words = key.split()
+    if len(words) <= k:
+        return {tuple(words)}
+    return set(zip(*(words[i:] for i in range(k))))
+
+
+class ClauseAnchorIndex:
+    """
+    Finds the original clause an issue's quoted clause text belongs to.
+
+    Built once per document: clause texts are normalised with clause_key and
+    indexed by exact key and by word 5-grams. A lookup tries the exact
+    key, then the clauses sharing 5-grams with the text, where one text can
+    only contain the other if every 5-gram of the shorter one is shared
+    (confirmed with a substring check), and finally the clause with the
+    highest 5-gram containment at or above min_overlap. Ties go to the
+    earliest clause, as with the linear scan this replaces.
+
+    Texts shorter than 5 words have no 5-gram to share, so a short quote is
+    matched with a substring scan over the clauses, and clauses shorter than
+    5 words are substring-checked against every longer quote.
+    """
+
+    def __init__(self, clauses: List[str], min_overlap: float = 0.6, k: int = 5):
+        self.k = k
+        self.min_overlap = min_overlap
+        self.keys = [clause_key(c) for c in clauses]
+        self.exact: Dict[str, int] = {}
+        for index, key in enumerate(self.keys):
+            self.exact.setdefault(key, index)
+        # The n-gram index is only built once a lookup misses the exact keys
+        self.grams: List[Set[Tuple[str, ...]]] = []
+        self.postings: Optional[Dict[Tuple[str, ...], List[int]]] = None
+        # Clauses with fewer than k words, which no k-gram can reach
+        self.short: List[int] = []
+
+    def _build_postings(self) -> Dict[Tuple[str, ...], List[int]]:
+        postings: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+        for index, key in enumerate(self.keys):
+            grams = word_grams(key, self.k) if key else set()
+            self.grams.append(grams)
+            if key and len(key.split()) < self.k:
+                self.short.append(index)
+            for gram in grams:
+                postings[gram].append(index)
+        self.postings = postings
+        return postings
+
+    def find(self, text: str) -> int:
+        """Index of the clause text anchors to, or -1."""
+        key = clause_key(text)
+        if not key:
+            return -1
+        index = self.exact.get(key)
+        if index is not None:
+            return index
+
+        if len(key.split()) < self.k:
+            for index, candidate in enumerate(self.keys):
+                if candidate and (key in candidate or candidate in key):
+                    return index
+            return -1
+
+        postings = self.postings
+        if postings is None:
+            postings = self._build_postings()
+        grams = word_grams(key, self.k)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in postings.get(gram, ()):
+                shared[candidate] += 1
+
+        contained = [
+            candidate
+            for candidate, count in shared.items()
+            if count == min(len(grams), len(self.grams[candidate]))
+            and (key in self.keys[candidate] or self.keys[candidate] in key)
+        ]
+        contained.extend(index for index in self.short if self.keys[index] in key)
+        if contained:
+            return min(contained)
+        if not shared:
+            return -1
+
+        best, score = -1, 0.0
+        for candidate, count in sorted(shared.items()):
+            overlap = count / min(len(grams), len(self.grams[candidate]))
+            if overlap > score:
+                best, score = candidate, overlap
+        return best if score >= self.min_overlap else -1
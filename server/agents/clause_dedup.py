@@ -0,0 +1,170 @@
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from server.agents.schema import Issue
+
+MERSENNE_PRIME = (1 << 61) - 1
+WORD = re.compile(r"[a-z0-9]+")
+NUMBERING = re.compile(r"^\s*(?:clause\s+)?(?:\(?[0-9a-z]{1,3}[.)]\s*)+", re.IGNORECASE)
+# Tokens that change what a clause means however similar the rest is
+GUARD_TOKEN = re.compile(r"\d+(?:[.,]\d+)*|[$%£€]|[a-z]+n['’]t|[a-z]+")
+AMOUNT_SYMBOLS = set("$%£€")
+NUMBER_WORDS = set(
+    """
+    zero one two three four five six seven eight nine ten eleven twelve
+    thirteen fourteen fifteen sixteen seventeen eighteen nineteen twenty
+    thirty forty fifty sixty seventy eighty ninety hundred thousand million
+    half quarter double twice first second third fourth fifth sixth seventh
+    eighth ninth tenth eleventh twelfth thirteenth fourteenth fifteenth
+    sixteenth seventeenth eighteenth nineteenth twentieth thirtieth
+    percent cent cents dollar dollars sgd pound pounds
+    """.split()
+)
+NEGATIONS = {"not", "no", "never", "nor", "neither", "none", "cannot", "without"}
+
+
+def shingles(clause: str, k: int = 5) -> Set[int]:
+    """
+    Hashed word k-shingles of a clause, ignoring case, punctuation and leading
+    clause numbering so that restated or re-OCR'd copies still overlap.
+    """
+    words = WORD.findall(NUMBERING.sub("", clause).lower())
+    if len(words) < k:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i : i + k]) for i in range(len(words) - k + 1)]
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode(), digest_size=8).digest(), "big")
+        for g in grams
+    }
+
+
+def guard(clause: str) -> Tuple[str, ...]:
+    """
+    The numbers, amounts and negations of a clause, in order. Clauses whose
+    guards differ are never merged: "ten per cent" vs "thirty per cent" or
+    "shall" vs "shall not" decide the verdict while barely moving Jaccard.
+    """
+    tokens = []
+    for token in GUARD_TOKEN.findall(NUMBERING.sub("", clause).lower()):
+        if token[0].isdigit() or token in AMOUNT_SYMBOLS:
+            tokens.append(token)
+        elif token in NUMBER_WORDS or token in NEGATIONS:
+            tokens.append(token)
+        elif token.endswith(("n't", "n’t")):
+            tokens.append("not")
+    return tuple(tokens)
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash signatures with num_perm universal hash permutations."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.perms = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingle_set: Set[int]) -> List[int]:
+        if not shingle_set:
+            return [MERSENNE_PRIME] * len(self.perms)
+        return [
+            min((a * s + b) % MERSENNE_PRIME for s in shingle_set)
+            for a, b in self.perms
+        ]
+
+
+def cluster_clauses(
+    clauses: List[str],
+    threshold: float = 0.85,
+    bands: int = 16,
+    rows: int = 4,
+) -> List[List[int]]:
+    """
+    Group near-duplicate clauses. MinHash signatures are split into bands for
+    LSH; clauses sharing any band become candidates. A clause joins the
+    cluster of a candidate's representative only if its exact shingle
+    Jaccard similarity with that representative reaches threshold and both
+    have the same guard (numbers, amounts, negations). Every member is
+    compared with the representative itself, so similarity never chains
+    from one member to the next.
+
+    Returns clusters of clause indices. Each cluster is sorted and the
+    clusters are ordered by their first index, so cluster[0] is the earliest
+    occurrence and serves as the representative.
+    """
+    sets = [shingles(clause) for clause in clauses]
+    guards = [guard(clause) for clause in clauses]
+    hasher = MinHasher(num_perm=bands * rows)
+    representative = list(range(len(clauses)))
+
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    for i, shingle_set in enumerate(sets):
+        signature = hasher.signature(shingle_set)
+        keys = [
+            (band, *signature[band * rows : (band + 1) * rows]) for band in range(bands)
+        ]
+        candidates = sorted({representative[j] for key in keys for j in buckets[key]})
+        for rep in candidates:
+            if (
+                guards[rep] == guards[i]
+                and jaccard(sets[rep], shingle_set) >= threshold
+            ):
+                representative[i] = rep
+                break
+        for key in keys:
+            buckets[key].append(i)
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i in range(len(clauses)):
+        clusters[representative[i]].append(i)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def fan_out(
+    clauses: List[str],
+    clusters: List[List[int]],
+    issues: List[Issue],
+) -> List[Issue]:
+    """
+    Copy the verdicts for each cluster representative onto every member of
+    its cluster, returning issues in original clause order. Issues are matched
+    to representatives by clause text, falling back to position when the
+    model returned exactly one issue per representative.
+    """
+    representatives = [clauses[members[0]] for members in clusters]
+    positional = len(issues) == len(representatives)
+
+    by_cluster: Dict[int, List[Issue]] = defaultdict(list)
+    unmatched: List[Issue] = []
+    for n, issue in enumerate(issues):
+        for c, rep in enumerate(representatives):
+            if issue.clause in rep or rep in issue.clause:
+                by_cluster[c].append(issue)
+                break
+        else:
+            if positional:
+                by_cluster[n].append(issue)
+            else:
+                unmatched.append(issue)
+
+    ordered: Dict[int, List[Issue]] = {}
+    for c, members in enumerate(clusters):
+        for member in members:
+            ordered[member] = [
+                issue
+                if member == members[0]
+                else issue.model_copy(update={"clause": clauses[member]})
+                for issue in by_cluster.get(c, [])
+            ]
+    return [issue for i in sorted(ordered) for issue in ordered[i]] + unmatched
@@ -0,0 +1,78 @@
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def clause_key(clause: str) -> str:
+    """Comparison key that ignores case and whitespace differences."""
+    return WHITESPACE.sub(" ", clause).strip().lower()
+
+
+def diff_clauses(
+    old: List[str], new: List[str], similarity: float = 0.6
+) -> Dict[str, object]:
+    """
+    Clause-level diff between two versions of a document.
+
+    Returns:
+        unchanged: {new_index: old_index} for clauses present in both
+            versions (including clauses that only moved)
+        changed: [(old_index, new_index)] for edited clauses, i.e. replaced
+            in place or at least `similarity` alike
+        added: new indices with no counterpart in the old version
+        removed: old indices with no counterpart in the new version
+    """
+    old_keys = [clause_key(c) for c in old]
+    new_keys = [clause_key(c) for c in new]
+
+    unchanged: Dict[int, int] = {}
+    changed: List[tuple] = []
+    added: List[int] = []
+    removed: List[int] = []
+
+    matcher = SequenceMatcher(a=old_keys, b=new_keys, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            unchanged.update({j1 + k: i1 + k for k in range(i2 - i1)})
+        elif tag == "replace":
+            paired = min(i2 - i1, j2 - j1)
+            changed.extend((i1 + k, j1 + k) for k in range(paired))
+            removed.extend(range(i1 + paired, i2))
+            added.extend(range(j1 + paired, j2))
+        elif tag == "delete":
+            removed.extend(range(i1, i2))
+        else:
+            added.extend(range(j1, j2))
+
+    # A clause that moved shows up as a delete plus an insert; treat it as unchanged
+    removed_by_key: Dict[str, List[int]] = {}
+    for i in removed:
+        removed_by_key.setdefault(old_keys[i], []).append(i)
+    for j in list(added):
+        candidates = removed_by_key.get(new_keys[j])
+        if candidates:
+            i = candidates.pop(0)
+            unchanged[j] = i
+            added.remove(j)
+            removed.remove(i)
+
+    # Pair leftover deletes and inserts that are edits of each other
+    for j in list(added):
+        best, best_ratio = None, similarity
+        for i in removed:
+            ratio = SequenceMatcher(a=old_keys[i], b=new_keys[j]).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = i, ratio
+        if best is not None:
+            changed.append((best, j))
+            added.remove(j)
+            removed.remove(best)
+
+    return {
+        "unchanged": dict(sorted(unchanged.items())),
+        "changed": sorted(changed, key=lambda pair: pair[1]),
+        "added": added,
+        "removed": removed,
+    }
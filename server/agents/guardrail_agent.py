@@ -1,54 +1,55 @@
-import os
-import re
-import yaml
-from typing import List, Callable
-from functools import partial
+from typing import Iterator, List, Optional, Tuple
 
-GR_RULEBOOK = os.path.join(os.path.dirname(__file__), "rules", "guardrail.yaml")
+from server.agents.guardrail_engine import GuardrailEngine, ProtectedInputError, Span
+from server.agents.registry import RegistrySnapshot, get_registry
+from server.util.config import getConfig
 
 
 class GuardrailAgent:
-    def __init__(self):
-        self.rules: List[Callable[[str], str]] = []
-        self._load_rules()
-
-    def _load_rules(self):
-        with open(GR_RULEBOOK, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-
-        for rule in data.get("rules", []):
-            if rule["type"] == "regex":
-                pattern = rule["pattern"]
-                response = rule["response"]
-                self.rules.append(
-                    partial(self._apply_regex, pattern=pattern, response=response)
-                )
-
-            elif rule["type"] == "append":
-                response = rule["response"]
-                self.rules.append(partial(self._apply_append, response=response))
-
-            elif rule["type"] == "protect":
-                keywords = [kw.lower() for kw in rule.get("pattern", [])]
-                response = rule["response"]
-                self.rules.append(
-                    partial(self._apply_protect, keywords=keywords, response=response)
-                )
-
-    # Helper functions to avoid late-binding
-    def _apply_regex(self, text: str, pattern: str, response: str) -> str:
-        return re.sub(pattern, response, text)
-
-    def _apply_append(self, text: str, response: str) -> str:
-        return text + "\n\n" + response
-
-    def _apply_protect(self, text: str, keywords: List[str], response: str) -> str:
-        lowered = text.lower()
-        if any(kw in lowered for kw in keywords):
-            return response
-        return text
+    config = getConfig()
+
+    def __init__(self, registry=None, chunk_size: Optional[int] = None):
+        self.registry = registry or get_registry()
+        self.chunk_size = chunk_size or self.config.get_guardrail_chunk_size()
+        self.engine: Optional[GuardrailEngine] = None
+        self.version: Optional[str] = None
+        self._load_rules(self.registry.current())
+
+    def _load_rules(self, snapshot: RegistrySnapshot):
+        # Swap the engine in one assignment so concurrent process() calls
+        # always use a complete rule set
+        self.engine = GuardrailEngine(snapshot.guardrail_rules)
+        self.version = snapshot.version
+
+    def _current_engine(self) -> GuardrailEngine:
+        snapshot = self.registry.current()
+        if snapshot.version != self.version:
+            self._load_rules(snapshot)
+        return self.engine
+
+    def _chunks(self, text: str) -> Iterator[str]:
+        for start in range(0, len(text), self.chunk_size):
+            yield text[start : start + self.chunk_size]
 
     def process(self, text: str) -> str:
-        for rule in self.rules:
-            text = rule(text)
-        return text
+        # Large documents go through the chunked path to bound working memory
+        if len(text) > self.chunk_size:
+            return self.redact(text)[0]
+        return self._current_engine().process(text)
+
+    def redact(self, text: str) -> Tuple[str, List[Span]]:
+        """
+        Process text chunk by chunk and also return the (start, end, rule)
+        span of every redaction, as offsets into the original text.
+        """
+        pieces: List[str] = []
+        spans: List[Span] = []
+        try:
+            for piece, piece_spans in self._current_engine().redact_stream(
+                self._chunks(text), overlap=min(1024, self.chunk_size)
+            ):
+                pieces.append(piece)
+                spans.extend(piece_spans)
+        except ProtectedInputError as e:
+            return e.response, []
+        return "".join(pieces), spans
@@ -0,0 +1,159 @@
+import re
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# (start, end, rule name) of a redaction, as offsets into the original text
+Span = Tuple[int, int, str]
+WHITESPACE = re.compile(r"\s")
+
+
+class ProtectedInputError(ValueError):
+    """Raised by redact_stream when a protect keyword is found."""
+
+    def __init__(self, response: str):
+        super().__init__("Input contains a protected keyword")
+        self.response = response
+
+
+class GuardrailEngine:
+    """
+    Applies every guardrail rule in a single scan of the text.
+
+    All regex rules are merged into one alternation of named groups, so each
+    redaction is found against the original text and the output is built
+    from slices in one join. That is what lets redact_stream report span
+    offsets into the original text; it is not faster than one pass per
+    rule, which takes about as long since each regex still tries every
+    position. Where two rules could match at the same position the one
+    listed first in guardrail.yaml wins, as it would when the rules are
+    applied one after another. Scan time is set by the patterns themselves
+    (see the lookahead on no_pii_phone).
+
+    protect keywords are checked first, on one lowercase copy, and end the
+    scan before any redaction since their response replaces the whole text.
+    With a handful of keywords C-level substring search beats both a
+    keyword alternation in the regex and a pure-Python Aho-Corasick
+    automaton, so that is what is used. append responses are added last.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.responses: Dict[str, str] = {}
+        self.names: Dict[str, str] = {}
+        self.protect: List[Tuple[List[str], str]] = []
+        self.appends: List[str] = []
+
+        alternatives = []
+        for n, rule in enumerate(rules):
+            if rule["type"] == "regex":
+                group = f"g{n}"
+                pattern = rule.get("compiled") or re.compile(rule["pattern"])
+                alternatives.append(f"(?P<{group}>{pattern.pattern})")
+                self.responses[group] = rule["response"]
+                self.names[group] = rule.get("name", group)
+            elif rule["type"] == "protect":
+                keywords = [kw.lower() for kw in rule.get("pattern", [])]
+                if keywords:
+                    self.protect.append((keywords, rule["response"]))
+            elif rule["type"] == "append":
+                self.appends.append(rule["response"])
+
+        self.pattern: Optional[re.Pattern] = (
+            re.compile("|".join(alternatives)) if alternatives else None
+        )
+
+    def _protected(self, text: str) -> Optional[str]:
+        if self.protect:
+            lowered = text.lower()
+            for keywords, response in self.protect:
+                if any(kw in lowered for kw in keywords):
+                    return response
+        return None
+
+    def process(self, text: str) -> str:
+        response = self._protected(text)
+        if response is not None:
+            return response
+
+        parts: List[str] = []
+        if self.pattern is not None:
+            position = 0
+            for match in self.pattern.finditer(text):
+                parts.append(text[position : match.start()])
+                parts.append(self.responses[match.lastgroup])
+                position = match.end()
+            parts.append(text[position:])
+        else:
+            parts.append(text)
+
+        for response in self.appends:
+            parts.append("\n\n")
+            parts.append(response)
+        return "".join(parts)
+
+    def redact_stream(
+        self, chunks: Iterable[str], overlap: int = 1024
+    ) -> Iterator[Tuple[str, List[Span]]]:
+        """
+        Bounded-memory variant of process() over a stream of text chunks.
+        Yields (redacted text, spans) pieces, where spans locate each
+        redaction in the original stream. Only the current chunk plus an
+        overlap tail is held and lowercased at a time.
+
+        Each chunk is scanned together with the last overlap characters of
+        the previous one, and text is only released up to a whitespace
+        boundary that no match straddles, so matches crossing a chunk
+        boundary are still caught as long as they are shorter than overlap.
+        A protect keyword raises ProtectedInputError, even after pieces
+        have been yielded.
+        """
+        carry = ""
+        offset = 0
+        for chunk in chain(chunks, [None]):
+            buffer = carry + (chunk or "")
+            response = self._protected(buffer)
+            if response is not None:
+                raise ProtectedInputError(response)
+
+            cut = len(buffer)
+            if chunk is not None:
+                cut -= overlap
+                boundary = None
+                for boundary in WHITESPACE.finditer(
+                    buffer, max(0, cut - overlap), max(0, cut)
+                ):
+                    pass
+                if boundary is not None:
+                    cut = boundary.start()
+                if cut <= 0:
+                    carry = buffer
+                    continue
+
+            parts: List[str] = []
+            spans: List[Span] = []
+            position = 0
+            if self.pattern is not None:
+                for match in self.pattern.finditer(buffer):
+                    if match.start() >= cut:
+                        break
+                    if match.end() > cut and chunk is not None:
+                        cut = match.start()
+                        break
+                    parts.append(buffer[position : match.start()])
+                    parts.append(self.responses[match.lastgroup])
+                    spans.append(
+                        (
+                            offset + match.start(),
+                            offset + match.end(),
+                            self.names[match.lastgroup],
+                        )
+                    )
+                    position = match.end()
+            parts.append(buffer[position:cut])
+            if chunk is None:
+                for append in self.appends:
+                    parts.append("\n\n")
+                    parts.append(append)
+
+            yield "".join(parts), spans
+            carry = buffer[cut:]
+            offset += cut
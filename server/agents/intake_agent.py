@@ -1,42 +1,232 @@
 import hashlib
 import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
 from server.agents.base_agent import BaseAgent
+from server.agents.json_repair import PartialOutputError
 from server.agents.schema import IntakeAgentOutput
-from datetime import date
+from server.util.deadline import Deadline, DeadlineExceeded
+from server.util.serialization import write_json
+from datetime import date, datetime
+
+# Lines that open a new clause in OCR'd markdown: numbered items ("1.", "2)",
+# "(a)"), bullets and headings.
+CLAUSE_START = re.compile(r"^\s*(?:#{1,6}\s+|[-*+]\s+|\(?\d{1,3}[.)]\s+|\([a-z]\)\s+)")
+
+# Dates as they appear in leases: 2025-12-27, 27/12/2025, 27.12.2025,
+# 27th December 2025, 27th day of December, 2025 and December 27, 2025
+DATE_PATTERN = re.compile(
+    r"\b(?:\d{4}-\d{1,2}-\d{1,2}"
+    r"|\d{1,2}[/.-]\d{1,2}[/.-]\d{4}"
+    r"|\d{1,2}(?:st|nd|rd|th)?(?:\s+day\s+of)?\s+[A-Za-z]{3,9},?\s+\d{4}"
+    r"|[A-Za-z]{3,9}\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4})\b",
+    re.IGNORECASE,
+)
+# Lines that state when the agreement itself was made
+AGREEMENT_DATE_HINT = re.compile(
+    r"\b(?:dated|made|entered|signed|executed|date of agreement)\b", re.IGNORECASE
+)
+# Day first, as in the intake prompt's example and Singapore leases
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%d %B %Y",
+    "%d %b %Y",
+    "%B %d %Y",
+    "%b %d %Y",
+)
+
+
+def normalize_date(text: str) -> str:
+    """ISO date (YYYY-MM-DD) for a date written in one of DATE_FORMATS, else ""."""
+    text = re.sub(r"(?<=\d)(?:st|nd|rd|th)\b", "", text.strip(), flags=re.IGNORECASE)
+    text = re.sub(r"\s+day\s+of\s+", " ", text, flags=re.IGNORECASE)
+    text = re.sub(r"[\s,]+", " ", text).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return ""
+
+
+def extract_date(document: str) -> str:
+    """
+    Agreement date of a document as an ISO date: the first date on a line
+    saying when the agreement was made, else the first date anywhere, else "".
+    """
+    fallback = ""
+    for line in document.splitlines():
+        for match in DATE_PATTERN.finditer(line):
+            found = normalize_date(match.group(0))
+            if not found:
+                continue
+            if AGREEMENT_DATE_HINT.search(line):
+                return found
+            fallback = fallback or found
+    return fallback
 
 
 class IntakeAgent(BaseAgent):
-    def __init__(self):
-        super().__init__()
-        self.memory = {}
+    agent_type = "intake_agent"
+
+    def normalization(self, document: str, deadline: Optional[Deadline] = None):
+        """Normalized title, date and clauses of a document."""
+        return self.run_intake(document, deadline)["summary"]["content"]
 
-    def normalization(self, document: str):
+    def run_intake(
+        self, document: str, deadline: Optional[Deadline] = None, save: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Normalize a document and return its intake record, {"summary": {"id":
+        anchor_id, "content": {title, date, clauses}}}, as written to
+        intake_agent.json unless save is off. The record is returned rather
+        than kept on the agent, which is shared by concurrent requests.
+        """
         print("Cleaning up your lease...")
 
         system_prompt = self.get_system_prompt("intake_agent")
 
         try:
-            response: IntakeAgentOutput = self.run(
-                system_prompt, document, IntakeAgentOutput
-            )
+            try:
+                response: IntakeAgentOutput = self.run(
+                    system_prompt, document, IntakeAgentOutput, deadline=deadline
+                )
+            except PartialOutputError as e:
+                # Keep whatever clauses survived a truncated response
+                if not e.partial.get("clauses"):
+                    raise
+                print(f"Using {len(e.partial['clauses'])} salvaged clauses")
+                response = IntakeAgentOutput(
+                    title=e.partial.get("title", "Unknown Agreement"),
+                    date=e.partial.get("date", ""),
+                    clauses=e.partial["clauses"],
+                )
 
-            anchor_id = hashlib.md5(
-                json.dumps(response.model_dump(), ensure_ascii=False).encode()
-            ).hexdigest()
+            record = self._intake_record(response)
+            if save:
+                self.save_output(record)
+            return record
 
-            if response.date or response.date.strip() == "":
-                response.date = date.today().isoformat()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            raise ValueError(f"Error during text normalization: {e}")
 
-            self.memory["summary"] = {"id": anchor_id, "content": response.model_dump()}
+    def stream_clauses(
+        self,
+        document: str,
+        batch_size: int = 8,
+        use_llm: bool = False,
+        deadline: Optional[Deadline] = None,
+        record: Optional[Dict[str, Any]] = None,
+        save: bool = True,
+    ) -> Iterator[List[str]]:
+        """
+        Yield clauses in batches as soon as they are extracted, so analysis can
+        start before intake has finished. Clauses come from the streamed LLM
+        output when use_llm is set, otherwise from the local segmenter. Once
+        the stream is exhausted the intake record is built with the same
+        contract as run_intake(): it is written to intake_agent.json unless
+        save is off, and copied into record when one is given.
+        """
+        print("Streaming clauses from your lease...")
 
-            with open(
-                "./agents/outputs/intake_agent.json", "w", encoding="utf-8"
-            ) as f:
-                json.dump(self.memory, f, indent=2, ensure_ascii=False)
+        source = (
+            self._stream_llm_clauses(document)
+            if use_llm
+            else self._segment_clauses(document)
+        )
 
-            print("Saved JSON to intake_agent.json")
+        clauses: List[str] = []
+        batch: List[str] = []
+        for clause in source:
+            if deadline is not None:
+                deadline.check("intake")
+            clauses.append(clause)
+            batch.append(clause)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
-            return response.model_dump()
+        response = IntakeAgentOutput(
+            title=self._extract_title(document),
+            date=extract_date(document),
+            clauses=clauses,
+        )
+        intake = self._intake_record(response)
+        if save:
+            self.save_output(intake)
+        if record is not None:
+            record.update(intake)
 
-        except Exception as e:
-            raise ValueError(f"Error during text normalization: {e}")
+    def _stream_llm_clauses(self, document: str) -> Iterator[str]:
+        """Stream the intake model output and emit each completed clause line."""
+        system_prompt = self.get_system_prompt("intake_stream_agent")
+        safe_input = self.guardrail.process(document)
+        chain = self.prompt | self.client
+
+        buffer = ""
+        for chunk in chain.stream(
+            {"system_prompt": system_prompt, "input": safe_input}
+        ):
+            buffer += chunk.content if isinstance(chunk.content, str) else ""
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                clause = self._clean_clause(line)
+                if clause:
+                    yield clause
+
+        clause = self._clean_clause(buffer)
+        if clause:
+            yield clause
+
+    def _segment_clauses(self, document: str) -> Iterator[str]:
+        """Split markdown into clauses on blank lines and numbered/bulleted items."""
+        current: List[str] = []
+        for line in document.splitlines():
+            if not line.strip() or CLAUSE_START.match(line):
+                clause = self._clean_clause(" ".join(current))
+                if clause:
+                    yield clause
+                current = []
+            if line.strip() and not line.lstrip().startswith("#"):
+                current.append(line)
+
+        clause = self._clean_clause(" ".join(current))
+        if clause:
+            yield clause
+
+    def _clean_clause(self, text: str) -> str:
+        text = CLAUSE_START.sub("", text)
+        text = re.sub(r"\s+", " ", text).strip()
+        # Skip table rules, page artefacts and other fragments too short to be a clause
+        if len(text) < 20 or not re.search(r"[A-Za-z]", text):
+            return ""
+        return text
+
+    def _extract_title(self, document: str) -> str:
+        for line in document.splitlines():
+            title = line.strip().lstrip("#").strip()
+            if title:
+                return title[:120]
+        return "Unknown Agreement"
+
+    def _intake_record(self, response: IntakeAgentOutput) -> Dict[str, Any]:
+        anchor_id = hashlib.md5(
+            json.dumps(response.model_dump(), ensure_ascii=False).encode()
+        ).hexdigest()
+
+        # ISO dates for the planner's ICS; today when the lease states none
+        response.date = normalize_date(response.date) or date.today().isoformat()
+
+        return {"summary": {"id": anchor_id, "content": response.model_dump()}}
+
+    def save_output(self, record: Dict[str, Any]) -> None:
+        write_json("./agents/outputs/intake_agent.json", record)
+
+        print("Saved JSON to intake_agent.json")
@@ -0,0 +1,193 @@
+import json
+import re
+from typing import Any, Dict, List, Tuple, Type, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+SMART_QUOTES = "\u201c\u201d"
+# A bare word outside strings: letters only, as str.isalpha() sees them
+BARE_WORD = re.compile(r"[^\W\d_]+")
+
+
+class PartialOutputError(ValueError):
+    """
+    Raised when a structured output could only be partly recovered. partial
+    holds the fields and list items that did validate, missing the names of
+    fields that could not be recovered.
+    """
+
+    def __init__(self, message: str, partial: Dict[str, Any], missing: List[str]):
+        super().__init__(message)
+        self.partial = partial
+        self.missing = missing
+
+
+def extract_json_text(text: str) -> str:
+    """Strip markdown fences and prose around the first JSON object or array."""
+    fenced = FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    return text[min(starts) :] if starts else text
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix the defects LLMs commonly produce: smart quotes used as string
+    delimiters, Python literals, trailing commas, and output truncated
+    mid-string or mid-object (closed by terminating the open string and every
+    open bracket). Smart quotes inside a string are text and kept as they are.
+    """
+    text = extract_json_text(text).strip()
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    # Whether the open string was opened by a smart quote, which a smart
+    # quote may then close
+    smart = False
+    escaped = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"' or (smart and ch in SMART_QUOTES):
+                in_string = False
+                ch = '"'
+            elif ch == "\n":
+                ch = "\\n"
+            out.append(ch)
+            i += 1
+            continue
+
+        if ch == '"' or ch in SMART_QUOTES:
+            in_string = True
+            smart = ch != '"'
+            ch = '"'
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack and stack[-1] == ch:
+                stack.pop()
+            else:
+                i += 1
+                continue
+        elif ch.isalpha():
+            word = BARE_WORD.match(text, i)
+            if word is not None:
+                out.append(PY_LITERALS.get(word.group(0), word.group(0)))
+                i = word.end()
+                continue
+        out.append(ch)
+        i += 1
+
+    repaired = "".join(out)
+    if escaped:
+        repaired = repaired[:-1]
+    if in_string:
+        repaired += '"'
+    # Drop a dangling key or separator left by truncation before closing; in
+    # an array a trailing string is a value, so only the separator goes
+    if stack and stack[-1] == "]":
+        repaired = re.sub(r",\s*$", "", repaired)
+    else:
+        repaired = re.sub(r'(,\s*"[^"]*"\s*:?\s*|,\s*|:\s*)$', "", repaired)
+    repaired += "".join(reversed(stack))
+    return TRAILING_COMMA.sub(r"\1", repaired)
+
+
+def parse_lenient(text: str) -> Any:
+    """json.loads, falling back to repair_json on failure."""
+    try:
+        return json.loads(extract_json_text(text))
+    except json.JSONDecodeError:
+        return json.loads(repair_json(text))
+
+
+def _list_item_model(annotation: Any):
+    if get_origin(annotation) in (list, List):
+        (item,) = get_args(annotation) or (None,)
+        if isinstance(item, type) and issubclass(item, BaseModel):
+            return item
+    return None
+
+
+def salvage(schema: Type[BaseModel], data: Any) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Keep every top-level field of data that validates against schema. For
+    list-of-model fields the valid items are kept and invalid ones dropped.
+    Returns the salvaged fields and the names of required fields still missing.
+    """
+    if not isinstance(data, dict):
+        return {}, [name for name, f in schema.model_fields.items() if f.is_required()]
+
+    partial: Dict[str, Any] = {}
+    for name, field in schema.model_fields.items():
+        if name not in data:
+            continue
+        value = data[name]
+        item_model = _list_item_model(field.annotation)
+        if item_model is not None and isinstance(value, list):
+            items = []
+            for item in value:
+                try:
+                    items.append(item_model.model_validate(item))
+                except ValidationError:
+                    continue
+            partial[name] = items
+            continue
+        try:
+            partial[name] = TypeAdapter(field.annotation).validate_python(value)
+        except ValidationError:
+            continue
+
+    missing = [
+        name
+        for name, field in schema.model_fields.items()
+        if field.is_required() and name not in partial
+    ]
+    return partial, missing
+
+
+def recover(schema: Type[BaseModel], raw: Any):
+    """
+    Recover a schema instance from a raw model message whose structured output
+    failed to parse. Returns the instance when everything validates after
+    repair and raises PartialOutputError when only part of it could be kept.
+    """
+    data: Any = None
+    for call in getattr(raw, "tool_calls", None) or []:
+        data = call.get("args")
+        break
+    if data is None:
+        for call in getattr(raw, "invalid_tool_calls", None) or []:
+            data = call.get("args")
+            break
+    if data is None:
+        data = getattr(raw, "content", raw)
+    if isinstance(data, list):
+        data = "".join(p if isinstance(p, str) else p.get("text", "") for p in data)
+    if isinstance(data, str):
+        try:
+            data = parse_lenient(data)
+        except json.JSONDecodeError as e:
+            raise PartialOutputError(f"Unrecoverable {schema.__name__}: {e}", {}, [])
+
+    try:
+        return schema.model_validate(data)
+    except ValidationError:
+        pass
+
+    partial, missing = salvage(schema, data)
+    raise PartialOutputError(
+        f"Partially recovered {schema.__name__}; missing {missing or 'items'}",
+        partial,
+        missing,
+    )
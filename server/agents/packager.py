@@ -5,13 +5,31 @@ from pydantic import BaseModel
 import json
 import os
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
+from server.agents import pdf_render
+from server.agents.analysis_index import AnalysisIndex
+from server.agents.clause_anchor import ClauseAnchorIndex
+from server.agents.clause_diff import clause_key
+from server.repository.blob_store import BlobStore
+from server.service.artifact_uploader import (
+    ArtifactUploader,
+    LocalBackend,
+    SupabaseBackend,
+)
+from server.util.config import getConfig
+from server.util.precompress import precompress_later
+from server.util.serialization import loads, read_json, write_json
 try:
     from supabase import create_client
 except Exception:
     create_client = None
 
+# Written by PlannerAgent.generate_email_with_gemini
+PLANNER_OUTPUT = Path(__file__).resolve().parent / "outputs" / "planner-agent.json"
+
 
 class PackagerAgent:
     """
@@ -25,6 +43,15 @@ class PackagerAgent:
         self.artifacts_dir.mkdir(exist_ok=True)
         self.download_dir = Path("agents/outputs/download")
         self.download_dir.mkdir(exist_ok=True)
+        # Every file written below is stored once by content hash and linked
+        # into place; dated artifacts expire after ARTIFACT_TTL_HOURS
+        self.blobs = BlobStore(
+            self.output_dir / "blobs",
+            ttl=getConfig().get_artifact_ttl_hours() * 3600,
+        )
+        # Input hash each artifact was last built from, see _cached_artifact
+        self.manifest_path = self.artifacts_dir / "manifest.json"
+        self._manifest_lock = threading.Lock()
         # Optional Supabase client
         self.supabase_url = os.getenv("SUPABASE_URL", "").strip()
         self.supabase_key = os.getenv("SUPABASE_ANON_KEY", "").strip()
@@ -35,6 +62,23 @@ class PackagerAgent:
                 self.supabase = create_client(self.supabase_url, self.supabase_key)
             except Exception as e:
                 print(f"Failed to init Supabase client: {e}")
+        self.uploader: Optional[ArtifactUploader] = None
+        if self.supabase is not None:
+            self.uploader = ArtifactUploader(
+                SupabaseBackend(
+                    self.supabase,
+                    self.supabase_url,
+                    self.supabase_key,
+                    self.supabase_bucket,
+                ),
+                manifest_path=self.artifacts_dir / "uploads.json",
+            )
+        elif os.getenv("ARTIFACT_UPLOAD_DIR", "").strip():
+            # Local stand-in for the bucket, e.g. for testing
+            self.uploader = ArtifactUploader(
+                LocalBackend(Path(os.getenv("ARTIFACT_UPLOAD_DIR").strip())),
+                manifest_path=self.artifacts_dir / "uploads.json",
+            )
 
     class Artifact(BaseModel):
         id: str
@@ -44,10 +88,14 @@ class PackagerAgent:
         description: Optional[str] = None
 
     def package_dashboard(
-        self, intake_json: Dict[str, Any], analysis_json: Dict[str, Any]
+        self,
+        intake_json: Dict[str, Any],
+        analysis_json: Dict[str, Any],
+        index: Optional[AnalysisIndex] = None,
     ) -> Dict[str, Any]:
         """
         Package the outputs into a dashboard.json format for the frontend.
+        Pass the run's AnalysisIndex to avoid indexing the issues again.
         """
         try:
             # Extract data from intake agent output
@@ -57,12 +105,13 @@ class PackagerAgent:
             clauses = intake_data.get("clauses", [])
 
             # Extract data from analysis agent output
-            summary = analysis_json.get("summary", {})
-            issues = analysis_json.get("issues", [])
-            buckets = analysis_json.get("buckets", [])
+            index = index or AnalysisIndex(analysis_json)
+            summary = index.summary
+            issues = index.issues
+            buckets = index.buckets
 
             # Create artifact links
-            artifacts = self._create_artifact_links(intake_data, analysis_json)
+            artifacts = self._create_artifact_links(intake_data, index)
 
             # Transform issues to match frontend format
             flagged_clauses = self._transform_issues_to_clauses(issues, clauses)
@@ -88,8 +137,10 @@ class PackagerAgent:
 
             # Save dashboard.json
             dashboard_path = self.output_dir / "dashboard.json"
-            with open(dashboard_path, "w", encoding="utf-8") as f:
-                json.dump(dashboard_data, f, ensure_ascii=False, indent=2)
+            self.blobs.write_json(
+                "dashboard.json", dashboard_data, [dashboard_path], keep=True
+            )
+            precompress_later([dashboard_path])
 
             print(f"Dashboard saved to {dashboard_path}")
             return dashboard_data
@@ -98,11 +149,15 @@ class PackagerAgent:
             raise RuntimeError(f"Failed to package dashboard: {e}")
 
     def create_frontend_package(
-        self, intake_json: Dict[str, Any], analysis_json: Dict[str, Any]
+        self,
+        intake_json: Dict[str, Any],
+        analysis_json: Dict[str, Any],
+        index: Optional[AnalysisIndex] = None,
     ) -> Dict[str, Any]:
         """
         Create a comprehensive package for the frontend that includes all artifacts
         and data in a single JSON structure.
+        Pass the run's AnalysisIndex to avoid indexing the issues again.
         """
         try:
             # Extract data from intake agent output
@@ -112,9 +167,10 @@ class PackagerAgent:
             clauses = intake_data.get("clauses", [])
 
             # Extract data from analysis agent output
-            summary = analysis_json.get("summary", {})
-            issues = analysis_json.get("issues", [])
-            buckets = analysis_json.get("buckets", [])
+            index = index or AnalysisIndex(analysis_json)
+            summary = index.summary
+            issues = index.issues
+            buckets = index.buckets
 
             # Transform issues to match frontend format
             flagged_clauses = self._transform_issues_to_clauses(issues, clauses)
@@ -138,14 +194,14 @@ class PackagerAgent:
                 "flagged_clauses": flagged_clauses,
                 "categories": buckets,
                 "artifacts": {
-                    "negotiation_rider": self._get_negotiation_rider_content(analysis_json),
-                    "tenant_email": self._get_tenant_email_content(analysis_json),
+                    "negotiation_rider": self._get_negotiation_rider_content(index),
+                    "tenant_email": self._get_tenant_email_content(index),
                     "planner_summary": self._get_planner_summary_content(),
                     "calendar_event": self._get_calendar_event_content(intake_data),
-                    "agreement_summary": self._get_agreement_summary_content(intake_data, analysis_json)
+                    "agreement_summary": self._get_agreement_summary_content(intake_data, index)
                 },
                 "recommendations": {
-                    "top_actions": self._generate_top_recommendations(issues),
+                    "top_actions": index.top_recommendations,
                     "priority_issues": [
                         {
                             "clause": issue.get("clause", "")[:100] + "..." if len(issue.get("clause", "")) > 100 else issue.get("clause", ""),
@@ -154,29 +210,32 @@ class PackagerAgent:
                             "recommendation": issue.get("recommendation", ""),
                             "rationale": issue.get("rationale", "")
                         }
-                        for issue in issues[:10]  # Top 10 priority issues
+                        for issue in index.top(10)  # Top 10 priority issues
                     ]
                 },
                 "document_analysis": {
                     "total_clauses": len(clauses),
                     "risk_distribution": {
-                        "high_risk_percentage": round((summary.get("high_risk", 0) / max(summary.get("total", 1), 1)) * 100, 1),
-                        "medium_risk_percentage": round((summary.get("medium_risk", 0) / max(summary.get("total", 1), 1)) * 100, 1),
-                        "safe_percentage": round((summary.get("ok", 0) / max(summary.get("total", 1), 1)) * 100, 1)
+                        "high_risk_percentage": index.risk_percentage("high_risk"),
+                        "medium_risk_percentage": index.risk_percentage("medium_risk"),
+                        "safe_percentage": index.risk_percentage("ok")
                     },
-                    "category_breakdown": self._get_category_breakdown(issues)
+                    "category_breakdown": index.category_breakdown
                 }
             }
 
             # Save frontend package
+            # Saved once and linked into the download directory as well
             frontend_package_path = self.output_dir / "frontend_package.json"
-            with open(frontend_package_path, "w", encoding="utf-8") as f:
-                json.dump(frontend_package, f, ensure_ascii=False, indent=2)
-
-            # Also copy to download directory
             download_frontend_path = self.download_dir / "frontend_package.json"
-            with open(download_frontend_path, "w", encoding="utf-8") as f:
-                json.dump(frontend_package, f, ensure_ascii=False, indent=2)
+            self.blobs.write_json(
+                "frontend_package.json",
+                frontend_package,
+                [frontend_package_path, download_frontend_path],
+                keep=True,
+            )
+            # gzip/brotli copies for /frontend-package, built in the background
+            precompress_later([frontend_package_path])
 
             print(f"Frontend package saved to {frontend_package_path} and {download_frontend_path}")
             return frontend_package
@@ -185,36 +244,108 @@ class PackagerAgent:
             raise RuntimeError(f"Failed to create frontend package: {e}")
 
     def _create_artifact_links(
-        self, intake_data: Dict[str, Any], analysis_json: Dict[str, Any]
+        self, intake_data: Dict[str, Any], index: AnalysisIndex
     ) -> List["PackagerAgent.Artifact"]:
         """
         Create artifact links for the generated documents.
         """
-        artifacts: List[PackagerAgent.Artifact] = []
+        manifest = self._load_manifest()
+        issues = index.issues
+
+        # Each artifact is built independently, so build them side by side;
+        # the planner PDF waits on the PDF process pool meanwhile
+        planner_ics_hash = self._file_hash(self.output_dir / "planner_event.ics")
+        builds = [
+            (
+                "calendar",
+                self._input_hash(
+                    intake_data.get("title"),
+                    intake_data.get("date"),
+                    planner_ics_hash,
+                    # The fallback event is scheduled relative to today
+                    None if planner_ics_hash else datetime.now().strftime("%Y%m%d"),
+                ),
+                lambda: self._create_calendar_artifact(intake_data),
+            ),
+            (
+                "email",
+                self._input_hash(issues),
+                lambda: self._create_email_artifact(index),
+            ),
+            # Skip PDF summary to keep exactly three artifacts as requested
+            (
+                "rider",
+                self._input_hash(issues),
+                lambda: self._create_negotiation_rider_artifact(index),
+            ),
+            (
+                "planner_pdf",
+                self._input_hash(self._file_hash(PLANNER_OUTPUT)),
+                self._create_planner_pdf_artifact,
+            ),
+        ]
+        with ThreadPoolExecutor(max_workers=len(builds)) as pool:
+            futures = [
+                pool.submit(self._cached_artifact, manifest, key, inputs, build)
+                for key, inputs, build in builds
+            ]
+            artifacts: List[PackagerAgent.Artifact] = [
+                f.result() for f in futures if f.result() is not None
+            ]
 
-        # Create calendar event artifact
-        calendar_artifact = self._create_calendar_artifact(intake_data)
-        if calendar_artifact:
-            artifacts.append(self._maybe_upload_artifact(calendar_artifact))
+        self._save_manifest(manifest)
+        precompress_later(
+            [Path(a.url) for a in artifacts if a.url and Path(a.url).exists()]
+        )
+        return self._upload_artifacts(artifacts)
 
-        # Create email artifact
-        email_artifact = self._create_email_artifact(analysis_json)
-        if email_artifact:
-            artifacts.append(self._maybe_upload_artifact(email_artifact))
+    def _input_hash(self, *inputs: Any) -> str:
+        """Hash of the inputs an artifact is built from."""
+        encoded = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
 
-        # Skip PDF summary to keep exactly three artifacts as requested
+    def _file_hash(self, path: Path) -> Optional[str]:
+        if not path.exists():
+            return None
+        return hashlib.sha256(path.read_bytes()).hexdigest()
 
-        # Create negotiation rider artifact
-        rider_artifact = self._create_negotiation_rider_artifact(analysis_json)
-        if rider_artifact:
-            artifacts.append(self._maybe_upload_artifact(rider_artifact))
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            return read_json(self.manifest_path)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Ignoring unreadable artifact manifest: {e}")
+            return {}
 
-        # Create planner PDF artifact (from planner-agent.json)
-        planner_pdf_artifact = self._create_planner_pdf_artifact()
-        if planner_pdf_artifact:
-            artifacts.append(self._maybe_upload_artifact(planner_pdf_artifact))
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        with self._manifest_lock:
+            write_json(self.manifest_path, manifest)
 
-        return artifacts
+    def _cached_artifact(
+        self, manifest: Dict[str, Any], key: str, inputs: str, build
+    ) -> Optional["PackagerAgent.Artifact"]:
+        """
+        Reuse the artifact recorded under key while its input hash is unchanged
+        and its file still exists; otherwise build it again and record the new
+        input hash in the manifest. Artifacts hold local paths here; uploads
+        happen afterwards in _upload_artifacts.
+        """
+        entry = manifest.get(key)
+        if entry and entry.get("inputs") == inputs and Path(entry["path"]).exists():
+            return self.Artifact(**entry["artifact"])
+
+        artifact = build()
+        if artifact is None:
+            manifest.pop(key, None)
+            return None
+        manifest[key] = {
+            "inputs": inputs,
+            "path": artifact.url,
+            "artifact": artifact.model_dump(),
+            "built_at": datetime.now().isoformat(),
+        }
+        return artifact
 
     def _create_calendar_artifact(
         self, intake_data: Dict[str, Any]
@@ -269,8 +400,9 @@ END:VEVENT
 END:VCALENDAR"""
             ics_filename = f"agreement_review_{datetime.now().strftime('%Y%m%d')}.ics"
             ics_path = self.artifacts_dir / ics_filename
-            with open(ics_path, "w", encoding="utf-8") as f:
-                f.write(ics_content)
+            self.blobs.write(
+                f"artifacts/{ics_filename}", ics_content.encode("utf-8"), [ics_path]
+            )
             return self.Artifact(
                 id=f"calendar_{self._generate_uid()}",
                 name="Agreement Review Meeting",
@@ -284,30 +416,20 @@ END:VCALENDAR"""
             return None
 
     def _create_email_artifact(
-        self, analysis_json: Dict[str, Any]
+        self, index: AnalysisIndex
     ) -> Optional["PackagerAgent.Artifact"]:
         """Create an email template for the tenant."""
         try:
-            high_risk_issues = [
-                issue
-                for issue in analysis_json.get("issues", [])
-                if issue.get("risk") == "HIGH"
-            ]
-
             email_content = {
                 "subject": "High-Risk Clauses in Your Rental Agreement - Action Required",
-                "body": self._generate_email_body(high_risk_issues),
-                "recommendations": [
-                    issue.get("recommendation", "") for issue in high_risk_issues[:5]
-                ],
+                "body": self._generate_email_body(index.high_risk),
+                "recommendations": index.high_risk_recommendations,
             }
 
             # Save email JSON
             email_filename = f"tenant_email_{datetime.now().strftime('%Y%m%d')}.json"
             email_path = self.artifacts_dir / email_filename
-
-            with open(email_path, "w", encoding="utf-8") as f:
-                json.dump(email_content, f, ensure_ascii=False, indent=2)
+            self.blobs.write_json(f"artifacts/{email_filename}", email_content, [email_path])
 
             return self.Artifact(
                 id=f"email_{self._generate_uid()}",
@@ -322,140 +444,32 @@ END:VCALENDAR"""
             return None
 
     def _create_summary_pdf_artifact(
-        self, intake_data: Dict[str, Any], analysis_json: Dict[str, Any]
+        self, intake_data: Dict[str, Any], index: AnalysisIndex
     ) -> Optional["PackagerAgent.Artifact"]:
         """Create a summary PDF built from analyser_agent output and intake metadata."""
         try:
-            try:
-                from reportlab.lib.pagesizes import A4
-                from reportlab.lib.styles import getSampleStyleSheet
-                from reportlab.platypus import (
-                    SimpleDocTemplate,
-                    Paragraph,
-                    Spacer,
-                    Table,
-                    TableStyle,
-                )
-                from reportlab.lib import colors
-                from reportlab.pdfgen import canvas
-            except Exception as import_error:
+            if not pdf_render.available():
                 raise RuntimeError(
-                    f"PDF generation requires reportlab. Install it to enable PDFs: {import_error}"
+                    "PDF generation requires reportlab. Install it to enable PDFs"
                 )
 
-            title = intake_data.get("title", "Rental Agreement Summary")
-            date_str_meta = intake_data.get("date", "")
-            risk_summary = analysis_json.get("summary", {})
-            issues = analysis_json.get("issues", [])
-
-            date_str = datetime.now().strftime('%Y%m%d')
-            summary_filename = f"agreement_summary_{date_str}.pdf"
-            summary_path = self.artifacts_dir / summary_filename
-
-            def build_story() -> list:
-                styles = getSampleStyleSheet()
-                story_local = []
-                story_local.append(Paragraph(title, styles["Title"]))
-                if date_str_meta:
-                    story_local.append(Paragraph(f"Agreement Date: {date_str_meta}", styles["Normal"]))
-                story_local.append(Paragraph(f"Generated at: {datetime.now().isoformat()}", styles["Normal"]))
-                story_local.append(Spacer(1, 12))
-
-                table_data = [
-                    ["High", "Medium", "OK", "Total"],
-                    [
-                        str(risk_summary.get("high_risk", 0)),
-                        str(risk_summary.get("medium_risk", 0)),
-                        str(risk_summary.get("ok", 0)),
-                        str(risk_summary.get("total", 0)),
-                    ],
-                ]
-                table = Table(table_data)
-                table.setStyle(
-                    TableStyle(
-                        [
-                            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                            ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                            ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
-                        ]
-                    )
-                )
-                story_local.append(table)
-                story_local.append(Spacer(1, 18))
-
-                styles_h2 = styles["Heading2"]
-                story_local.append(Paragraph("Top Issues", styles_h2))
-                story_local.append(Spacer(1, 6))
-                for idx, issue in enumerate(issues[:10], start=1):
-                    category = issue.get("category", "Issue")
-                    risk = issue.get("risk", "-")
-                    clause_snippet = issue.get("clause", "")
-                    rationale = issue.get("rationale", "")
-                    recommendation = issue.get("recommendation", "")
-                    reference = issue.get("reference", "")
-
-                    if rationale and clause_snippet and rationale.strip() == clause_snippet.strip():
-                        rationale = reference or ""
-                    if rationale and clause_snippet and clause_snippet.strip() in rationale.strip() and len(rationale.strip()) <= len(clause_snippet.strip()) + 10:
-                        rationale = reference or ""
-
-                    story_local.append(Paragraph(f"{idx}. <b>{category}</b> - Risk: <b>{risk}</b>", styles["Normal"]))
-                    if clause_snippet:
-                        story_local.append(Paragraph(f"Clause: {clause_snippet}", styles["Normal"]))
-                    if rationale:
-                        story_local.append(Paragraph(f"Rationale: {rationale}", styles["Normal"]))
-                    if recommendation:
-                        story_local.append(Paragraph(f"Recommendation: {recommendation}", styles["Normal"]))
-                    story_local.append(Spacer(1, 10))
-
-                return story_local
-
-            doc = SimpleDocTemplate(str(summary_path), pagesize=A4)
-            story = build_story()
-
-            try:
-                doc.build(story)
-            except PermissionError:
-                summary_filename = f"agreement_summary_{date_str}_{self._generate_uid()}.pdf"
-                summary_path = self.artifacts_dir / summary_filename
-                doc = SimpleDocTemplate(str(summary_path), pagesize=A4)
-                doc.build(story)
-
-            # Ensure file has at least one page; if not, write minimal fallback
-            try:
-                if not summary_path.exists() or summary_path.stat().st_size <= 0:
-                    raise IOError("PDF appears empty; regenerating with canvas fallback")
-            except Exception:
-                fallback_filename = f"agreement_summary_{date_str}_{self._generate_uid()}.pdf"
-                summary_path = self.artifacts_dir / fallback_filename
-                c = canvas.Canvas(str(summary_path), pagesize=A4)
-                c.setFont("Helvetica-Bold", 16)
-                c.drawString(72, 800, title)
-                c.setFont("Helvetica", 10)
-                c.drawString(72, 785, f"Generated at: {datetime.now().isoformat()}")
-                c.setFont("Helvetica", 12)
-                c.drawString(72, 760, "Risk Summary:")
-                c.drawString(90, 740, f"High: {risk_summary.get('high_risk', 0)}  Medium: {risk_summary.get('medium_risk', 0)}  OK: {risk_summary.get('ok', 0)}  Total: {risk_summary.get('total', 0)}")
-                if issues:
-                    first = issues[0]
-                    c.drawString(72, 710, f"1. {first.get('category', 'Issue')} - Risk: {first.get('risk', '-')}")
-                    c.setFont("Helvetica", 10)
-                    clause = first.get('clause', '')
-                    rationale = first.get('rationale', '')
-                    recommendation = first.get('recommendation', '')
-                    c.drawString(90, 695, f"Clause: {clause[:100]}")
-                    c.drawString(90, 680, f"Rationale: {rationale[:100]}")
-                    c.drawString(90, 665, f"Recommendation: {recommendation[:100]}")
-                c.showPage()
-                c.save()
+            summary_filename = f"agreement_summary_{datetime.now().strftime('%Y%m%d')}.pdf"
+            # Rendered in the PDF process pool
+            summary_path = pdf_render.submit(
+                pdf_render.render_summary_pdf,
+                str(self.artifacts_dir / summary_filename),
+                intake_data.get("title", "Rental Agreement Summary"),
+                intake_data.get("date", ""),
+                index.summary,
+                index.top(10),
+            ).result()
+            self.blobs.adopt(f"artifacts/{Path(summary_path).name}", Path(summary_path))
 
             return self.Artifact(
                 id=f"pdf_{self._generate_uid()}",
                 name="Agreement Summary Report",
                 type="pdf",
-                url=str(summary_path),
+                url=summary_path,
                 description="Comprehensive summary of agreement analysis",
             )
 
@@ -464,28 +478,14 @@ END:VCALENDAR"""
             return None
 
     def _create_negotiation_rider_artifact(
-        self, analysis_json: Dict[str, Any]
+        self, index: AnalysisIndex
     ) -> Optional["PackagerAgent.Artifact"]:
         """Create a negotiation rider document."""
         try:
-            high_risk_issues = [
-                issue
-                for issue in analysis_json.get("issues", [])
-                if issue.get("risk") == "HIGH"
-            ]
-
             rider_content = {
                 "title": "Negotiation Rider - Proposed Changes",
                 "purpose": "This document outlines proposed changes to address unfair clauses in the rental agreement",
-                "proposed_changes": [
-                    {
-                        "original_clause": issue.get("clause", ""),
-                        "proposed_change": issue.get("recommendation", ""),
-                        "rationale": issue.get("rationale", ""),
-                        "category": issue.get("category", ""),
-                    }
-                    for issue in high_risk_issues[:15]  # Top 15 issues
-                ],
+                "proposed_changes": index.proposed_changes,
                 "legal_basis": "Based on Singapore rental law and industry standards",
                 "generated_at": datetime.now().isoformat(),
             }
@@ -495,9 +495,7 @@ END:VCALENDAR"""
                 f"negotiation_rider_{datetime.now().strftime('%Y%m%d')}.json"
             )
             rider_path = self.artifacts_dir / rider_filename
-
-            with open(rider_path, "w", encoding="utf-8") as f:
-                json.dump(rider_content, f, ensure_ascii=False, indent=2)
+            self.blobs.write_json(f"artifacts/{rider_filename}", rider_content, [rider_path])
 
             return self.Artifact(
                 id=f"rider_{self._generate_uid()}",
@@ -514,38 +512,16 @@ END:VCALENDAR"""
     def _create_planner_pdf_artifact(self) -> Optional["PackagerAgent.Artifact"]:
         """Create a PDF from planner-agent.json (subject, body, recommendations)."""
         try:
-            # Attempt to import reportlab; if not installed, skip gracefully
-            try:
-                from reportlab.lib.pagesizes import A4
-                from reportlab.lib.styles import getSampleStyleSheet
-                from reportlab.platypus import (
-                    SimpleDocTemplate,
-                    Paragraph,
-                    Spacer,
-                    ListFlowable,
-                    ListItem,
-                )
-                from reportlab.lib import colors
-            except Exception as import_error:
-                print(
-                    f"Planner PDF generation requires reportlab. Skipping planner PDF: {import_error}"
-                )
+            # If reportlab is not installed, skip gracefully
+            if not pdf_render.available():
+                print("Planner PDF generation requires reportlab. Skipping planner PDF")
                 return None
 
-            # Read planner output
-            try:
-                from server.agents.planner_agent import PlannerAgent
-            except Exception:
-                # Fallback local import if running as script
-                from .planner_agent import PlannerAgent  # type: ignore
-
-            planner = PlannerAgent()
-            planner_path = Path(planner.output_file)
-            if not planner_path.exists():
+            # Read planner output (PlannerAgent.output_file)
+            if not PLANNER_OUTPUT.exists():
                 return None
 
-            with open(planner_path, "r", encoding="utf-8") as f:
-                planner_json = json.load(f)
+            planner_json = read_json(PLANNER_OUTPUT)
 
             subject = planner_json.get("subject") or planner_json.get("title") or "Planner Output"
             body = planner_json.get("body") or planner_json.get("content") or ""
@@ -554,52 +530,21 @@ END:VCALENDAR"""
                 recs = [str(recs)]
 
             pdf_filename = f"planner_summary_{datetime.now().strftime('%Y%m%d')}.pdf"
-            pdf_path = self.artifacts_dir / pdf_filename
-
-            styles = getSampleStyleSheet()
-            story: list = []
-            story.append(Paragraph(subject, styles["Title"]))
-            story.append(Paragraph(f"Generated at: {datetime.now().isoformat()}", styles["Normal"]))
-            story.append(Spacer(1, 16))
-            if body:
-                story.append(Paragraph("Summary Email Draft", styles["Heading2"]))
-                story.append(Spacer(1, 6))
-                # Split body to avoid overly long paragraphs
-                for para in str(body).split("\n\n"):
-                    story.append(Paragraph(para.strip().replace("\n", "<br/>"), styles["Normal"]))
-                    story.append(Spacer(1, 6))
-
-            if recs:
-                story.append(Spacer(1, 10))
-                story.append(Paragraph("Top Recommendations", styles["Heading2"]))
-                story.append(Spacer(1, 6))
-                bullet_items = [
-                    ListItem(Paragraph(str(r), styles["Normal"])) for r in recs[:15]
-                ]
-                story.append(
-                    ListFlowable(
-                        bullet_items,
-                        bulletType="bullet",
-                        start="circle",
-                        bulletColor=colors.darkblue,
-                        leftIndent=18,
-                    )
-                )
-
-            doc = SimpleDocTemplate(str(pdf_path), pagesize=A4)
-            try:
-                doc.build(story)
-            except PermissionError:
-                pdf_filename = f"planner_summary_{datetime.now().strftime('%Y%m%d')}_{self._generate_uid()}.pdf"
-                pdf_path = self.artifacts_dir / pdf_filename
-                doc = SimpleDocTemplate(str(pdf_path), pagesize=A4)
-                doc.build(story)
+            # Rendered in the PDF process pool
+            pdf_path = pdf_render.submit(
+                pdf_render.render_planner_pdf,
+                str(self.artifacts_dir / pdf_filename),
+                subject,
+                body,
+                [str(r) for r in recs[:15]],
+            ).result()
+            self.blobs.adopt(f"artifacts/{Path(pdf_path).name}", Path(pdf_path))
 
             return self.Artifact(
                 id=f"pdf_{self._generate_uid()}",
                 name="Planner Summary",
                 type="pdf",
-                url=str(pdf_path),
+                url=pdf_path,
                 description="PDF generated from planner-agent output",
             )
 
@@ -607,57 +552,40 @@ END:VCALENDAR"""
             print(f"Failed to create planner PDF artifact: {e}")
             return None
 
-    def _maybe_upload_artifact(self, artifact: "PackagerAgent.Artifact") -> "PackagerAgent.Artifact":
-        """Upload artifact file to Supabase Storage if configured and return updated artifact with public URL."""
-        try:
-            if not self.supabase:
-                return artifact
-            local_url = artifact.url
-            if not local_url:
-                return artifact
-            local_path = Path(local_url)
-            if not local_path.exists():
-                return artifact
-            date_prefix = datetime.now().strftime('%Y/%m/%d')
-            destination = f"{date_prefix}/{local_path.name}"
-            content_type_map = {
-                ".pdf": "application/pdf",
-                ".json": "application/json",
-                ".ics": "text/calendar",
-            }
-            content_type = content_type_map.get(local_path.suffix.lower(), "application/octet-stream")
-            with open(local_path, "rb") as f:
-                self.supabase.storage.from_(self.supabase_bucket).upload(
-                    file=f,
-                    path=destination,
-                    file_options={"contentType": content_type, "upsert": True},
-                )
-            public_url = self.supabase.storage.from_(self.supabase_bucket).get_public_url(destination)
-            artifact.url = public_url
-            return artifact
-        except Exception as e:
-            print(f"Supabase upload failed: {e}")
-            return artifact
+    def _upload_artifacts(
+        self, artifacts: List["PackagerAgent.Artifact"]
+    ) -> List["PackagerAgent.Artifact"]:
+        """
+        Upload artifact files to storage, if configured, and point each
+        artifact at its public URL. Files already uploaded with the same
+        bytes are skipped; a failed upload keeps the local path.
+        """
+        if self.uploader is None:
+            return artifacts
+        local = [Path(a.url) for a in artifacts if a.url and Path(a.url).exists()]
+        urls = self.uploader.upload_many(local)
+        for artifact in artifacts:
+            url = urls.get(Path(artifact.url)) if artifact.url else None
+            if url:
+                artifact.url = url
+        return artifacts
 
     def _transform_issues_to_clauses(
         self, issues: List[Dict[str, Any]], original_clauses: List[str]
     ) -> List[Dict[str, Any]]:
         """Transform analysis issues to frontend clause format."""
         transformed_clauses = []
+        # Built once per document instead of scanning every clause per issue
+        anchors = ClauseAnchorIndex(original_clauses)
 
         for i, issue in enumerate(issues):
             # Find the original clause text
             clause_text = issue.get("clause", "")
-            original_index = -1
-
-            # Try to find the clause in original clauses
-            for j, orig_clause in enumerate(original_clauses):
-                if clause_text in orig_clause or orig_clause in clause_text:
-                    original_index = j
-                    break
+            original_index = anchors.find(clause_text)
 
             transformed_clause = {
-                "id": f"clause_{i}_{self._generate_uid()}",
+                # Stable across runs for the same issue text
+                "id": f"clause_{i}_{hashlib.md5(clause_key(clause_text).encode()).hexdigest()[:8]}",
                 "category": issue.get("category", "Unknown"),
                 "risk": issue.get("risk", "OK"),
                 "title": f"Clause {i + 1}: {issue.get('category', 'Issue')}",
@@ -687,15 +615,6 @@ END:VCALENDAR"""
 
         return body
 
-    def _generate_top_recommendations(self, issues: List[Dict[str, Any]]) -> List[str]:
-        """Generate top recommendations from issues."""
-        recommendations = []
-        for issue in issues[:10]:  # Top 10 recommendations
-            rec = issue.get("recommendation", "")
-            if rec and rec not in recommendations:
-                recommendations.append(rec)
-        return recommendations
-
     def _generate_document_id(self, title: str, date: str) -> str:
         """Generate a unique document ID."""
         content = f"{title}_{date}_{datetime.now().isoformat()}"
@@ -718,22 +637,48 @@ END:VCALENDAR"""
             if not intake_path.exists():
                 raise FileNotFoundError("intake_agent.json not found")
 
-            with open(intake_path, "r", encoding="utf-8") as f:
-                intake_json = json.load(f)
+            intake_bytes = intake_path.read_bytes()
+            intake_json = loads(intake_bytes)
 
             # Read analysis agent output
             analysis_path = self.output_dir / "analysis_result.json"
             if not analysis_path.exists():
                 raise FileNotFoundError("analysis_result.json not found")
 
-            with open(analysis_path, "r", encoding="utf-8") as f:
-                analysis_json = json.load(f)
+            analysis_bytes = analysis_path.read_bytes()
+            analysis_json = loads(analysis_bytes)
+
+            # Nothing to do when none of the inputs changed since the last run
+            planner_ics_hash = self._file_hash(self.output_dir / "planner_event.ics")
+            inputs = self._input_hash(
+                hashlib.sha256(intake_bytes).hexdigest(),
+                hashlib.sha256(analysis_bytes).hexdigest(),
+                self._file_hash(PLANNER_OUTPUT),
+                planner_ics_hash,
+                None if planner_ics_hash else datetime.now().strftime("%Y%m%d"),
+            )
+            previous = self._load_packaged(inputs)
+            if previous is not None:
+                print("Packaging inputs unchanged, reusing dashboard.json")
+                return previous
+
+            # Indexed once and shared by every builder below
+            index = AnalysisIndex(analysis_json)
 
             # Package the dashboard
-            dashboard_data = self.package_dashboard(intake_json, analysis_json)
+            dashboard_data = self.package_dashboard(intake_json, analysis_json, index)
 
             # Create frontend package
-            frontend_package = self.create_frontend_package(intake_json, analysis_json)
+            frontend_package = self.create_frontend_package(
+                intake_json, analysis_json, index
+            )
+
+            manifest = self._load_manifest()
+            manifest["packaging"] = {
+                "inputs": inputs,
+                "built_at": datetime.now().isoformat(),
+            }
+            self._save_manifest(manifest)
 
             print("Packaging completed successfully!")
             print("Created both dashboard.json and frontend_package.json")
@@ -745,27 +690,30 @@ END:VCALENDAR"""
         except Exception as e:
             raise RuntimeError(f"Packaging failed: {e}")
 
-    def _get_negotiation_rider_content(self, analysis_json: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract negotiation rider content for frontend."""
+    def _load_packaged(self, inputs: str) -> Optional[Dict[str, Any]]:
+        """dashboard.json and frontend_package.json if built from these inputs."""
+        entry = self._load_manifest().get("packaging")
+        if not entry or entry.get("inputs") != inputs:
+            return None
         try:
-            high_risk_issues = [
-                issue
-                for issue in analysis_json.get("issues", [])
-                if issue.get("risk") == "HIGH"
-            ]
+            dashboard_data = read_json(self.output_dir / "dashboard.json")
+            frontend_package = read_json(self.output_dir / "frontend_package.json")
+        except Exception:
+            return None
+        # Artifacts may have been garbage-collected from the blob store since
+        for artifact in dashboard_data.get("artifacts", []):
+            url = artifact.get("url", "")
+            if not url.startswith(("http://", "https://")) and not Path(url).exists():
+                return None
+        return {"dashboard": dashboard_data, "frontend_package": frontend_package}
 
+    def _get_negotiation_rider_content(self, index: AnalysisIndex) -> Dict[str, Any]:
+        """Extract negotiation rider content for frontend."""
+        try:
             return {
                 "title": "Negotiation Rider - Proposed Changes",
                 "purpose": "This document outlines proposed changes to address unfair clauses in the rental agreement",
-                "proposed_changes": [
-                    {
-                        "original_clause": issue.get("clause", ""),
-                        "proposed_change": issue.get("recommendation", ""),
-                        "rationale": issue.get("rationale", ""),
-                        "category": issue.get("category", ""),
-                    }
-                    for issue in high_risk_issues[:15]  # Top 15 issues
-                ],
+                "proposed_changes": index.proposed_changes,
                 "legal_basis": "Based on Singapore rental law and industry standards",
                 "generated_at": datetime.now().isoformat(),
             }
@@ -773,21 +721,13 @@ END:VCALENDAR"""
             print(f"Failed to get negotiation rider content: {e}")
             return {"error": "Failed to generate negotiation rider content"}
 
-    def _get_tenant_email_content(self, analysis_json: Dict[str, Any]) -> Dict[str, Any]:
+    def _get_tenant_email_content(self, index: AnalysisIndex) -> Dict[str, Any]:
         """Extract tenant email content for frontend."""
         try:
-            high_risk_issues = [
-                issue
-                for issue in analysis_json.get("issues", [])
-                if issue.get("risk") == "HIGH"
-            ]
-
             return {
                 "subject": "High-Risk Clauses in Your Rental Agreement - Action Required",
-                "body": self._generate_email_body(high_risk_issues),
-                "recommendations": [
-                    issue.get("recommendation", "") for issue in high_risk_issues[:5]
-                ],
+                "body": self._generate_email_body(index.high_risk),
+                "recommendations": index.high_risk_recommendations,
                 "generated_at": datetime.now().isoformat(),
             }
         except Exception as e:
@@ -799,8 +739,7 @@ END:VCALENDAR"""
         try:
             planner_path = self.output_dir / "planner-agent.json"
             if planner_path.exists():
-                with open(planner_path, "r", encoding="utf-8") as f:
-                    planner_json = json.load(f)
+                planner_json = read_json(planner_path)
                 
                 return {
                     "subject": planner_json.get("subject", "Planner Summary"),
@@ -851,11 +790,10 @@ END:VCALENDAR"""
             print(f"Failed to get calendar event content: {e}")
             return {"error": "Failed to get calendar event content"}
 
-    def _get_agreement_summary_content(self, intake_data: Dict[str, Any], analysis_json: Dict[str, Any]) -> Dict[str, Any]:
+    def _get_agreement_summary_content(self, intake_data: Dict[str, Any], index: AnalysisIndex) -> Dict[str, Any]:
         """Extract agreement summary content for frontend."""
         try:
-            summary = analysis_json.get("summary", {})
-            issues = analysis_json.get("issues", [])
+            summary = index.summary
             
             return {
                 "title": intake_data.get("title", "Rental Agreement Summary"),
@@ -873,7 +811,7 @@ END:VCALENDAR"""
                         "category": issue.get("category", "Unknown"),
                         "recommendation": issue.get("recommendation", "")
                     }
-                    for issue in issues[:20]  # Top 20 issues
+                    for issue in index.top(20)  # Top 20 issues
                 ],
                 "generated_at": datetime.now().isoformat(),
             }
@@ -881,25 +819,6 @@ END:VCALENDAR"""
             print(f"Failed to get agreement summary content: {e}")
             return {"error": "Failed to get agreement summary content"}
 
-    def _get_category_breakdown(self, issues: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Get breakdown of issues by category."""
-        try:
-            category_counts = {}
-            for issue in issues:
-                category = issue.get("category", "Unknown")
-                if category not in category_counts:
-                    category_counts[category] = {"total": 0, "high": 0, "medium": 0, "ok": 0}
-                
-                category_counts[category]["total"] += 1
-                risk = issue.get("risk", "OK")
-                if risk in category_counts[category]:
-                    category_counts[category][risk.lower()] += 1
-            
-            return category_counts
-        except Exception as e:
-            print(f"Failed to get category breakdown: {e}")
-            return {}
-
 
 if __name__ == "__main__":
     # Test the packager agent
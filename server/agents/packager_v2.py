@@ -1,8 +1,9 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Literal
+from typing import List, Dict, Any, Literal, Optional
 from server.agents.base_agent import BaseAgent
 from pydantic import BaseModel, Field
-import json
+from server.util.precompress import precompress_later
+from server.util.serialization import write_json
 from pathlib import Path
 from html import escape
 from datetime import datetime
@@ -37,6 +38,21 @@ class Artifact(BaseModel):
     url: str = Field(..., description="URL to download the artifact")
 
 
+class VersionChanges(BaseModel):
+    version: int = Field(..., description="Version number of this document")
+    previousVersion: int = Field(..., description="Version it was compared with")
+    added: List[str] = Field([], description="Clauses new in this version")
+    changed: List[str] = Field(
+        [], description="Clauses edited since the previous version"
+    )
+    removed: List[str] = Field(
+        [], description="Clauses dropped since the previous version"
+    )
+    unchanged: int = Field(
+        0, description="Count of clauses whose verdicts were reused"
+    )
+
+
 class DashboardData(BaseModel):
     riskCounts: RiskCounts = Field(..., description="Summary of risk counts")
     flaggedClauses: List[FlaggedClause] = Field(
@@ -45,6 +61,9 @@ class DashboardData(BaseModel):
     artifacts: List[Artifact] = Field(
         [], description="List of generated artifacts for download"
     )
+    changes: Optional[VersionChanges] = Field(
+        None, description="What changed since the previous version of the document"
+    )
 
 
 class PackagerV2Agent(BaseAgent):
@@ -52,6 +71,8 @@ class PackagerV2Agent(BaseAgent):
     Packages analysis results into a format expected by the frontend dashboard.
     """
 
+    agent_type = "packager_agent"
+
     def __init__(self):
         super().__init__()
         BASE_DIR = Path(__file__).resolve().parent   # points to server/
@@ -63,6 +84,7 @@ class PackagerV2Agent(BaseAgent):
         analysis_result: Dict[str, Any],
         planner_email_output=None,
         ics_file_path=None,
+        changes: Optional[VersionChanges] = None,
     ) -> DashboardData:
         """
         Transform analysis results into the format expected by the frontend.
@@ -71,40 +93,8 @@ class PackagerV2Agent(BaseAgent):
             analysis_result: The analysis results from the AnalyserAgent
             planner_email_output: Optional output from PlannerAgent's email generation
             ics_file_path: Optional path to ICS file generated by PlannerAgent
+            changes: Optional diff against the previous version of the document
         """
-        # Extract risk counts from the summary
-        summary = analysis_result.get("summary", {})
-        risk_counts = RiskCounts(
-            high=summary.get("high_risk", 0),
-            medium=summary.get("medium_risk", 0),
-            ok=summary.get("ok", 0),
-        )
-
-        # Transform issues into flagged clauses
-        issues = analysis_result.get("issues", [])
-        flagged_clauses = []
-
-        for i, issue in enumerate(issues):
-            if issue.get("risk") in [
-                "HIGH",
-                "MEDIUM",
-            ]:  # Only include HIGH and MEDIUM risks
-                clause_id = str(i + 1)
-                anchor = f"clause-{clause_id}"
-
-                flagged_clauses.append(
-                    FlaggedClause(
-                        id=clause_id,
-                        category=self._map_category(issue.get("category", "")),
-                        risk=issue.get("risk", "MEDIUM"),
-                        title=issue.get("clause", "")[
-                            :50
-                        ],  # Use first 50 chars as title
-                        description=issue.get("rationale", ""),
-                        anchor=anchor,
-                    )
-                )
-
         # Create artifacts with real paths from planner agent outputs
         artifacts = []
 
@@ -134,9 +124,7 @@ class PackagerV2Agent(BaseAgent):
                 planner_email_output)
 
             # save raw planner JSON (kept)
-            (self.output_dir / "planner-agent.json").write_text(
-                json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8"
-            )
+            write_json(self.output_dir / "planner-agent.json", obj)
 
             subject = (obj.get("subject") or "Legal Recommendations")
             body_text = (obj.get("body") or "")
@@ -164,16 +152,70 @@ class PackagerV2Agent(BaseAgent):
             ))
 
         # Create the complete dashboard data
-        dashboard_data = DashboardData(
-            riskCounts=risk_counts, flaggedClauses=flagged_clauses, artifacts=artifacts
-        )
+        dashboard_data = self.build_dashboard(analysis_result, artifacts, changes)
 
         # Save to file for persistence
-        with open(self.output_file, "w", encoding="utf-8") as f:
-            json.dump(dashboard_data.model_dump(), f, ensure_ascii=False, indent=2)
-            print(f"dumped at {Path(self.output_file)}")
+        # Encoded straight from the model, no intermediate dict
+        write_json(self.output_file, dashboard_data)
+        print(f"dumped at {Path(self.output_file)}")
+        # gzip/brotli copies for /download-file, built in the background
+        precompress_later(
+            [self.output_file]
+            + [self.output_dir / Path(a.url).name for a in artifacts]
+        )
         return dashboard_data
 
+    def build_dashboard(
+        self,
+        analysis_result: Dict[str, Any],
+        artifacts: Optional[List[Artifact]] = None,
+        changes: Optional[VersionChanges] = None,
+    ) -> DashboardData:
+        """
+        Dashboard data for an analysis without writing anything to the outputs
+        directory. Batch runs use this directly; package_results adds the
+        planner artifacts and saves the latest interactive run.
+        """
+        # Extract risk counts from the summary
+        summary = analysis_result.get("summary", {})
+        risk_counts = RiskCounts(
+            high=summary.get("high_risk", 0),
+            medium=summary.get("medium_risk", 0),
+            ok=summary.get("ok", 0),
+        )
+
+        # Transform issues into flagged clauses
+        issues = analysis_result.get("issues", [])
+        flagged_clauses = []
+
+        for i, issue in enumerate(issues):
+            if issue.get("risk") in [
+                "HIGH",
+                "MEDIUM",
+            ]:  # Only include HIGH and MEDIUM risks
+                clause_id = str(i + 1)
+                anchor = f"clause-{clause_id}"
+
+                flagged_clauses.append(
+                    FlaggedClause(
+                        id=clause_id,
+                        category=self._map_category(issue.get("category", "")),
+                        risk=issue.get("risk", "MEDIUM"),
+                        title=issue.get("clause", "")[
+                            :50
+                        ],  # Use first 50 chars as title
+                        description=issue.get("rationale", ""),
+                        anchor=anchor,
+                    )
+                )
+
+        return DashboardData(
+            riskCounts=risk_counts,
+            flaggedClauses=flagged_clauses,
+            artifacts=artifacts or [],
+            changes=changes,
+        )
+
     def _map_category(self, category: str) -> str:
         """Map analysis categories to frontend categories."""
         category_map = {
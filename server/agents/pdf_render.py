@@ -0,0 +1,266 @@
+"""
+Report PDF rendering for PackagerAgent.
+
+The render_* functions are plain module-level functions so they can run in
+worker processes: reportlab layout is CPU-bound and would otherwise hold the
+GIL for the whole request. Each worker imports reportlab and builds the
+stylesheet and table style once (see the lru_cached helpers below), renders
+into memory and writes the finished bytes, so a failed write never causes
+the story to be laid out a second time.
+"""
+
+import importlib.util
+import io
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from server.util.config import getConfig
+
+
+def available() -> bool:
+    return importlib.util.find_spec("reportlab") is not None
+
+
+@lru_cache(maxsize=1)
+def _styles():
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=1)
+def _summary_table_style():
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+        ]
+    )
+
+
+def _build(story: list) -> bytes:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4).build(story)
+    return buffer.getvalue()
+
+
+def _write(path: str, data: bytes) -> str:
+    """
+    Write the PDF through a temporary file renamed over path, falling back to
+    a unique name if path is locked. path may be a hard link to a stored
+    blob, so its inode is replaced, never written in place.
+    """
+    target = Path(path)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    try:
+        os.replace(tmp, target)
+    except PermissionError:
+        target = target.with_name(f"{target.stem}_{uuid.uuid4().hex[:8]}.pdf")
+        os.replace(tmp, target)
+    return str(target)
+
+
+def render_summary_pdf(
+    path: str,
+    title: str,
+    agreement_date: str,
+    risk_summary: Dict[str, Any],
+    issues: List[Dict[str, Any]],
+) -> str:
+    """Render the agreement summary report; returns the path written."""
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    styles = _styles()
+    story: list = [Paragraph(title, styles["Title"])]
+    if agreement_date:
+        story.append(Paragraph(f"Agreement Date: {agreement_date}", styles["Normal"]))
+    story.append(
+        Paragraph(f"Generated at: {datetime.now().isoformat()}", styles["Normal"])
+    )
+    story.append(Spacer(1, 12))
+
+    table = Table(
+        [
+            ["High", "Medium", "OK", "Total"],
+            [
+                str(risk_summary.get("high_risk", 0)),
+                str(risk_summary.get("medium_risk", 0)),
+                str(risk_summary.get("ok", 0)),
+                str(risk_summary.get("total", 0)),
+            ],
+        ]
+    )
+    table.setStyle(_summary_table_style())
+    story.append(table)
+    story.append(Spacer(1, 18))
+
+    story.append(Paragraph("Top Issues", styles["Heading2"]))
+    story.append(Spacer(1, 6))
+    for idx, issue in enumerate(issues[:10], start=1):
+        category = issue.get("category", "Issue")
+        risk = issue.get("risk", "-")
+        clause_snippet = issue.get("clause", "")
+        rationale = issue.get("rationale", "")
+        recommendation = issue.get("recommendation", "")
+        reference = issue.get("reference", "")
+
+        if rationale and clause_snippet and rationale.strip() == clause_snippet.strip():
+            rationale = reference or ""
+        if (
+            rationale
+            and clause_snippet
+            and clause_snippet.strip() in rationale.strip()
+            and len(rationale.strip()) <= len(clause_snippet.strip()) + 10
+        ):
+            rationale = reference or ""
+
+        story.append(
+            Paragraph(
+                f"{idx}. <b>{category}</b> - Risk: <b>{risk}</b>", styles["Normal"]
+            )
+        )
+        if clause_snippet:
+            story.append(Paragraph(f"Clause: {clause_snippet}", styles["Normal"]))
+        if rationale:
+            story.append(Paragraph(f"Rationale: {rationale}", styles["Normal"]))
+        if recommendation:
+            story.append(
+                Paragraph(f"Recommendation: {recommendation}", styles["Normal"])
+            )
+        story.append(Spacer(1, 10))
+
+    data = _build(story)
+    if not data:
+        data = _summary_fallback(title, risk_summary, issues)
+    return _write(path, data)
+
+
+def _summary_fallback(
+    title: str, risk_summary: Dict[str, Any], issues: List[Dict[str, Any]]
+) -> bytes:
+    """Minimal one-page canvas rendering used if the story produced no output."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(72, 800, title)
+    c.setFont("Helvetica", 10)
+    c.drawString(72, 785, f"Generated at: {datetime.now().isoformat()}")
+    c.setFont("Helvetica", 12)
+    c.drawString(72, 760, "Risk Summary:")
+    c.drawString(
+        90,
+        740,
+        f"High: {risk_summary.get('high_risk', 0)}  Medium: {risk_summary.get('medium_risk', 0)}  "
+        f"OK: {risk_summary.get('ok', 0)}  Total: {risk_summary.get('total', 0)}",
+    )
+    if issues:
+        first = issues[0]
+        c.drawString(
+            72,
+            710,
+            f"1. {first.get('category', 'Issue')} - Risk: {first.get('risk', '-')}",
+        )
+        c.setFont("Helvetica", 10)
+        c.drawString(90, 695, f"Clause: {first.get('clause', '')[:100]}")
+        c.drawString(90, 680, f"Rationale: {first.get('rationale', '')[:100]}")
+        c.drawString(
+            90, 665, f"Recommendation: {first.get('recommendation', '')[:100]}"
+        )
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def render_planner_pdf(
+    path: str, subject: str, body: str, recommendations: List[str]
+) -> str:
+    """Render the planner email draft and recommendations; returns the path written."""
+    from reportlab.lib import colors
+    from reportlab.platypus import ListFlowable, ListItem, Paragraph, Spacer
+
+    styles = _styles()
+    story: list = [
+        Paragraph(subject, styles["Title"]),
+        Paragraph(f"Generated at: {datetime.now().isoformat()}", styles["Normal"]),
+        Spacer(1, 16),
+    ]
+    if body:
+        story.append(Paragraph("Summary Email Draft", styles["Heading2"]))
+        story.append(Spacer(1, 6))
+        # Split body to avoid overly long paragraphs
+        for para in str(body).split("\n\n"):
+            story.append(
+                Paragraph(para.strip().replace("\n", "<br/>"), styles["Normal"])
+            )
+            story.append(Spacer(1, 6))
+
+    if recommendations:
+        story.append(Spacer(1, 10))
+        story.append(Paragraph("Top Recommendations", styles["Heading2"]))
+        story.append(Spacer(1, 6))
+        story.append(
+            ListFlowable(
+                [
+                    ListItem(Paragraph(str(r), styles["Normal"]))
+                    for r in recommendations[:15]
+                ],
+                bulletType="bullet",
+                start="circle",
+                bulletColor=colors.darkblue,
+                leftIndent=18,
+            )
+        )
+
+    return _write(path, _build(story))
+
+
+@lru_cache(maxsize=1)
+def get_pdf_pool() -> Optional[ProcessPoolExecutor]:
+    """Process pool shared by every packager; None when PDF_WORKERS is 0."""
+    workers = getConfig().get_pdf_workers()
+    if workers <= 0:
+        return None
+    # spawn rather than fork: the server process runs threads
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def submit(fn: Callable[..., str], *args: Any) -> "Future[str]":
+    """
+    Render in the process pool, or inline when the pool is disabled or
+    broken. Either way the caller gets a Future to collect later.
+    """
+    pool = get_pdf_pool()
+    if pool is not None:
+        try:
+            return pool.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            print(f"PDF process pool unavailable, rendering inline: {e}")
+    future: "Future[str]" = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
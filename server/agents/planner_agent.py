@@ -1,35 +1,41 @@
-import json
 import sys
 import os
-import yaml
 
 sys.path.append(os.path.dirname(__file__))
 from base_agent import BaseAgent
 from datetime import datetime
 from schema import EmailSchema
+from server.util.serialization import read_json, write_json
 
 
 class PlannerAgent(BaseAgent):
+    agent_type = "planner_agent"
+
     def __init__(self):
         super().__init__()
         outputs_dir = os.path.join(os.path.dirname(__file__), "outputs")
         os.makedirs(outputs_dir, exist_ok=True)
         self.output_file = os.path.join(outputs_dir, "planner-agent.json")
 
-    def generate_email_with_gemini(self, analysis_file=None):
+    def generate_email_with_gemini(
+        self, analysis_file=None, deadline=None, analysis=None, save=True
+    ):
         """
         Uses Gemini AI (via BaseAgent) to generate a structured email (subject, body, recommendations) from high-risk clauses in analysis_result.json.
+        A pipeline passes its own analysis result instead, since the file may
+        already hold another request's; save=False leaves planner-agent.json
+        for the caller to write.
         """
-        if analysis_file is None:
-            analysis_file = os.path.join(
-                os.path.dirname(__file__), "outputs", "analysis_result.json"
-            )
-        try:
-            with open(analysis_file, "r", encoding="utf-8") as f:
-                analysis = json.load(f)
-        except Exception as e:
-            print(f"Error reading analysis file: {e}")
-            return None
+        if analysis is None:
+            if analysis_file is None:
+                analysis_file = os.path.join(
+                    os.path.dirname(__file__), "outputs", "analysis_result.json"
+                )
+            try:
+                analysis = read_json(analysis_file)
+            except Exception as e:
+                print(f"Error reading analysis file: {e}")
+                return None
         issues = [
             issue
             for issue in analysis.get("issues", [])
@@ -38,33 +44,30 @@ class PlannerAgent(BaseAgent):
         if not issues:
             print("No high risk clauses found.")
             return None
-        # Load prompt template from agent_prompts.yaml
-
-        prompt_path = os.path.join(
-            os.path.dirname(__file__), "prompts", "agent_prompts.yaml"
-        )
-        with open(prompt_path, "r", encoding="utf-8") as pf:
-            prompts_yaml = yaml.safe_load(pf)
-        prompt_template = prompts_yaml["prompts"].get("planner_agent")
+        # Prompt template from the shared prompt registry
+        prompt_template = self.get_system_prompt("planner_agent")
         input_text = prompt_template + "\n\n"
         for idx, issue in enumerate(issues):
             input_text += f"{idx + 1}. Clause: {issue['clause']}\nRecommendation: {issue['recommendation']}\n\n"
         system_prompt = (
             self.get_system_prompt("planner_agent") or "You are a legal assistant."
         )
-        response: EmailSchema = self.run(system_prompt, input_text, EmailSchema)
+        response: EmailSchema = self.run(
+            system_prompt, input_text, EmailSchema, deadline=deadline
+        )
         if not response:
             print("No response from Gemini agent.")
             return None
         # Save to output file
-        with open(self.output_file, "w", encoding="utf-8") as f:
-            json.dump(response.dict(), f, indent=2)
-        print(f"Gemini-generated structured email saved to {self.output_file}")
+        if save:
+            write_json(self.output_file, response)
+            print(f"Gemini-generated structured email saved to {self.output_file}")
         return response
 
-    def create_signing_ics_from_intake(self, intake_file=None):
+    def create_signing_ics_from_intake(self, intake_file=None, intake=None):
         """
         Reads intake_agent.json and creates an ICS file for signing date using the 'date' field.
+        A pipeline passes its own intake record instead of reading the file.
         """
         if intake_file is None:
             intake_file = os.path.join(
@@ -74,8 +77,7 @@ class PlannerAgent(BaseAgent):
             os.path.dirname(__file__), "outputs", "planner_event.ics"
         )
         try:
-            with open(intake_file, "r", encoding="utf-8") as f:
-                intake_data = json.load(f)
+            intake_data = intake if intake is not None else read_json(intake_file)
             date_str = intake_data["summary"]["content"]["date"]
             from datetime import timedelta
 
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+AGENTS_DIR = os.path.dirname(__file__)
+PROMPTS_PATH = os.path.join(AGENTS_DIR, "prompts", "agent_prompts.yaml")
+RULEBOOK_PATH = os.path.join(AGENTS_DIR, "rules", "rulebook.yaml")
+GUARDRAIL_PATH = os.path.join(AGENTS_DIR, "rules", "guardrail.yaml")
+
+
+class RegistrySnapshot:
+    """
+    Immutable, precompiled view of the prompts, rulebook and guardrail rules.
+    A reload builds a new snapshot and swaps it in, so a caller holding one
+    always sees a consistent set of all three.
+    """
+
+    def __init__(self, sources: Dict[str, bytes]):
+        prompts = yaml.safe_load(sources["prompts"]) or {}
+        rulebook = yaml.safe_load(sources["rulebook"]) or {}
+        guardrail = yaml.safe_load(sources["guardrail"]) or {}
+
+        self.prompts: Dict[str, str] = prompts.get("prompts", {})
+        self.rules: List[Dict[str, Any]] = rulebook.get("rules", [])
+        # Rendered once instead of on every analyser request
+        self.rulebook_yaml: str = yaml.dump({"rules": self.rules}, allow_unicode=True)
+        self.guardrail_rules: List[Dict[str, Any]] = [
+            self._compile_guardrail(rule) for rule in guardrail.get("rules", [])
+        ]
+
+        digest = hashlib.sha256()
+        for name in sorted(sources):
+            digest.update(name.encode() + b"\0" + sources[name] + b"\0")
+        self.version: str = digest.hexdigest()[:12]
+
+    def _compile_guardrail(self, rule: Dict[str, Any]) -> Dict[str, Any]:
+        rule = dict(rule)
+        if rule["type"] == "regex":
+            rule["compiled"] = re.compile(rule["pattern"])
+        elif rule["type"] == "protect":
+            rule["keywords"] = [kw.lower() for kw in rule.get("pattern", [])]
+        return rule
+
+    def prompt(self, agent_type: str) -> Optional[str]:
+        return self.prompts.get(agent_type, self.prompts.get("base"))
+
+
+class Registry:
+    """
+    Central, hot-reloadable registry of agent prompts, the analysis rulebook
+    and the guardrail rules.
+
+    Files are parsed and compiled once. current() re-checks their mtimes at
+    most every check_interval seconds and atomically swaps in a new snapshot
+    when any of them changed. A file that fails to parse keeps the previous
+    snapshot in service. version identifies the loaded content and changes
+    whenever any of the files does, so caches can key on it.
+    """
+
+    def __init__(
+        self,
+        prompts_path: str = PROMPTS_PATH,
+        rulebook_path: str = RULEBOOK_PATH,
+        guardrail_path: str = GUARDRAIL_PATH,
+        check_interval: float = 1.0,
+    ):
+        self.paths = {
+            "prompts": prompts_path,
+            "rulebook": rulebook_path,
+            "guardrail": guardrail_path,
+        }
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._mtimes = self._stat()
+        self._snapshot = RegistrySnapshot(self._read())
+
+    def _stat(self) -> Tuple[float, ...]:
+        return tuple(os.stat(path).st_mtime_ns for path in self.paths.values())
+
+    def _read(self) -> Dict[str, bytes]:
+        sources = {}
+        for name, path in self.paths.items():
+            with open(path, "rb") as f:
+                sources[name] = f.read()
+        return sources
+
+    def current(self) -> RegistrySnapshot:
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._snapshot
+
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return self._snapshot
+            self._checked = now
+            try:
+                mtimes = self._stat()
+                if mtimes != self._mtimes:
+                    # Record the mtimes first so a broken file is reported once
+                    self._mtimes = mtimes
+                    self._snapshot = RegistrySnapshot(self._read())
+                    print(
+                        f"Reloaded prompts and rules (version {self._snapshot.version})"
+                    )
+            except Exception as e:
+                print(f"Keeping registry version {self._snapshot.version}: {e}")
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self.current().version
+
+
+@lru_cache(maxsize=1)
+def get_registry() -> Registry:
+    """Process-wide registry shared by every agent."""
+    return Registry()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Literal
+from typing import List, Literal, Optional
 
 
 class IntakeAgentOutput(BaseModel):
@@ -24,6 +24,9 @@ class Issue(BaseModel):
     rationale: str
     recommendation: str
     reference: str
+    confidence: Optional[float] = Field(
+        None, description="Confidence in the risk verdict, from 0 to 1"
+    )
 
 
 class AnalysisResult(BaseModel):
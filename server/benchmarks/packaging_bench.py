@@ -0,0 +1,114 @@
+"""
+Packaging latency with report PDFs rendered inline vs in the process pool,
+for 10, 100 and 1000-issue analyses.
+
+Run from the repository root: python -m server.benchmarks.packaging_bench
+Needs reportlab. Outputs are written to a temporary directory.
+"""
+
+import os
+import tempfile
+import time
+from threading import Thread
+from typing import Any, Dict
+
+from server.agents import pdf_render
+from server.agents.analysis_index import AnalysisIndex
+from server.agents.packager import PackagerAgent
+from server.util.config import Config
+
+SIZES = (10, 100, 1000)
+WORKERS = (0, 2)
+ROUNDS = 5
+
+
+def analysis(n: int) -> Dict[str, Any]:
+    issues = [
+        {
+            "clause": f"{i}. The Tenant shall bear all repair costs above S${i * 10}.",
+            "risk": ("HIGH", "MEDIUM", "OK")[i % 3],
+            "category": "Financial Terms",
+            "rationale": "Shifts the Landlord's repair obligations to the Tenant.",
+            "recommendation": "Cap the Tenant's share of repair costs at S$200.",
+        }
+        for i in range(n)
+    ]
+    return {
+        "summary": {
+            "high_risk": n // 3,
+            "medium_risk": n // 3,
+            "ok": n - 2 * (n // 3),
+            "total": n,
+        },
+        "issues": issues,
+        "buckets": [],
+    }
+
+
+def package(
+    packager: PackagerAgent, intake: Dict[str, Any], result: Dict[str, Any]
+) -> None:
+    packager.manifest_path.unlink(missing_ok=True)
+    summary = Thread(
+        target=packager._create_summary_pdf_artifact,
+        args=(intake["summary"]["content"], AnalysisIndex(result)),
+    )
+    summary.start()
+    packager.package_dashboard(intake, result)
+    summary.join()
+
+
+def main() -> None:
+    if not pdf_render.available():
+        raise SystemExit("reportlab is not installed (pip install reportlab)")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            os.makedirs("agents/outputs")
+            packager = PackagerAgent()
+            for workers in WORKERS:
+                Config.PDF_WORKERS = workers
+                pdf_render.get_pdf_pool.cache_clear()
+                # Start the workers (and their reportlab import) before timing
+                warm_up = [
+                    pdf_render.submit(
+                        pdf_render.render_planner_pdf,
+                        os.path.join(tmp, f"warm{k}.pdf"),
+                        "Warm up",
+                        "",
+                        [],
+                    )
+                    for k in range(max(1, workers))
+                ]
+                for future in warm_up:
+                    future.result()
+                for n in SIZES:
+                    result = analysis(n)
+                    intake = {
+                        "summary": {
+                            "content": {
+                                "title": "Tenancy Agreement",
+                                "date": "2025-01-01",
+                                "clauses": [
+                                    issue["clause"] for issue in result["issues"]
+                                ],
+                            }
+                        }
+                    }
+                    start = time.perf_counter()
+                    for _ in range(ROUNDS):
+                        package(packager, intake, result)
+                    elapsed = (time.perf_counter() - start) / ROUNDS
+                    mode = "inline" if workers == 0 else f"{workers} processes"
+                    print(
+                        f"{n:>5} issues, PDFs {mode}: "
+                        f"{elapsed * 1000:.0f}ms per packaging"
+                    )
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Serialize and parse throughput of the stdlib json module vs orjson on
+frontend_package.json-sized payloads (20, 200 and 2000 issues), pretty and
+compact.
+
+Run from the repository root: python -m server.benchmarks.serialization_bench
+Outputs are written to a temporary directory.
+"""
+
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from server.agents.packager import PackagerAgent
+from server.util.serialization import orjson
+
+SIZES = (20, 200, 2000)
+
+
+def analysis(n: int) -> Dict[str, Any]:
+    issues = [
+        {
+            "clause": f"{i}. The Tenant shall bear all repair costs above S${i * 10} "
+            "and indemnify the Landlord against any claim arising from the "
+            "use of the Premises, including fair wear and tear.",
+            "risk": ("HIGH", "MEDIUM", "OK")[i % 3],
+            "category": ("Financial Terms", "Unfair Clauses", "Your Rights")[i % 3],
+            "rationale": "Shifts the Landlord's repair obligations to the Tenant; "
+            "fair wear and tear is normally excluded.",
+            "recommendation": f"Cap the Tenant's share of repair costs at S${200 + i}.",
+        }
+        for i in range(n)
+    ]
+    return {
+        "summary": {
+            "high_risk": n // 3,
+            "medium_risk": n // 3,
+            "ok": n - 2 * (n // 3),
+            "total": n,
+        },
+        "issues": issues,
+        "buckets": [],
+    }
+
+
+def rate(fn: Callable[[], Any], data_size: int) -> float:
+    """MB/s of fn over at least 0.5s."""
+    runs, start = 0, time.perf_counter()
+    while True:
+        fn()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= 0.5:
+            return runs * data_size / elapsed / 1e6
+
+
+def encoders() -> List[Tuple[str, Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    found = [
+        (
+            "json indent=2",
+            lambda o: json.dumps(o, ensure_ascii=False, indent=2).encode("utf-8"),
+            json.loads,
+        ),
+        (
+            "json compact",
+            lambda o: json.dumps(o, ensure_ascii=False, separators=(",", ":")).encode(
+                "utf-8"
+            ),
+            json.loads,
+        ),
+    ]
+    if orjson is not None:
+        found += [
+            (
+                "orjson indent=2",
+                lambda o: orjson.dumps(o, option=orjson.OPT_INDENT_2),
+                orjson.loads,
+            ),
+            ("orjson compact", orjson.dumps, orjson.loads),
+        ]
+    else:
+        print("orjson could not be imported; stdlib only")
+    return found
+
+
+def main() -> None:
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            os.makedirs("agents/outputs")
+            packager = PackagerAgent()
+            for n in SIZES:
+                result = analysis(n)
+                intake = {
+                    "summary": {
+                        "content": {
+                            "title": "Tenancy Agreement",
+                            "date": "2025-01-01",
+                            "clauses": [issue["clause"] for issue in result["issues"]],
+                        }
+                    }
+                }
+                package = packager.create_frontend_package(intake, result)
+                for label, encode, decode in encoders():
+                    data = encode(package)
+                    print(
+                        f"{n:>5} issues, {label:<16} {len(data) / 1024:>8.1f} KiB  "
+                        f"serialize {rate(lambda: encode(package), len(data)):>7.1f} MB/s  "
+                        f"parse {rate(lambda: decode(data), len(data)):>7.1f} MB/s"
+                    )
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,53 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from server.controller.upload_controller import router as ocr_router
 from server.agents.planner_agent import PlannerAgent
 from server.agents.intake_agent import IntakeAgent
 from server.agents.analyser_agent import AnalyserAgent
 from server.agents.packager import PackagerAgent
-from server.agents.packager_v2 import PackagerV2Agent
+from server.agents.registry import get_registry
+from server.agents.packager_v2 import DashboardData, PackagerV2Agent, VersionChanges
+from server.agents.schema import EmailSchema
+from server.repository.artifact_index import ArtifactIndex, ArtifactSnapshot
+from server.repository.document_versions import DocumentVersions, check_document_id
+from server.repository.result_index import ResultIndex, hash_document
+from server.service.batch_service import BatchService
 from server.service.email_service import EmailService
-import json
-from typing import List, Dict, Any
+from server.service.ocr_service import OCRService
+from server.util.request_decompression import RequestDecompressionMiddleware
+from server.util.config import getConfig
+from server.util.deadline import Deadline, DeadlineExceeded
+from server.util.hedging import latency_tracker
+from server.util.http_cache import bytes_response, file_response
+from server.util.precompress import is_variant
+from server.util.rate_limiter import get_rate_limiter
+from server.util.serialization import JSONBytesResponse, write_json
+from server.util.singleflight import SingleFlight
+import asyncio
+import hashlib
+import hmac
+import threading
+from typing import Dict, Any, Optional
 from pathlib import Path
-from starlette.responses import FileResponse, RedirectResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import RedirectResponse
 
-app = FastAPI()
+# Endpoints returning dicts or models are encoded with the shared serializer
+app = FastAPI(default_response_class=JSONBytesResponse)
+config = getConfig()
 intake_agent = IntakeAgent()
 analyser_agent = AnalyserAgent()
 planner_agent = PlannerAgent()
 packager_agent = PackagerAgent()
 packager_v2_agent = PackagerV2Agent()
 EmailServiceMain = EmailService()
+result_index = ResultIndex()
+document_versions = DocumentVersions()
+batch_service = BatchService(intake_agent, analyser_agent, packager_v2_agent)
+analysis_flight = SingleFlight()
+# Held while a run writes its intake, analysis and artifacts to the shared
+# outputs directory and while anything reads them back as a set
+outputs_lock = threading.Lock()
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +56,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestDecompressionMiddleware)
 
 
 app.include_router(ocr_router)
@@ -38,11 +68,225 @@ DASHBOARD_PATH = OUTPUT_DIR / "dashboard.json"
 ARTIFACTS_DIR = OUTPUT_DIR / "artifacts"
 
 
+@app.on_event("startup")
+def resume_batches():
+    batch_service.resume()
+
+
 @app.get("/")
 async def read_root():
     return {"message": "gaytards"}
 
 
+def _replay(record: Dict[str, Any], document_id: Optional[str] = None):
+    """Return a stored pipeline result in the same shape as _run_pipeline."""
+    with outputs_lock:
+        result_index.restore(record)
+    if document_id:
+        document_versions.add(
+            document_id,
+            record["id"],
+            record["intake"]["summary"]["content"]["clauses"],
+            record["analysis"],
+            record.get("version"),
+        )
+    planner = record.get("planner")
+    return (
+        DashboardData(**record["dashboard"]),
+        EmailSchema(**planner) if planner else None,
+    )
+
+
+def _run_pipeline(
+    document: str,
+    pipelined: bool = False,
+    stream_llm: bool = False,
+    force: bool = False,
+    deadline: Optional[Deadline] = None,
+    document_id: Optional[str] = None,
+):
+    """
+    Run intake, analysis, planning and packaging on a markdown document.
+    Returns the dashboard data and the planner email output.
+
+    When document_id names a document analysed before, the new version is
+    diffed against the latest one and only added or changed clauses are
+    re-analysed; the dashboard reports the changes.
+
+    Identical documents (by raw markdown hash, or by intake anchor_id once
+    intake has run) are served from the result index without further LLM
+    calls unless force is set. Each stage is skipped with DeadlineExceeded
+    once the request deadline has passed.
+
+    Runs for different documents overlap, so every stage gets this run's
+    intake and analysis in memory; only the final step that writes them and
+    the artifacts to the shared outputs directory runs one at a time.
+    """
+    raw_hash = hash_document(document)
+    # Results are only reused while the prompts and rules are unchanged
+    registry_version = get_registry().version
+    if not force:
+        record = result_index.lookup(raw_hash=raw_hash, version=registry_version)
+        if record:
+            return _replay(record, document_id)
+
+    previous = document_versions.latest(document_id) if document_id else None
+    diff = None
+    if pipelined and previous is None:
+        # Overlap intake and analysis: clauses are analysed in batches as
+        # intake emits them, then reassembled in clause order.
+        intake_record: Dict[str, Any] = {}
+        batches = intake_agent.stream_clauses(
+            document,
+            use_llm=stream_llm,
+            deadline=deadline,
+            record=intake_record,
+            save=False,
+        )
+        analysis_result = analyser_agent.analyze_batches(
+            batches, deadline=deadline, save=False
+        )
+    else:
+        intake_record = intake_agent.run_intake(document, deadline=deadline, save=False)
+        if not force:
+            record = result_index.lookup(
+                anchor_id=intake_record["summary"]["id"], version=registry_version
+            )
+            if record:
+                result_index.link(raw_hash, record)
+                return _replay(record, document_id)
+        intake_output = intake_record["summary"]["content"]
+        if previous:
+            analysis_result, diff = analyser_agent.analyze_revision(
+                intake_output,
+                previous,
+                deadline=deadline,
+                reuse=previous.get("registry_version") == registry_version,
+                save=False,
+            )
+        else:
+            analysis_result = analyser_agent.analyze(
+                intake_output, deadline=deadline, save=False
+            )
+    planner_output = planner_agent.generate_email_with_gemini(
+        deadline=deadline, analysis=analysis_result, save=False
+    )
+    if deadline is not None:
+        deadline.check("packaging")
+
+    changes = None
+    if document_id:
+        clauses = intake_record["summary"]["content"]["clauses"]
+        version = document_versions.add(
+            document_id, raw_hash, clauses, analysis_result, registry_version
+        )
+        if previous and diff:
+            changes = VersionChanges(
+                version=version,
+                previousVersion=previous["version"],
+                added=[clauses[j] for j in diff["added"]],
+                changed=[clauses[j] for _, j in diff["changed"]],
+                removed=[previous["clauses"][i] for i in diff["removed"]],
+                unchanged=len(diff["unchanged"]),
+            )
+
+    with outputs_lock:
+        intake_agent.save_output(intake_record)
+        analyser_agent.save_result(analysis_result)
+        ics_output = planner_agent.create_signing_ics_from_intake(intake=intake_record)
+
+        # Pass planner outputs directly to the packager
+        dashboard_data = packager_v2_agent.package_results(
+            analysis_result=analysis_result,
+            planner_email_output=planner_output,
+            ics_file_path=ics_output,
+            changes=changes,
+        )
+
+        result_index.store(
+            raw_hash=raw_hash,
+            anchor_id=intake_record["summary"]["id"],
+            intake=intake_record,
+            analysis=analysis_result,
+            planner=planner_output.model_dump() if planner_output else None,
+            dashboard=dashboard_data.model_dump(),
+            version=registry_version,
+        )
+    return dashboard_data, planner_output
+
+
+async def _run_pipeline_coalesced(
+    document: str,
+    pipelined: bool = False,
+    stream_llm: bool = False,
+    force: bool = False,
+    deadline: Optional[Deadline] = None,
+    document_id: Optional[str] = None,
+):
+    """
+    Run _run_pipeline off the event loop, sharing one in-flight run between
+    concurrent requests for the same document with the same options.
+
+    force asks for a fresh run, so it never joins or is joined. document_id,
+    pipelined and stream_llm change what a run records or how it is produced
+    and are part of the key. Each caller waits only as long as its own
+    deadline allows, even when it joined a run started with a longer one.
+    """
+    options = dict(
+        pipelined=pipelined,
+        stream_llm=stream_llm,
+        force=force,
+        deadline=deadline,
+        document_id=document_id,
+    )
+    if force:
+        return await run_in_threadpool(_run_pipeline, document, **options)
+
+    key = (
+        f"doc:{hash_document(document)}:{document_id or ''}"
+        f":{int(pipelined)}{int(stream_llm)}"
+    )
+    try:
+        result, shared = await asyncio.wait_for(
+            analysis_flight.do(
+                key, lambda: run_in_threadpool(_run_pipeline, document, **options)
+            ),
+            timeout=deadline.remaining() if deadline is not None else None,
+        )
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Deadline exceeded while waiting for the analysis")
+    if shared:
+        print("Served analysis from a concurrent identical request")
+    return result
+
+
+def _request_deadline(requested: Any) -> Deadline:
+    """
+    Deadline for an /analyze request. Clients may ask for less time than
+    ANALYZE_DEADLINE_SECONDS but never more; missing, invalid or
+    non-positive values get the configured limit.
+    """
+    limit = config.get_analyze_deadline()
+    try:
+        seconds = float(requested) if requested else limit
+    except (TypeError, ValueError):
+        seconds = limit
+    # Also catches NaN, which compares false with everything
+    if not 0 < seconds <= limit:
+        seconds = limit
+    return Deadline(seconds)
+
+
+def _require_document_id(document_id: Optional[str]) -> None:
+    """Reject a malformed document_id with a 400 before any work starts."""
+    if document_id is None:
+        return
+    try:
+        check_document_id(document_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/analyze")
 async def start_analyse(request: Request):
     """
@@ -60,25 +304,211 @@ async def start_analyse(request: Request):
             raise HTTPException(
                 status_code=400, detail="Missing name, email, or document"
             )
-        intake_output = intake_agent.normalization(document)
-        analysis_result = analyser_agent.analyze(intake_output)
-        planner_output = planner_agent.generate_email_with_gemini()
-        ics_output = planner_agent.create_signing_ics_from_intake()
+        _require_document_id(data.get("document_id"))
+        dashboard_data, planner_output = await _run_pipeline_coalesced(
+            document,
+            pipelined=bool(data.get("pipelined")),
+            stream_llm=bool(data.get("stream_llm")),
+            force=bool(data.get("force")),
+            deadline=_request_deadline(data.get("deadline_seconds")),
+            document_id=data.get("document_id"),
+        )
 
-        # Pass planner outputs directly to the packager
-        dashboard_data = packager_v2_agent.package_results(
-            analysis_result=analysis_result,
-            planner_email_output=planner_output,
-            ics_file_path=ics_output,
+        # Side effects stay per requester even when the run was shared; the
+        # email is only queued here and delivered in the background
+        EmailServiceMain.send_invite(email, planner_output, name)
+
+        # Encoded directly from the model instead of through jsonable_encoder
+        return JSONBytesResponse(dashboard_data)
+    except HTTPException:
+        raise
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Analysis timed out: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+
+@app.post("/convert-and-analyze")
+async def convert_and_analyze(
+    file: UploadFile = File(...),
+    name: str = Form(...),
+    email: str = Form(...),
+    include_markdown: bool = Form(False),
+    pipelined: bool = Form(False),
+    force: bool = Form(False),
+    document_id: Optional[str] = Form(None),
+):
+    """
+    Convert an uploaded PDF and run the agent pipeline on it in one request, so
+    the markdown does not have to round-trip through the browser. The markdown
+    is only returned when include_markdown is set.
+    """
+    filename = file.filename or "upload.pdf"
+    content_type = file.content_type or ""
+    if not (filename.lower().endswith(".pdf") or content_type == "application/pdf"):
+        raise HTTPException(status_code=400, detail="Please upload a PDF file.")
+    _require_document_id(document_id)
+
+    try:
+        raw = await file.read()
+        document, _ = await analysis_flight.do(
+            f"pdf:{hashlib.sha256(raw).hexdigest()}",
+            lambda: run_in_threadpool(OCRService.pdf_to_markdown, raw, filename),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Conversion failed: {type(e).__name__}: {e}"
+        )
+
+    try:
+        dashboard_data, planner_output = await _run_pipeline_coalesced(
+            document,
+            pipelined=pipelined,
+            force=force,
+            deadline=Deadline(config.get_analyze_deadline()),
+            document_id=document_id,
         )
 
         EmailServiceMain.send_invite(email, planner_output, name)
 
-        return dashboard_data
+        if include_markdown:
+            return JSONBytesResponse(
+                {**dashboard_data.model_dump(), "markdown": document}
+            )
+        return JSONBytesResponse(dashboard_data)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"Analysis timed out: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+@app.post("/batch", status_code=202)
+async def start_batch(request: Request):
+    """
+    Queue many documents for analysis, e.g. a property manager's portfolio.
+    Body: {"documents": [{"id": "...", "name": "...", "markdown": "..."}]}.
+    No emails are sent; poll /batch/{batch_id} and fetch the report when done.
+    """
+    data = await request.json()
+    try:
+        return await run_in_threadpool(
+            batch_service.submit, data.get("documents") or []
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/batch/{batch_id}")
+def get_batch_status(batch_id: str):
+    try:
+        return batch_service.status(batch_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.get("/batch/{batch_id}/report")
+def get_batch_report(batch_id: str):
+    """Aggregated report across every document of a finished batch."""
+    try:
+        return batch_service.report(batch_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.get("/batch/{batch_id}/documents/{doc_id}")
+def get_batch_dashboard(batch_id: str, doc_id: str):
+    try:
+        return batch_service.dashboard(batch_id, doc_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _require_notifications_key(request: Request) -> None:
+    """
+    Bulk notifications send arbitrary text from the service's mail account to
+    any address, so they need NOTIFICATIONS_API_KEY in an X-API-Key header.
+    Without a configured key the endpoints are disabled.
+    """
+    expected = config.get_notifications_api_key()
+    if not expected:
+        raise HTTPException(
+            status_code=503, detail="Bulk notifications are not configured"
+        )
+    supplied = request.headers.get("x-api-key", "")
+    if not hmac.compare_digest(supplied.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+
+
+@app.post("/notifications/bulk", status_code=202)
+async def send_bulk_notifications(request: Request):
+    """
+    Send one templated email per recipient, e.g. to every tenant of a batch.
+    Body: {"subject": "...", "body": "Dear {name}, ...",
+           "recipients": [{"email": "...", "name": "..."}]}.
+    Template fields are filled from each recipient's entry; poll
+    /notifications/bulk/{job_id} for per-recipient status. Both endpoints
+    need the X-API-Key header.
+    """
+    _require_notifications_key(request)
+    data = await request.json()
+    try:
+        job = EmailServiceMain.send_bulk(
+            data.get("subject") or "",
+            data.get("body") or "",
+            data.get("recipients") or [],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"job_id": job.id, "total": job.total}
+
+
+@app.get("/notifications/bulk/{job_id}")
+def get_bulk_notifications(job_id: str, request: Request):
+    _require_notifications_key(request)
+    report = EmailServiceMain.bulk_report(job_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Unknown job_id")
+    return report
+
+
+@app.get("/documents/{document_id}/versions")
+def list_document_versions(document_id: str):
+    """Version history of a document submitted with a document_id."""
+    _require_document_id(document_id)
+    versions = document_versions.history(document_id)
+    if not versions:
+        raise HTTPException(status_code=404, detail="Unknown document_id")
+    return {
+        "document_id": document_id,
+        "versions": [
+            {
+                "version": v["version"],
+                "raw_hash": v["raw_hash"],
+                "stored_at": v["stored_at"],
+                "clauses": len(v["clauses"]),
+                "summary": v["analysis"].get("summary"),
+            }
+            for v in versions
+        ],
+    }
+
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Queueing, retry and throttling metrics for model calls, plus per call type
+    latency: p99_primary is the first attempt alone (before hedging) and
+    p99_effective is what callers actually waited (after hedging).
+    """
+    return {
+        "rate_limiter": get_rate_limiter().metrics(),
+        "latency": latency_tracker.metrics(),
+        "registry_version": get_registry().version,
+        "email": EmailServiceMain.outbound.metrics(),
+        "bulk_email": EmailServiceMain.bulk_outbound.metrics(),
+    }
+
+
 @app.post("/generate-planner-data")
 def generate_planner_data(pdf_data: dict):
     """
@@ -98,9 +528,8 @@ def fetch_planner_data():
     Fetch the contents of planner-agent.json.
     """
     try:
-        with open(planner_agent.output_file, "r") as file:
-            planner_data = json.load(file)
-        return planner_data
+        # Served as stored, without parsing and re-encoding it
+        return JSONBytesResponse(Path(planner_agent.output_file).read_bytes())
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Planner data not found")
     except Exception as e:
@@ -114,8 +543,7 @@ def update_planner_data(updated_data: dict):
     :param updated_data: New planner data.
     """
     try:
-        with open(planner_agent.output_file, "w") as file:
-            json.dump(updated_data, file, indent=4)
+        write_json(planner_agent.output_file, updated_data)
         return {"message": "Planner data updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -128,7 +556,9 @@ def package_dashboard():
     Returns the generated dashboard data.
     """
     try:
-        dashboard = packager_agent.run_packaging()
+        with outputs_lock:
+            dashboard = packager_agent.run_packaging()
+        artifact_index.invalidate()
         return dashboard
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -139,15 +569,14 @@ OUTPUT_DIR = Path("server/agents/outputs")
 DASHBOARD_PATH = OUTPUT_DIR / "dashboard.json"
 
 
-def _read_dashboard() -> Dict[str, Any]:
-    if not DASHBOARD_PATH.exists():
+def _artifact_snapshot() -> ArtifactSnapshot:
+    try:
+        return artifact_index.current()
+    except FileNotFoundError:
         raise HTTPException(
             status_code=404,
             detail="dashboard.json not found. Run /package-dashboard first.",
         )
-    try:
-        with open(DASHBOARD_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to read dashboard.json: {e}"
@@ -162,15 +591,18 @@ def _infer_media_type(path: Path) -> str:
         return "application/json"
     if suffix == ".pdf":
         return "application/pdf"
+    if suffix == ".html":
+        return "text/html; charset=utf-8"
     return "application/octet-stream"
 
 
 @app.get("/artifacts")
-def list_artifacts():
-    """Return artifact metadata from dashboard.json."""
-    data = _read_dashboard()
-    artifacts = data.get("artifacts", [])
-    return {"artifacts": artifacts}
+def list_artifacts(request: Request):
+    """Return artifact metadata from dashboard.json (304 if unchanged)."""
+    snapshot = _artifact_snapshot()
+    return bytes_response(
+        request, snapshot.listing, snapshot.etag, snapshot.last_modified
+    )
 
 
 def _resolve_local(url: str) -> Path:
@@ -186,11 +618,17 @@ def _resolve_local(url: str) -> Path:
     return ARTIFACTS_DIR / p.name
 
 
+# Parsed dashboard.json and stat()ed artifact files, re-checked once a second
+artifact_index = ArtifactIndex(DASHBOARD_PATH, _resolve_local)
+
+
 @app.get("/download/{artifact_id}")
-def download_artifact(artifact_id: str):
-    data = _read_dashboard()
-    artifacts: List[Dict[str, Any]] = data.get("artifacts", [])
-    artifact = next((a for a in artifacts if a.get("id") == artifact_id), None)
+def download_artifact(artifact_id: str, request: Request):
+    """
+    Download an artifact listed in dashboard.json. Supports conditional
+    requests (ETag / Last-Modified) and byte ranges.
+    """
+    artifact = _artifact_snapshot().by_id.get(artifact_id)
     if not artifact:
         raise HTTPException(status_code=404, detail="Artifact not found")
 
@@ -198,32 +636,36 @@ def download_artifact(artifact_id: str):
     if url.startswith(("http://", "https://")):
         return RedirectResponse(url=url, status_code=307)
 
-    local_path = _resolve_local(url)
-    if not local_path.exists():
+    local = artifact_index.local_file(url)
+    if local is None:
         raise HTTPException(status_code=404, detail=f"File not found at {url}")
+    local_path, st = local
 
-    return FileResponse(
-        path=str(local_path),
+    return file_response(
+        request,
+        local_path,
+        st,
         media_type=_infer_media_type(local_path),
         filename=local_path.name,
     )
 
 
 @app.get("/download-file/{filename}")
-def download_file_by_name(filename: str):
+def download_file_by_name(filename: str, request: Request):
     """
     Download a file directly from the download directory by filename.
-    Serves files like frontend_package.json, dashboard.json, etc.
+    Serves files like frontend_package.json, dashboard.json, etc., gzip or
+    brotli compressed when the client accepts it.
     """
     try:
         file_path = DOWNLOAD_DIR / filename
 
-        if not file_path.exists():
+        if not file_path.is_file():
             raise HTTPException(status_code=404, detail=f"File {filename} not found")
 
         media_type = _infer_media_type(file_path)
-        return FileResponse(
-            path=str(file_path), media_type=media_type, filename=file_path.name
+        return file_response(
+            request, file_path, file_path.stat(), media_type, file_path.name
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to download file: {e}")
@@ -246,7 +688,8 @@ def list_download_files():
                 "type": file_path.suffix.lstrip(".") if file_path.suffix else "unknown",
             }
             for file_path in DOWNLOAD_DIR.glob("*")
-            if file_path.is_file()
+            # Compressed variants are served in place of their source
+            if file_path.is_file() and not is_variant(file_path)
         ]
 
         return {"files": files, "total": len(files)}
@@ -256,9 +699,10 @@ def list_download_files():
 
 
 @app.get("/frontend-package")
-def get_frontend_package():
+def get_frontend_package(request: Request):
     """
-    Get the comprehensive frontend package data.
+    Get the comprehensive frontend package data, streamed from disk as
+    stored (or its precompressed variant) without parsing it.
     """
     try:
         frontend_package_path = DOWNLOAD_DIR / "frontend_package.json"
@@ -268,8 +712,12 @@ def get_frontend_package():
                 detail="Frontend package not found. Run the packager first.",
             )
 
-        with open(frontend_package_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return file_response(
+            request,
+            frontend_package_path,
+            frontend_package_path.stat(),
+            "application/json",
+        )
 
     except Exception as e:
         raise HTTPException(
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from server.util.serialization import dumps, loads
+
+
+class ArtifactSnapshot:
+    """
+    Immutable view of the artifacts listed in one version of dashboard.json:
+    the list, a lookup by id and the pre-encoded /artifacts response with
+    its validators.
+    """
+
+    def __init__(self, data: bytes, mtime: float):
+        dashboard = loads(data)
+        self.artifacts: List[Dict[str, Any]] = dashboard.get("artifacts", [])
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        for artifact in self.artifacts:
+            # The first artifact with an id wins, as with the former linear scan
+            self.by_id.setdefault(artifact.get("id"), artifact)
+        self.listing: bytes = dumps({"artifacts": self.artifacts}, pretty=False)
+        self.etag = f'"{hashlib.sha256(self.listing).hexdigest()[:32]}"'
+        self.last_modified = mtime
+
+
+class ArtifactIndex:
+    """
+    In-memory index of the artifacts in dashboard.json, so /artifacts and
+    /download do not read and parse the dashboard on every request.
+
+    current() re-checks the dashboard's mtime, size and inode at most every
+    check_interval seconds and loads a new snapshot when it changed. Local
+    artifact files are resolved and stat()ed the same way. invalidate()
+    makes the next request check everything again, e.g. after packaging.
+    """
+
+    def __init__(
+        self,
+        dashboard_path: Path,
+        resolve: Callable[[str], Path],
+        check_interval: float = 1.0,
+    ):
+        self.dashboard_path = dashboard_path
+        self.resolve = resolve
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._key: Optional[Tuple[int, int, int]] = None
+        self._snapshot: Optional[ArtifactSnapshot] = None
+        # url -> (checked at, resolved path, stat)
+        self._files: Dict[str, Tuple[float, Path, os.stat_result]] = {}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._checked = 0.0
+            self._files.clear()
+
+    def current(self) -> ArtifactSnapshot:
+        """The loaded dashboard; raises FileNotFoundError if there is none."""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._checked < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and now - self._checked < self.check_interval:
+                return self._snapshot
+            try:
+                st = os.stat(self.dashboard_path)
+            except FileNotFoundError:
+                self._snapshot, self._key = None, None
+                raise
+            key = (st.st_mtime_ns, st.st_size, st.st_ino)
+            if key != self._key or self._snapshot is None:
+                self._snapshot = ArtifactSnapshot(
+                    self.dashboard_path.read_bytes(), st.st_mtime
+                )
+                self._key = key
+                self._files.clear()
+            self._checked = now
+            return self._snapshot
+
+    def get(self, artifact_id: str) -> Optional[Dict[str, Any]]:
+        return self.current().by_id.get(artifact_id)
+
+    def local_file(self, url: str) -> Optional[Tuple[Path, os.stat_result]]:
+        """Path and stat of a local artifact URL, or None if it is not a file."""
+        now = time.monotonic()
+        entry = self._files.get(url)
+        if entry is not None and now - entry[0] < self.check_interval:
+            return entry[1], entry[2]
+        path = self.resolve(url)
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._files.pop(url, None)
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        self._files[url] = (now, path, st)
+        return path, st
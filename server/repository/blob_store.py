@@ -0,0 +1,248 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from server.util.precompress import remove_variants
+from server.util.serialization import dumps, read_json, write_json
+
+OUTPUT_DIR = Path(__file__).resolve().parent.parent / "agents" / "outputs"
+BLOBS_DIR = OUTPUT_DIR / "blobs"
+
+
+class BlobStore:
+    """
+    Content-addressed store for packaged artifacts.
+
+    Payloads are written once to objects/<sha256[:2]>/<sha256> and published
+    under logical names (e.g. "frontend_package.json") recorded in
+    index.json. A name can be materialized at one or more paths as hard links
+    to its blob, so existing readers keep opening the same files while the
+    bytes exist on disk once; writing a name whose content did not change
+    touches nothing but its timestamp.
+
+    Names expire ttl seconds after they were last written unless they are
+    published with keep=True (the "latest" outputs, which are replaced rather
+    than accumulated). gc() drops expired names with their materialized paths
+    and then every blob no name refers to.
+    """
+
+    def __init__(
+        self,
+        root: Path = BLOBS_DIR,
+        ttl: float = 7 * 24 * 3600,
+        gc_interval: float = 3600,
+        grace: float = 60,
+    ):
+        self.root = root
+        self.objects_dir = root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = root / "index.json"
+        self.ttl = ttl
+        self.gc_interval = gc_interval
+        # Unreferenced blobs younger than this may be about to be linked
+        self.grace = grace
+        self._lock = threading.Lock()
+        self._names: Dict[str, Dict[str, Any]] = self._load_index()
+        self._last_gc = 0.0
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if not self.index_file.exists():
+            return {}
+        try:
+            return read_json(self.index_file)
+        except Exception as e:
+            print(f"Failed to read blob index, starting empty: {e}")
+            return {}
+
+    def _save_index(self) -> None:
+        write_json(self.index_file, self._names)
+
+    def blob_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def put(self, data: bytes) -> str:
+        """Store data if it is not stored yet; returns its sha256."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if path.exists():
+            # Keep gc from collecting it before it is linked again
+            os.utime(path)
+        else:
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_name(f"{digest}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+        return digest
+
+    def _adopt_file(self, source: Path) -> str:
+        """Move an already written file into the store; returns its sha256."""
+        sha = hashlib.sha256()
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        path = self.blob_path(digest)
+        if path.exists():
+            source.unlink()
+        else:
+            path.parent.mkdir(exist_ok=True)
+            try:
+                os.replace(source, path)
+            except OSError:
+                shutil.copyfile(source, path)
+                source.unlink()
+        return digest
+
+    def _materialize(self, digest: str, target: Path) -> None:
+        blob = self.blob_path(digest)
+        try:
+            if target.exists() and os.path.samefile(blob, target):
+                return
+        except OSError:
+            pass
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{threading.get_ident()}.tmp")
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            # No hard links across devices (or on this filesystem): copy
+            shutil.copyfile(blob, tmp)
+        # Replace the directory entry, never rewrite an existing inode
+        os.replace(tmp, target)
+
+    def _publish(self, name: str, digest: str, paths: List[Path], keep: bool) -> None:
+        for path in paths:
+            self._materialize(digest, path)
+        with self._lock:
+            previous = self._names.get(name, {})
+            current = {str(p) for p in paths}
+            stale = [p for p in previous.get("paths", []) if p not in current]
+            self._names[name] = {
+                "digest": digest,
+                "paths": [str(p) for p in paths],
+                "size": self.blob_path(digest).stat().st_size,
+                "keep": keep,
+                "updated_at": time.time(),
+            }
+            self._save_index()
+        self._remove_paths(stale, previous.get("digest"))
+        self._maybe_gc()
+
+    def write(
+        self,
+        name: str,
+        data: bytes,
+        paths: Optional[List[Path]] = None,
+        keep: bool = False,
+    ) -> str:
+        """Store data under name and materialize it at paths; returns its sha256."""
+        digest = self.put(data)
+        self._publish(name, digest, list(paths or []), keep)
+        return digest
+
+    def write_json(
+        self,
+        name: str,
+        payload: Any,
+        paths: Optional[List[Path]] = None,
+        keep: bool = False,
+    ) -> str:
+        return self.write(name, dumps(payload), paths, keep)
+
+    def adopt(self, name: str, path: Path, keep: bool = False) -> str:
+        """
+        Take over a file written by someone else (e.g. a rendered PDF): its
+        bytes move into the store and path becomes a link to the blob.
+        """
+        digest = self._adopt_file(path)
+        self._publish(name, digest, [path], keep)
+        return digest
+
+    def resolve(self, name: str) -> Optional[Path]:
+        with self._lock:
+            entry = self._names.get(name)
+        if entry is None:
+            return None
+        path = self.blob_path(entry["digest"])
+        return path if path.exists() else None
+
+    def names(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._names.items()}
+
+    def _remove_paths(self, paths: List[str], digest: Optional[str]) -> None:
+        """Unlink materialized paths that still point at digest's blob."""
+        if not digest:
+            return
+        blob = self.blob_path(digest)
+        for path in paths:
+            try:
+                if os.path.samefile(blob, path):
+                    os.unlink(path)
+                    remove_variants(Path(path))
+            except OSError:
+                pass
+
+    def _maybe_gc(self) -> None:
+        if time.time() - self._last_gc >= self.gc_interval:
+            self.gc()
+
+    def gc(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Expire names older than ttl and delete blobs no name refers to."""
+        now = time.time() if now is None else now
+        self._last_gc = now
+        with self._lock:
+            expired = {
+                name: entry
+                for name, entry in self._names.items()
+                if not entry.get("keep") and now - entry["updated_at"] > self.ttl
+            }
+            for name in expired:
+                del self._names[name]
+            if expired:
+                self._save_index()
+            live = {entry["digest"] for entry in self._names.values()}
+
+        for entry in expired.values():
+            self._remove_paths(entry["paths"], entry["digest"])
+
+        removed = 0
+        freed = 0
+        for path in self.objects_dir.glob("*/*"):
+            if path.name in live or path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+                if now - stat.st_mtime < self.grace:
+                    continue
+                path.unlink()
+                removed += 1
+                freed += stat.st_size
+            except OSError:
+                continue
+        if expired or removed:
+            print(
+                f"Blob store gc: expired {len(expired)} names, "
+                f"removed {removed} blobs ({freed} bytes)"
+            )
+        return {
+            "expired_names": len(expired),
+            "removed_blobs": removed,
+            "freed_bytes": freed,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            referenced = sum(entry["size"] for entry in self._names.values())
+            names = len(self._names)
+        blobs = list(self.objects_dir.glob("*/*"))
+        return {
+            "names": names,
+            "blobs": len(blobs),
+            "stored_bytes": sum(p.stat().st_size for p in blobs),
+            "referenced_bytes": referenced,
+        }
@@ -0,0 +1,81 @@
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from server.repository.result_index import OUTPUT_DIR
+from server.util.serialization import read_json, write_json
+
+VERSIONS_DIR = OUTPUT_DIR / "versions"
+DOCUMENT_ID = re.compile(r"[A-Za-z0-9_.-]{1,128}")
+
+
+def check_document_id(document_id: str) -> str:
+    """Raise ValueError unless document_id is safe to use as a file name."""
+    if not DOCUMENT_ID.fullmatch(document_id):
+        raise ValueError(
+            "document_id may only contain letters, digits, '.', '_' and '-'"
+        )
+    return document_id
+
+
+class DocumentVersions:
+    """
+    Version history of documents that are re-submitted under the same
+    document_id, e.g. a lease revised after negotiation. Each version keeps
+    the clauses and the analysis so the next revision can be diffed against
+    it and reuse verdicts for unchanged clauses.
+    """
+
+    def __init__(self, versions_dir: Path = VERSIONS_DIR):
+        self.versions_dir = versions_dir
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, document_id: str) -> Path:
+        return self.versions_dir / f"{check_document_id(document_id)}.json"
+
+    def _load(self, path: Path) -> List[Dict[str, Any]]:
+        if not path.exists():
+            return []
+        return read_json(path)
+
+    def history(self, document_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._load(self._path(document_id))
+
+    def latest(self, document_id: str) -> Optional[Dict[str, Any]]:
+        versions = self.history(document_id)
+        return versions[-1] if versions else None
+
+    def add(
+        self,
+        document_id: str,
+        raw_hash: str,
+        clauses: List[str],
+        analysis: Dict[str, Any],
+        registry_version: Optional[str] = None,
+    ) -> int:
+        """Append a version unless it repeats the latest one; returns its number."""
+        path = self._path(document_id)
+        with self._lock:
+            versions = self._load(path)
+            if versions and versions[-1]["raw_hash"] == raw_hash:
+                return versions[-1]["version"]
+
+            version = len(versions) + 1
+            versions.append(
+                {
+                    "version": version,
+                    "raw_hash": raw_hash,
+                    "stored_at": datetime.now().isoformat(),
+                    "clauses": clauses,
+                    "analysis": analysis,
+                    "registry_version": registry_version,
+                }
+            )
+            write_json(path, versions)
+
+        print(f"Stored version {version} of {document_id}")
+        return version
@@ -0,0 +1,150 @@
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from server.util.serialization import read_json, write_json
+
+OUTPUT_DIR = Path(__file__).resolve().parent.parent / "agents" / "outputs"
+RESULTS_DIR = OUTPUT_DIR / "results"
+
+
+def hash_document(document: str) -> str:
+    """Content hash of the raw markdown submitted for analysis."""
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+class ResultIndex:
+    """
+    Content-hash index of completed pipeline runs.
+
+    Each record is stored once under results/<record_id>.json and can be found
+    either by the hash of the raw markdown or by the intake anchor_id (the MD5
+    of the normalised intake output). Records hold everything needed to replay
+    a run without calling the LLM: the intake, analysis and planner outputs,
+    the dashboard and the text of the files its artifacts point at. Records
+    carry the registry version of the prompts and rules that produced them
+    and are not served once those change.
+    """
+
+    def __init__(self, results_dir: Path = RESULTS_DIR, output_dir: Path = OUTPUT_DIR):
+        self.results_dir = results_dir
+        self.output_dir = output_dir
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.results_dir / "index.json"
+        self._lock = threading.Lock()
+        self._keys: Dict[str, str] = self._load_index()
+
+    def _load_index(self) -> Dict[str, str]:
+        if not self.index_file.exists():
+            return {}
+        try:
+            return read_json(self.index_file)
+        except Exception as e:
+            print(f"Failed to read result index, starting empty: {e}")
+            return {}
+
+    def _save_index(self) -> None:
+        write_json(self.index_file, self._keys)
+
+    def lookup(
+        self,
+        raw_hash: Optional[str] = None,
+        anchor_id: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the stored record for the raw hash or anchor, if any and
+        produced under the given registry version."""
+        with self._lock:
+            record_id = None
+            if raw_hash:
+                record_id = self._keys.get(f"raw:{raw_hash}")
+            if record_id is None and anchor_id:
+                record_id = self._keys.get(f"anchor:{anchor_id}")
+        if record_id is None:
+            return None
+
+        record_file = self.results_dir / f"{record_id}.json"
+        try:
+            record = read_json(record_file)
+        except Exception as e:
+            print(f"Stored result {record_id} is unreadable: {e}")
+            return None
+        if version and record.get("version") != version:
+            print(f"Stored result {record_id[:12]} predates the current rules")
+            return None
+        return record
+
+    def link(self, raw_hash: str, record: Dict[str, Any]) -> None:
+        """Map another raw hash onto an existing record (same anchor, new bytes)."""
+        with self._lock:
+            self._keys[f"raw:{raw_hash}"] = record["id"]
+            self._save_index()
+
+    def store(
+        self,
+        raw_hash: str,
+        anchor_id: Optional[str],
+        intake: Dict[str, Any],
+        analysis: Dict[str, Any],
+        planner: Optional[Dict[str, Any]],
+        dashboard: Dict[str, Any],
+        version: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Persist a completed run and index it by raw hash and anchor."""
+        record = {
+            "id": raw_hash,
+            "anchor_id": anchor_id,
+            "version": version,
+            "stored_at": datetime.now().isoformat(),
+            "intake": intake,
+            "analysis": analysis,
+            "planner": planner,
+            "dashboard": dashboard,
+            "files": self._capture_files(dashboard),
+        }
+
+        write_json(self.results_dir / f"{raw_hash}.json", record)
+
+        with self._lock:
+            self._keys[f"raw:{raw_hash}"] = raw_hash
+            if anchor_id:
+                self._keys[f"anchor:{anchor_id}"] = raw_hash
+            self._save_index()
+
+        print(f"Stored pipeline result {raw_hash[:12]}")
+        return record
+
+    def restore(self, record: Dict[str, Any]) -> None:
+        """
+        Write a stored run back into the outputs directory so that
+        /package-dashboard and /download-file see the replayed result.
+        """
+        outputs = {
+            "intake_agent.json": record.get("intake"),
+            "analysis_result.json": record.get("analysis"),
+            "planner-agent.json": record.get("planner"),
+        }
+        for filename, payload in outputs.items():
+            if payload is None:
+                continue
+            write_json(self.output_dir / filename, payload)
+
+        for filename, content in (record.get("files") or {}).items():
+            (self.output_dir / filename).write_text(content, encoding="utf-8")
+
+        print(f"Restored stored pipeline result {record['id'][:12]}")
+
+    def _capture_files(self, dashboard: Dict[str, Any]) -> Dict[str, str]:
+        files: Dict[str, str] = {}
+        for artifact in dashboard.get("artifacts", []):
+            url = artifact.get("url") or ""
+            if not url.startswith("/download-file/"):
+                continue
+            path = self.output_dir / url.rsplit("/", 1)[-1]
+            try:
+                files[path.name] = path.read_text(encoding="utf-8")
+            except Exception as e:
+                print(f"Could not capture artifact {path.name}: {e}")
+        return files
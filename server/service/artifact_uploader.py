@@ -0,0 +1,287 @@
+import base64
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from server.util.serialization import read_json, write_json
+
+OUTPUT_DIR = Path(__file__).resolve().parent.parent / "agents" / "outputs"
+UPLOAD_MANIFEST = OUTPUT_DIR / "artifacts" / "uploads.json"
+
+# Supabase's resumable endpoint requires 6MB chunks (except the last one)
+CHUNK_SIZE = 6 * 1024 * 1024
+
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".json": "application/json",
+    ".ics": "text/calendar",
+}
+
+
+def content_type_for(path: Path) -> str:
+    return CONTENT_TYPES.get(path.suffix.lower(), "application/octet-stream")
+
+
+def file_digest(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class StorageBackend:
+    """
+    Where artifacts are uploaded to. Subclasses implement upload() and
+    public_url(); upload_chunks() defaults to a single upload and is
+    overridden by backends that can take a large file in pieces.
+    """
+
+    name = "storage"
+
+    def upload(self, destination: str, data: bytes, content_type: str) -> None:
+        raise NotImplementedError
+
+    def upload_chunks(
+        self, destination: str, path: Path, content_type: str, chunk_size: int
+    ) -> None:
+        self.upload(destination, path.read_bytes(), content_type)
+
+    def public_url(self, destination: str) -> str:
+        raise NotImplementedError
+
+
+class SupabaseBackend(StorageBackend):
+    """
+    Supabase Storage bucket. Small files go through the client's upload();
+    large ones use the TUS resumable endpoint, so a retry continues from the
+    offset the server already holds instead of starting over.
+    """
+
+    def __init__(self, client, url: str, key: str, bucket: str):
+        self.client = client
+        self.url = url.rstrip("/")
+        self.key = key
+        self.bucket = bucket
+        self.name = f"supabase:{bucket}"
+        # destination -> TUS upload URL of an unfinished chunked upload
+        self._sessions: Dict[str, str] = {}
+
+    def upload(self, destination: str, data: bytes, content_type: str) -> None:
+        self.client.storage.from_(self.bucket).upload(
+            file=data,
+            path=destination,
+            file_options={"contentType": content_type, "upsert": "true"},
+        )
+
+    def upload_chunks(
+        self, destination: str, path: Path, content_type: str, chunk_size: int
+    ) -> None:
+        import httpx
+
+        size = path.stat().st_size
+        headers = {
+            "Authorization": f"Bearer {self.key}",
+            "Tus-Resumable": "1.0.0",
+            "x-upsert": "true",
+        }
+        with httpx.Client(timeout=60) as http:
+            location = self._sessions.get(destination)
+            offset = 0
+            if location is not None:
+                response = http.head(location, headers=headers)
+                if response.status_code == 200:
+                    offset = int(response.headers["Upload-Offset"])
+                else:
+                    location = None
+            if location is None:
+                metadata = {
+                    "bucketName": self.bucket,
+                    "objectName": destination,
+                    "contentType": content_type,
+                }
+                response = http.post(
+                    f"{self.url}/storage/v1/upload/resumable",
+                    headers={
+                        **headers,
+                        "Upload-Length": str(size),
+                        "Upload-Metadata": ",".join(
+                            f"{k} {base64.b64encode(v.encode()).decode()}"
+                            for k, v in metadata.items()
+                        ),
+                    },
+                )
+                response.raise_for_status()
+                location = response.headers["Location"]
+                self._sessions[destination] = location
+
+            with open(path, "rb") as f:
+                f.seek(offset)
+                while offset < size:
+                    chunk = f.read(chunk_size)
+                    response = http.patch(
+                        location,
+                        headers={
+                            **headers,
+                            "Upload-Offset": str(offset),
+                            "Content-Type": "application/offset+octet-stream",
+                        },
+                        content=chunk,
+                    )
+                    response.raise_for_status()
+                    offset = int(response.headers["Upload-Offset"])
+        self._sessions.pop(destination, None)
+
+    def public_url(self, destination: str) -> str:
+        return self.client.storage.from_(self.bucket).get_public_url(destination)
+
+
+class LocalBackend(StorageBackend):
+    """
+    Stand-in backend that "uploads" into a local directory. Chunked uploads
+    append to a .part file and resume from its size, like the TUS path.
+    Chunked uploads to the same destination take turns, so two of them never
+    append to one .part file.
+    """
+
+    def __init__(self, root: Path, base_url: Optional[str] = None):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url
+        self.name = f"local:{root}"
+        # Striped by destination: bounded, and unrelated uploads rarely wait
+        self._locks = [threading.Lock() for _ in range(32)]
+
+    def upload(self, destination: str, data: bytes, content_type: str) -> None:
+        target = self.root / destination
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{target.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(target)
+
+    def upload_chunks(
+        self, destination: str, path: Path, content_type: str, chunk_size: int
+    ) -> None:
+        target = self.root / destination
+        target.parent.mkdir(parents=True, exist_ok=True)
+        part = target.with_name(f"{target.name}.part")
+        with self._locks[hash(destination) % len(self._locks)]:
+            offset = part.stat().st_size if part.exists() else 0
+            with open(path, "rb") as source, open(part, "ab") as sink:
+                source.seek(offset)
+                for chunk in iter(lambda: source.read(chunk_size), b""):
+                    sink.write(chunk)
+                    sink.flush()
+            part.replace(target)
+
+    def public_url(self, destination: str) -> str:
+        if self.base_url:
+            return f"{self.base_url.rstrip('/')}/{destination}"
+        return str(self.root / destination)
+
+
+class ArtifactUploader:
+    """
+    Uploads artifact files concurrently and skips the ones whose bytes are
+    already in the backend.
+
+    Destinations are <sha256[:16]>/<file name>, so identical content always
+    maps to the same object and URL. The manifest records every object that
+    finished uploading; a file whose object is in it is not sent again.
+    Files larger than chunk_size are uploaded in chunks. Failed uploads are
+    retried with exponential backoff and jitter, and after the last attempt
+    the file keeps its local path so the next run tries again.
+    """
+
+    def __init__(
+        self,
+        backend: StorageBackend,
+        workers: int = 4,
+        chunk_size: int = CHUNK_SIZE,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        manifest_path: Path = UPLOAD_MANIFEST,
+    ):
+        self.backend = backend
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.manifest_path = manifest_path
+        self._lock = threading.Lock()
+        self._manifest: Dict[str, Dict[str, str]] = self._load_manifest()
+        self._counters = {"uploaded": 0, "skipped": 0, "retried": 0, "failed": 0}
+
+    def _load_manifest(self) -> Dict[str, Dict[str, str]]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            return read_json(self.manifest_path)
+        except Exception as e:
+            print(f"Failed to read upload manifest, starting empty: {e}")
+            return {}
+
+    def _save_manifest(self) -> None:
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        write_json(self.manifest_path, self._manifest)
+
+    def upload(self, path: Path) -> Optional[str]:
+        """Upload one file; returns its public URL, or None if it failed."""
+        digest = file_digest(path)
+        destination = f"{digest[:16]}/{path.name}"
+        key = f"{self.backend.name}:{destination}"
+        with self._lock:
+            entry = self._manifest.get(key)
+        if entry is not None:
+            with self._lock:
+                self._counters["skipped"] += 1
+            return entry["url"]
+
+        content_type = content_type_for(path)
+        for attempt in range(self.max_retries + 1):
+            try:
+                if path.stat().st_size > self.chunk_size:
+                    self.backend.upload_chunks(
+                        destination, path, content_type, self.chunk_size
+                    )
+                else:
+                    self.backend.upload(destination, path.read_bytes(), content_type)
+                url = self.backend.public_url(destination)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Upload of {path.name} failed: {e}")
+                    with self._lock:
+                        self._counters["failed"] += 1
+                    return None
+                delay = random.uniform(0, self.base_delay * 2**attempt)
+                print(f"Retrying upload of {path.name} in {delay:.1f}s: {e}")
+                with self._lock:
+                    self._counters["retried"] += 1
+                time.sleep(delay)
+
+        with self._lock:
+            self._manifest[key] = {
+                "sha256": digest,
+                "url": url,
+                "uploaded_at": datetime.now().isoformat(),
+            }
+            self._save_manifest()
+            self._counters["uploaded"] += 1
+        return url
+
+    def upload_many(self, paths: List[Path]) -> Dict[Path, Optional[str]]:
+        """Upload files side by side; maps each path to its URL (None if failed)."""
+        if not paths:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(paths))) as pool:
+            return dict(zip(paths, pool.map(self.upload, paths)))
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
@@ -0,0 +1,260 @@
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from server.repository.result_index import OUTPUT_DIR
+from server.util.config import getConfig
+from server.util.rate_limiter import lane
+from server.util.serialization import read_json, write_json
+
+BATCHES_DIR = OUTPUT_DIR / "batches"
+
+
+class BatchService:
+    """
+    Overnight screening of many leases.
+
+    A batch is checkpointed under batches/<batch_id>/: manifest.json records
+    the status of every document, each finished document's dashboard is saved
+    as <doc_id>.json, and report.json aggregates them once all are done. A
+    batch interrupted by a crash is resumed by resume(), skipping documents
+    that already finished.
+
+    Documents run on a bounded worker pool sharing the already loaded agents
+    (rulebook, prompts and model clients). Each document's intake, analysis
+    and dashboard stay in memory until saved under the batch, never in the
+    shared outputs directory. Model calls go through the rate limiter's
+    "batch" lane so interactive requests are served first.
+    Clause verdicts are shared across the batch, so clauses repeated between
+    leases are only sent to the model once.
+    """
+
+    config = getConfig()
+
+    def __init__(
+        self,
+        intake_agent,
+        analyser_agent,
+        packager_agent,
+        batches_dir: Path = BATCHES_DIR,
+        max_workers: Optional[int] = None,
+    ):
+        self.intake_agent = intake_agent
+        self.analyser_agent = analyser_agent
+        self.packager_agent = packager_agent
+        self.batches_dir = batches_dir
+        self.batches_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or self.config.get_batch_workers()
+        self._lock = threading.Lock()
+
+    def submit(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Checkpoint a new batch and start it in the background."""
+        if not documents:
+            raise ValueError("A batch needs at least one document")
+
+        seen = set()
+        entries = []
+        for n, document in enumerate(documents):
+            markdown = document.get("markdown")
+            if not markdown:
+                raise ValueError(f"Document {n} has no markdown")
+            doc_id = str(document.get("id") or n + 1)
+            if doc_id in seen or not doc_id.replace("-", "").replace("_", "").isalnum():
+                raise ValueError(f"Invalid or duplicate document id: {doc_id}")
+            seen.add(doc_id)
+            entries.append(
+                {"id": doc_id, "name": document.get("name"), "status": "pending"}
+            )
+
+        batch_id = uuid.uuid4().hex[:12]
+        batch_dir = self.batches_dir / batch_id
+        (batch_dir / "documents").mkdir(parents=True)
+        for entry, document in zip(entries, documents):
+            (batch_dir / "documents" / f"{entry['id']}.md").write_text(
+                document["markdown"], encoding="utf-8"
+            )
+
+        manifest = {
+            "id": batch_id,
+            "status": "running",
+            "created_at": datetime.now().isoformat(),
+            "documents": entries,
+        }
+        self._save_json(batch_dir / "manifest.json", manifest)
+        self._start(batch_id)
+        return self.status(batch_id)
+
+    def resume(self) -> List[str]:
+        """Restart every batch that did not finish, e.g. after a crash."""
+        resumed = []
+        for manifest_file in self.batches_dir.glob("*/manifest.json"):
+            manifest = self._load_json(manifest_file)
+            if manifest.get("status") == "running":
+                self._start(manifest["id"])
+                resumed.append(manifest["id"])
+        if resumed:
+            print(f"Resuming batches: {', '.join(resumed)}")
+        return resumed
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        manifest = self._manifest(batch_id)
+        counts = Counter(entry["status"] for entry in manifest["documents"])
+        return {
+            "id": batch_id,
+            "status": manifest["status"],
+            "total": len(manifest["documents"]),
+            "done": counts["done"],
+            "failed": counts["failed"],
+            "pending": counts["pending"],
+            "documents": manifest["documents"],
+        }
+
+    def dashboard(self, batch_id: str, doc_id: str) -> Dict[str, Any]:
+        path = self._batch_dir(batch_id) / f"{doc_id}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"No dashboard for document {doc_id}")
+        return self._load_json(path)
+
+    def report(self, batch_id: str) -> Dict[str, Any]:
+        path = self._batch_dir(batch_id) / "report.json"
+        if not path.exists():
+            raise FileNotFoundError(f"Batch {batch_id} has not finished")
+        return self._load_json(path)
+
+    def _start(self, batch_id: str) -> None:
+        threading.Thread(
+            target=self._run, args=(batch_id,), name=f"batch-{batch_id}", daemon=True
+        ).start()
+
+    def _run(self, batch_id: str) -> None:
+        batch_dir = self._batch_dir(batch_id)
+        manifest = self._manifest(batch_id)
+        pending = [e for e in manifest["documents"] if e["status"] != "done"]
+        cache: Dict[str, List[Dict[str, Any]]] = {}
+        print(f"Batch {batch_id}: {len(pending)} documents to analyse")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(self._process, batch_dir, entry["id"], cache): entry["id"]
+                for entry in pending
+            }
+            for future in as_completed(futures):
+                doc_id = futures[future]
+                try:
+                    future.result()
+                    self._checkpoint(batch_id, doc_id, "done")
+                except Exception as e:
+                    print(f"Batch {batch_id}: document {doc_id} failed: {e}")
+                    self._checkpoint(batch_id, doc_id, "failed", str(e))
+
+        self._save_json(batch_dir / "report.json", self._aggregate(batch_id))
+        with self._lock:
+            manifest = self._manifest(batch_id)
+            manifest["status"] = "completed"
+            manifest["completed_at"] = datetime.now().isoformat()
+            self._save_json(batch_dir / "manifest.json", manifest)
+        print(f"Batch {batch_id} completed")
+
+    def _process(
+        self, batch_dir: Path, doc_id: str, cache: Dict[str, List[Dict[str, Any]]]
+    ) -> None:
+        markdown = (batch_dir / "documents" / f"{doc_id}.md").read_text(
+            encoding="utf-8"
+        )
+        with lane("batch"):
+            record = self.intake_agent.run_intake(markdown, save=False)
+            intake = record["summary"]["content"]
+            analysis = self.analyser_agent.analyze_cached(intake, cache)
+
+        # Planner artifacts belong to interactive runs, not to batch documents
+        dashboard = self.packager_agent.build_dashboard(analysis)
+        self._save_json(
+            batch_dir / f"{doc_id}.json",
+            {
+                "id": doc_id,
+                "title": intake.get("title"),
+                "analysis": analysis,
+                "dashboard": dashboard.model_dump(),
+            },
+        )
+
+    def _checkpoint(
+        self, batch_id: str, doc_id: str, status: str, error: Optional[str] = None
+    ) -> None:
+        with self._lock:
+            manifest = self._manifest(batch_id)
+            for entry in manifest["documents"]:
+                if entry["id"] == doc_id:
+                    entry["status"] = status
+                    entry["error"] = error
+                    entry["finished_at"] = datetime.now().isoformat()
+            self._save_json(self._batch_dir(batch_id) / "manifest.json", manifest)
+
+    def _aggregate(self, batch_id: str) -> Dict[str, Any]:
+        """One report across the batch: totals, per-document summaries, hotspots."""
+        batch_dir = self._batch_dir(batch_id)
+        manifest = self._manifest(batch_id)
+        totals = Counter()
+        categories = Counter()
+        documents = []
+        for entry in manifest["documents"]:
+            if entry["status"] != "done":
+                documents.append(
+                    {
+                        "id": entry["id"],
+                        "status": entry["status"],
+                        "error": entry.get("error"),
+                    }
+                )
+                continue
+            result = self._load_json(batch_dir / f"{entry['id']}.json")
+            summary = result["analysis"]["summary"]
+            totals.update(summary)
+            categories.update(
+                issue["category"]
+                for issue in result["analysis"]["issues"]
+                if issue["risk"] == "HIGH"
+            )
+            documents.append(
+                {
+                    "id": entry["id"],
+                    "name": entry.get("name"),
+                    "title": result.get("title"),
+                    "status": "done",
+                    "summary": summary,
+                }
+            )
+
+        documents.sort(
+            key=lambda d: (d.get("summary") or {}).get("high_risk", -1), reverse=True
+        )
+        return {
+            "id": batch_id,
+            "generated_at": datetime.now().isoformat(),
+            "documents_analysed": sum(1 for d in documents if d["status"] == "done"),
+            "documents_failed": sum(1 for d in documents if d["status"] == "failed"),
+            "totals": dict(totals),
+            "top_high_risk_categories": categories.most_common(10),
+            "documents": documents,
+        }
+
+    def _batch_dir(self, batch_id: str) -> Path:
+        if not batch_id.isalnum():
+            raise FileNotFoundError(f"Unknown batch {batch_id}")
+        return self.batches_dir / batch_id
+
+    def _manifest(self, batch_id: str) -> Dict[str, Any]:
+        path = self._batch_dir(batch_id) / "manifest.json"
+        if not path.exists():
+            raise FileNotFoundError(f"Unknown batch {batch_id}")
+        return self._load_json(path)
+
+    def _load_json(self, path: Path) -> Any:
+        return read_json(path)
+
+    def _save_json(self, path: Path, payload: Any) -> None:
+        write_json(path, payload)
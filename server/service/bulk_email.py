@@ -0,0 +1,213 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.mime.text import MIMEText
+from string import Formatter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from server.service.email_queue import EmailQueue
+
+FINAL_STATUSES = ("sent", "dead", "render_failed")
+
+
+class MessageTemplate:
+    """
+    Subject and body templates in str.format syntax, parsed once into literal
+    and field parts so rendering a recipient is a single join.
+    """
+
+    def __init__(self, subject: str, body: str):
+        self.subject = self._compile(subject)
+        self.body = self._compile(body)
+
+    def _compile(self, template: str) -> List[Tuple[str, Optional[str]]]:
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if field is not None and (spec or conversion):
+                raise ValueError(f"Unsupported format for field {field!r}")
+            if field is not None and not field.isidentifier():
+                raise ValueError(f"Template fields must be plain names: {field!r}")
+            parts.append((literal, field))
+        return parts
+
+    def _render(
+        self, parts: List[Tuple[str, Optional[str]]], context: Dict[str, Any]
+    ) -> str:
+        return "".join(
+            literal + (str(context[field]) if field is not None else "")
+            for literal, field in parts
+        )
+
+    def render(self, context: Dict[str, Any]) -> Tuple[str, str]:
+        return self._render(self.subject, context), self._render(self.body, context)
+
+
+class BulkJob:
+    """Per-recipient delivery status and throughput of one bulk send."""
+
+    def __init__(
+        self,
+        recipients: List[Dict[str, Any]],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.id = uuid.uuid4().hex[:12]
+        self.total = len(recipients)
+        self.created_at = datetime.now().isoformat()
+        self.clock = clock
+        self.started = clock()
+        self.finished: Optional[float] = None
+        self.status: Dict[str, Dict[str, Any]] = {
+            r["email"]: {"status": "pending", "error": None} for r in recipients
+        }
+        self._final = 0
+        self._lock = threading.Lock()
+
+    def record(self, email: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            if self.status[email]["status"] not in FINAL_STATUSES:
+                self._final += status in FINAL_STATUSES
+            self.status[email] = {"status": status, "error": error}
+            if self.finished is None and self._final == self.total:
+                self.finished = self.clock()
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for entry in self.status.values():
+                counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+            elapsed = (self.finished or self.clock()) - self.started
+            return {
+                "id": self.id,
+                "created_at": self.created_at,
+                "done": self.finished is not None,
+                "total": self.total,
+                "counts": counts,
+                "elapsed_seconds": round(elapsed, 3),
+                "messages_per_second": round(counts.get("sent", 0) / elapsed, 2)
+                if elapsed > 0
+                else 0.0,
+                "failures": {
+                    email: entry["error"]
+                    for email, entry in self.status.items()
+                    if entry["status"] in ("dead", "render_failed")
+                },
+                "recipients": self.status,
+            }
+
+
+class BulkSender:
+    """
+    Sends one template to many recipients. Messages are rendered by a small
+    thread pool in chunks and handed to the outbound queue as each chunk is
+    ready, so delivery (over the queue's pooled SMTP sessions, at the
+    account's rate limit) overlaps with rendering the rest.
+
+    Reports of finished jobs are kept for job_ttl seconds, and at most
+    max_jobs jobs are tracked; the oldest finished ones go first.
+    """
+
+    def __init__(
+        self,
+        outbound: EmailQueue,
+        sender: str,
+        render_workers: int = 4,
+        chunk_size: int = 200,
+        job_ttl: float = 24 * 3600,
+        max_jobs: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.outbound = outbound
+        self.sender = sender
+        self.render_workers = render_workers
+        self.chunk_size = chunk_size
+        self.job_ttl = job_ttl
+        self.max_jobs = max_jobs
+        self.clock = clock
+        self.jobs: Dict[str, BulkJob] = {}
+        self._lock = threading.Lock()
+
+    def job(self, job_id: str) -> Optional[BulkJob]:
+        with self._lock:
+            self._evict()
+            return self.jobs.get(job_id)
+
+    def _evict(self, room: int = 0) -> None:
+        """
+        Drop finished jobs older than job_ttl, then the oldest finished ones
+        until room more jobs fit under max_jobs.
+        """
+        now = self.clock()
+        finished = sorted(
+            (job.finished, job_id)
+            for job_id, job in self.jobs.items()
+            if job.finished is not None
+        )
+        excess = len(self.jobs) + room - self.max_jobs
+        for n, (finished_at, job_id) in enumerate(finished):
+            if now - finished_at > self.job_ttl or n < excess:
+                del self.jobs[job_id]
+
+    def send(
+        self, subject: str, body: str, recipients: List[Dict[str, Any]]
+    ) -> BulkJob:
+        """
+        Queue subject/body for every recipient. Each recipient is a dict with
+        an "email" key plus the template fields, e.g. {"email": ..., "name": ...}.
+        """
+        template = MessageTemplate(subject, body)
+        if not recipients:
+            raise ValueError("No recipients")
+        unique: Dict[str, Dict[str, Any]] = {}
+        for recipient in recipients:
+            if not recipient.get("email"):
+                raise ValueError("Every recipient needs an email")
+            # One message per address; the first entry for an address wins
+            unique.setdefault(recipient["email"], recipient)
+        recipients = list(unique.values())
+
+        job = BulkJob(recipients, clock=self.clock)
+        with self._lock:
+            self._evict(room=1)
+            if len(self.jobs) >= self.max_jobs:
+                raise ValueError("Too many bulk jobs in progress, try again later")
+            self.jobs[job.id] = job
+        threading.Thread(
+            target=self._submit, args=(job, template, recipients), daemon=True
+        ).start()
+        return job
+
+    def _render(
+        self, template: MessageTemplate, recipient: Dict[str, Any]
+    ) -> Tuple[str, Optional[MIMEText], Optional[str]]:
+        try:
+            subject, body = template.render(recipient)
+        except KeyError as e:
+            return recipient["email"], None, f"Missing template field {e}"
+        message = MIMEText(body, "plain", "utf-8")
+        message["From"] = self.sender
+        message["To"] = recipient["email"]
+        message["Subject"] = subject
+        return recipient["email"], message, None
+
+    def _submit(
+        self, job: BulkJob, template: MessageTemplate, recipients: List[Dict[str, Any]]
+    ) -> None:
+        with ThreadPoolExecutor(max_workers=self.render_workers) as pool:
+            for start in range(0, len(recipients), self.chunk_size):
+                chunk = recipients[start : start + self.chunk_size]
+                for email, message, error in pool.map(
+                    lambda r: self._render(template, r), chunk
+                ):
+                    if message is None:
+                        job.record(email, "render_failed", error)
+                        continue
+                    job.record(email, "queued")
+                    self.outbound.enqueue(
+                        message,
+                        on_result=lambda _, status, err, email=email: job.record(
+                            email, status, err
+                        ),
+                    )
+        print(f"Bulk job {job.id}: rendered {job.total} messages")
@@ -0,0 +1,246 @@
+import heapq
+import itertools
+import json
+import random
+import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime
+from email.message import Message
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from server.service.smtp_pool import SMTPConnectionPool
+from server.util.rate_limiter import RateLimiter
+
+DEAD_LETTER_PATH = (
+    Path(__file__).resolve().parent.parent
+    / "agents"
+    / "outputs"
+    / "email_dead_letter.jsonl"
+)
+
+# (message id, "sent" | "dead", error) once a message reaches a final state
+ResultCallback = Callable[[str, str, Optional[str]], None]
+
+
+class OutboundEmail:
+    def __init__(self, message: Message, on_result: Optional[ResultCallback] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.message = message
+        self.on_result = on_result
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+
+
+def is_permanent(error: Exception) -> bool:
+    """5xx replies and refused recipients will not succeed on retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    code = getattr(error, "smtp_code", None)
+    return isinstance(code, int) and 500 <= code < 600
+
+
+class _ConnectionSpent(Exception):
+    """A message failed on a connection that must not be reused."""
+
+
+class EmailQueue:
+    """
+    Background outbound mail queue.
+
+    enqueue() returns immediately; worker threads take up to batch_size ready
+    messages at a time and send them over one pooled connection. Transient
+    failures (dropped connections, 4xx replies) are retried with exponential
+    backoff and jitter; permanent failures, and messages that exhaust
+    max_retries, are appended to a JSONL dead-letter file.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPConnectionPool,
+        workers: int = 2,
+        batch_size: int = 20,
+        max_retries: int = 5,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+        dead_letter_path: Path = DEAD_LETTER_PATH,
+        limiter: Optional[RateLimiter] = None,
+        priority: str = "interactive",
+    ):
+        self.pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dead_letter_path = dead_letter_path
+        self.limiter = limiter
+        self.priority = priority
+
+        self._cond = threading.Condition()
+        self._pending: List[tuple] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+        self._counters = {"enqueued": 0, "sent": 0, "retried": 0, "dead": 0}
+
+    def enqueue(
+        self, message: Message, on_result: Optional[ResultCallback] = None
+    ) -> str:
+        item = OutboundEmail(message, on_result)
+        with self._cond:
+            self._start()
+            self._push(item, time.monotonic())
+            self._counters["enqueued"] += 1
+        return item.id
+
+    def _start(self) -> None:
+        if self._threads:
+            return
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"email-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _push(self, item: OutboundEmail, ready_at: float) -> None:
+        heapq.heappush(self._pending, (ready_at, next(self._sequence), item))
+        self._cond.notify()
+
+    def _next_batch(self) -> Optional[List[OutboundEmail]]:
+        with self._cond:
+            while True:
+                if self._stopped:
+                    return None
+                now = time.monotonic()
+                if self._pending and self._pending[0][0] <= now:
+                    batch = []
+                    while (
+                        self._pending
+                        and self._pending[0][0] <= now
+                        and len(batch) < self.batch_size
+                    ):
+                        batch.append(heapq.heappop(self._pending)[2])
+                    self._in_flight += len(batch)
+                    return batch
+                timeout = self._pending[0][0] - now if self._pending else None
+                self._cond.wait(timeout)
+
+    def _work(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._send_batch(batch)
+            finally:
+                with self._cond:
+                    self._in_flight -= len(batch)
+                    self._cond.notify_all()
+
+    def _send_batch(self, batch: List[OutboundEmail]) -> None:
+        remaining = list(batch)
+        for item in batch:
+            item.attempts += 1
+        try:
+            with self.pool.connection() as connection:
+                while remaining:
+                    item = remaining[0]
+                    if self.limiter is not None:
+                        self.limiter.acquire(1, self.priority)
+                    try:
+                        connection.send_message(item.message)
+                    except smtplib.SMTPException as e:
+                        # The server may have ended the session (e.g. 421), so
+                        # leave the block to make the pool discard the connection
+                        remaining.pop(0)
+                        self._failed(item, e)
+                        raise _ConnectionSpent() from e
+                    remaining.pop(0)
+                    self._finish(item, "sent")
+        except _ConnectionSpent:
+            # The rest of the batch was never tried: send it on a new connection
+            self._requeue(remaining)
+        except Exception as e:
+            # Connection-level failure: the pool drops the connection and the
+            # messages not yet handed to the server are tried again later
+            print(f"SMTP connection failed, retrying {len(remaining)} messages: {e}")
+            for item in remaining:
+                self._failed(item, e)
+
+    def _failed(self, item: OutboundEmail, error: Exception) -> None:
+        item.last_error = f"{type(error).__name__}: {error}"
+        if is_permanent(error) or item.attempts > self.max_retries:
+            self._dead_letter(item)
+            return
+        delay = random.uniform(
+            0, min(self.max_delay, self.base_delay * 2**item.attempts)
+        )
+        with self._cond:
+            self._counters["retried"] += 1
+            self._push(item, time.monotonic() + delay)
+
+    def _requeue(self, items: List[OutboundEmail]) -> None:
+        """Make items ready again without counting the attempt they did not get."""
+        with self._cond:
+            for item in items:
+                item.attempts -= 1
+                self._push(item, time.monotonic())
+
+    def _dead_letter(self, item: OutboundEmail) -> None:
+        record = {
+            "id": item.id,
+            "to": item.message.get("To"),
+            "subject": item.message.get("Subject"),
+            "attempts": item.attempts,
+            "error": item.last_error,
+            "failed_at": datetime.now().isoformat(),
+            "message": item.message.as_string(),
+        }
+        with self._cond:
+            self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"Email {item.id} to {record['to']} dead-lettered: {item.last_error}")
+        self._finish(item, "dead")
+
+    def _finish(self, item: OutboundEmail, status: str) -> None:
+        with self._cond:
+            self._counters[status] += 1
+        if item.on_result is not None:
+            try:
+                item.on_result(
+                    item.id, status, item.last_error if status == "dead" else None
+                )
+            except Exception as e:
+                print(f"Email result callback failed: {e}")
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued message is sent or dead-lettered."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 1.0)
+        return True
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self.pool.close()
+
+    def metrics(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                **self._counters,
+                "queued": len(self._pending),
+                "in_flight": self._in_flight,
+                "connections_opened": self.pool.opened,
+            }
@@ -1,7 +1,12 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Any, Dict, List, Optional
+
+from server.service.bulk_email import BulkJob, BulkSender
+from server.service.email_queue import EmailQueue
+from server.service.smtp_pool import SMTPConnectionPool
 from server.util.config import getConfig
+from server.util.rate_limiter import RateLimiter
 
 
 class EmailService:
@@ -9,8 +14,50 @@ class EmailService:
     GMAIL_ACC = config.get_gmail_acc()
     GMAIL_PW = config.get_gmail_pw()
 
-    def send_invite(self, to_emails, response, name):
-        print("Sending email")
+    def __init__(
+        self,
+        outbound: Optional[EmailQueue] = None,
+        bulk_outbound: Optional[EmailQueue] = None,
+    ):
+        # Invites and bulk notifications go out from the same account, so both
+        # queues share one limiter; invites wait in the interactive lane and
+        # are never stuck behind a bulk run
+        rate = self.config.get_email_rate_per_minute()
+        self.limiter = RateLimiter(rpm=rate, tpm=rate)
+        self.outbound = outbound or self._queue(
+            self.config.get_smtp_pool_size(), "interactive"
+        )
+        self.bulk_outbound = bulk_outbound or self._queue(
+            self.config.get_smtp_bulk_sessions(), "batch"
+        )
+        self.bulk = BulkSender(
+            self.bulk_outbound,
+            self.GMAIL_ACC,
+            job_ttl=self.config.get_bulk_job_ttl_hours() * 3600,
+        )
+
+    def _queue(self, sessions: int, priority: str) -> EmailQueue:
+        return EmailQueue(
+            SMTPConnectionPool(
+                self.config.get_smtp_host(),
+                self.config.get_smtp_port(),
+                username=self.GMAIL_ACC,
+                password=self.GMAIL_PW,
+                size=sessions,
+                starttls=self.config.get_smtp_starttls(),
+            ),
+            workers=sessions,
+            max_retries=self.config.get_email_max_retries(),
+            limiter=self.limiter,
+            priority=priority,
+        )
+
+    def send_invite(self, to_emails, response, name) -> Optional[str]:
+        """Queue the recommendations email; delivery happens in the background."""
+        if response is None:
+            print("No recommendations to email")
+            return None
+
         msg = MIMEMultipart()
         msg["From"] = self.GMAIL_ACC
         if isinstance(to_emails, list):
@@ -28,14 +75,20 @@ class EmailService:
                 """
         msg.attach(MIMEText(body, "plain"))
 
-        try:
-            with smtplib.SMTP("smtp.gmail.com", 587) as server:
-                server.set_debuglevel(1)
-                server.starttls()
-                server.login(self.GMAIL_ACC, self.GMAIL_PW)
-                server.send_message(msg)
-            print("Email sent!")
-        except smtplib.SMTPAuthenticationError:
-            print("Authentication failed: check email/password or use App Password")
-        except Exception as e:
-            print("Failed to send email:", e)
+        message_id = self.outbound.enqueue(msg)
+        print(f"Queued email {message_id}")
+        return message_id
+
+    def send_bulk(
+        self, subject: str, body: str, recipients: List[Dict[str, Any]]
+    ) -> BulkJob:
+        """
+        Queue one templated notification per recipient, e.g. body
+        "Dear {name}, ..." with recipients [{"email": ..., "name": ...}].
+        Poll bulk_report(job.id) for progress.
+        """
+        return self.bulk.send(subject, body, recipients)
+
+    def bulk_report(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.bulk.job(job_id)
+        return job.report() if job is not None else None
@@ -0,0 +1,110 @@
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+
+class SMTPConnectionPool:
+    """
+    Pool of authenticated SMTP connections that are reused across messages,
+    so STARTTLS and login are paid once per connection rather than per email.
+
+    A connection idle for longer than idle_check seconds is probed with NOOP
+    before reuse and replaced if the server has dropped it. A connection that
+    raises while in use is discarded instead of being returned to the pool,
+    so callers must let any SMTP error (including a 421 reply, after which
+    the server closes the session) propagate out of connection().
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        size: int = 2,
+        starttls: bool = True,
+        timeout: float = 30.0,
+        idle_check: float = 30.0,
+        factory: Callable[..., smtplib.SMTP] = smtplib.SMTP,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_check = idle_check
+        self.factory = factory
+        self._idle: "queue.LifoQueue[tuple]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = self.factory(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                connection.starttls()
+            connection.ehlo_or_helo_if_needed()
+            # Local stand-ins (e.g. aiosmtpd) usually do not offer AUTH
+            if self.username and connection.has_extn("auth"):
+                connection.login(self.username, self.password)
+        except BaseException:
+            self._close(connection)
+            raise
+        self.opened += 1
+        return connection
+
+    def _alive(self, connection: smtplib.SMTP) -> bool:
+        try:
+            return connection.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Borrow a live connection, blocking while all of them are in use."""
+        self._slots.acquire()
+        connection: Optional[smtplib.SMTP] = None
+        try:
+            try:
+                connection, last_used = self._idle.get_nowait()
+                if time.monotonic() - last_used > self.idle_check and not self._alive(
+                    connection
+                ):
+                    self._close(connection)
+                    connection = None
+            except queue.Empty:
+                pass
+            if connection is None:
+                connection = self._connect()
+
+            yield connection
+            self._idle.put((connection, time.monotonic()))
+        except BaseException:
+            if connection is not None:
+                self._close(connection)
+            raise
+        finally:
+            self._slots.release()
+
+    def _close(self, connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except Exception:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(connection)
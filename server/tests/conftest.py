@@ -0,0 +1,5 @@
+import os
+
+# getConfig() refuses to start without these; no test talks to Gemini or Gmail
+for name in ("GEMINI_API_KEY", "GMAIL_ACC", "GMAIL_PW"):
+    os.environ.setdefault(name, "test")
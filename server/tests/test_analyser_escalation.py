@@ -0,0 +1,119 @@
+import pytest
+
+from server.agents.analyser_agent import AnalyserAgent
+from server.agents.schema import AnalysisResult, Issue, Summary
+
+CLAUSES = [
+    "The tenant shall pay a deposit of four months rent, forfeited on any breach.",
+    "The tenant shall not keep pets on the premises without written consent.",
+    "The landlord may enter the premises at any time without notice.",
+    "Rent is payable monthly in advance on the first day of the month.",
+]
+
+
+def issue(clause: str, risk: str, confidence=0.9) -> Issue:
+    return Issue(
+        clause=clause,
+        risk=risk,
+        category="Terms",
+        rationale=f"{risk} verdict",
+        recommendation="Negotiate.",
+        reference="rulebook",
+        confidence=confidence,
+    )
+
+
+def result(issues) -> AnalysisResult:
+    return AnalysisResult(
+        summary=Summary(high_risk=0, medium_risk=0, ok=0, total=len(issues)),
+        issues=issues,
+        buckets=["Terms"],
+    )
+
+
+@pytest.fixture
+def analyser(monkeypatch):
+    agent = AnalyserAgent()
+    monkeypatch.setattr(agent.config, "get_escalation_confidence", lambda: 0.7)
+    return agent
+
+
+def escalate_with(analyser, monkeypatch, fast, strong):
+    """Run the escalation with canned fast and strong verdicts."""
+    seen = {}
+
+    def run_analysis(clauses, deadline=None, model=None, reask=True):
+        if model is not None:
+            return result(fast)
+        seen["escalated"] = clauses
+        return result(strong(clauses))
+
+    monkeypatch.setattr(analyser, "_run_analysis", run_analysis)
+    return analyser._analyze_with_escalation(CLAUSES), seen.get("escalated")
+
+
+def test_only_high_or_unsure_verdicts_are_escalated(analyser, monkeypatch):
+    fast = [
+        issue(CLAUSES[0], "HIGH"),
+        issue(CLAUSES[1], "MEDIUM", confidence=0.95),
+        issue(CLAUSES[2], "MEDIUM", confidence=0.4),
+        issue(CLAUSES[3], "OK", confidence=None),
+    ]
+
+    def strong(clauses):
+        return [issue(c, "HIGH") for c in clauses]
+
+    analysis, escalated = escalate_with(analyser, monkeypatch, fast, strong)
+
+    assert escalated == [CLAUSES[0], CLAUSES[2], CLAUSES[3]]
+    assert [i.risk for i in analysis.issues] == ["HIGH", "MEDIUM", "HIGH", "HIGH"]
+    assert analysis.summary == Summary(high_risk=3, medium_risk=1, ok=0, total=4)
+
+
+def test_clause_left_out_on_recheck_is_downgraded(analyser, monkeypatch):
+    fast = [issue(c, "HIGH") for c in CLAUSES]
+
+    def strong(clauses):
+        # Only the entry clause is still a problem for the stronger model
+        return [issue(CLAUSES[2], "HIGH")]
+
+    analysis, _ = escalate_with(analyser, monkeypatch, fast, strong)
+
+    assert [i.risk for i in analysis.issues] == ["OK", "OK", "HIGH", "OK"]
+    assert [i.clause for i in analysis.issues] == CLAUSES
+    assert analysis.issues[0].rationale.startswith("Not flagged when re-checked")
+    assert analysis.summary == Summary(high_risk=1, medium_risk=0, ok=3, total=4)
+
+
+def test_recheck_verdicts_are_placed_by_clause_text(analyser, monkeypatch):
+    fast = [issue(c, "HIGH") for c in CLAUSES]
+
+    def strong(clauses):
+        # Out of order, one quoted in part, one dropped
+        return [
+            issue(CLAUSES[3], "OK"),
+            issue("the landlord may enter the premises at any time", "MEDIUM"),
+            issue(CLAUSES[0], "HIGH"),
+        ]
+
+    analysis, _ = escalate_with(analyser, monkeypatch, fast, strong)
+
+    assert [i.risk for i in analysis.issues] == ["HIGH", "OK", "MEDIUM", "OK"]
+    assert analysis.issues[1].rationale.startswith("Not flagged when re-checked")
+    assert analysis.issues[3].rationale == "OK verdict"
+
+
+def test_reworded_verdicts_fall_back_to_position(analyser, monkeypatch):
+    fast = [issue(CLAUSES[0], "HIGH"), issue(CLAUSES[1], "HIGH")]
+    fast += [issue(c, "OK") for c in CLAUSES[2:]]
+
+    def strong(clauses):
+        return [
+            issue("Deposit of four months is forfeited for any breach", "MEDIUM"),
+            issue("Pets need written consent", "OK"),
+        ]
+
+    analysis, _ = escalate_with(analyser, monkeypatch, fast, strong)
+
+    assert [i.risk for i in analysis.issues] == ["MEDIUM", "OK", "OK", "OK"]
+    assert analysis.issues[1].rationale == "OK verdict"
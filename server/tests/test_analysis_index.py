@@ -0,0 +1,96 @@
+from server.agents.analysis_index import AnalysisIndex
+
+
+def issue(n: int, risk: str, category: str, recommendation: str = "") -> dict:
+    return {
+        "clause": f"clause {n}",
+        "risk": risk,
+        "category": category,
+        "rationale": f"rationale {n}",
+        "recommendation": recommendation or f"fix {n}",
+    }
+
+
+def test_buckets_issues_by_risk_and_category_in_clause_order():
+    issues = [
+        issue(0, "HIGH", "Deposit"),
+        issue(1, "OK", "Rent"),
+        issue(2, "MEDIUM", "Deposit"),
+        issue(3, "HIGH", "Rent"),
+    ]
+
+    index = AnalysisIndex({"issues": issues})
+
+    assert index.by_risk["HIGH"] == [issues[0], issues[3]]
+    assert index.by_risk["MEDIUM"] == [issues[2]]
+    assert index.by_risk["OK"] == [issues[1]]
+    assert index.by_category == {
+        "Deposit": [issues[0], issues[2]],
+        "Rent": [issues[1], issues[3]],
+    }
+    assert index.high_risk == [issues[0], issues[3]]
+
+
+def test_category_breakdown_counts_each_risk_level():
+    # The packager used to compare "HIGH" with "high", so these stayed 0
+    index = AnalysisIndex(
+        {
+            "issues": [
+                issue(0, "HIGH", "Deposit"),
+                issue(1, "HIGH", "Deposit"),
+                issue(2, "MEDIUM", "Deposit"),
+                issue(3, "OK", "Rent"),
+                issue(4, "UNKNOWN", "Rent"),
+                issue(5, "TOTAL", "Rent"),
+            ]
+        }
+    )
+
+    assert index.category_breakdown == {
+        "Deposit": {"total": 3, "high": 2, "medium": 1, "ok": 0},
+        "Rent": {"total": 3, "high": 0, "medium": 0, "ok": 1},
+    }
+
+
+def test_missing_fields_default_to_ok_and_unknown():
+    index = AnalysisIndex({"issues": [{"clause": "c"}]})
+
+    assert index.by_risk["OK"] == [{"clause": "c"}]
+    assert index.category_breakdown == {
+        "Unknown": {"total": 1, "high": 0, "medium": 0, "ok": 1}
+    }
+
+
+def test_top_recommendations_come_from_the_first_ten_without_repeats():
+    issues = [issue(n, "MEDIUM", "Rent", f"fix {n % 3}") for n in range(10)]
+    issues[4]["recommendation"] = ""
+    issues.append(issue(10, "HIGH", "Rent", "fix 10"))
+
+    index = AnalysisIndex({"issues": issues})
+
+    assert index.top_recommendations == ["fix 0", "fix 1", "fix 2"]
+
+
+def test_slices_of_high_risk_issues():
+    issues = [issue(n, "HIGH" if n % 2 else "OK", "Fees") for n in range(40)]
+
+    index = AnalysisIndex({"issues": issues})
+
+    assert index.top(3) == issues[:3]
+    assert index.high_risk_recommendations == [f"fix {n}" for n in (1, 3, 5, 7, 9)]
+    assert len(index.proposed_changes) == 15
+    assert index.proposed_changes[0] == {
+        "original_clause": "clause 1",
+        "proposed_change": "fix 1",
+        "rationale": "rationale 1",
+        "category": "Fees",
+    }
+    assert index.proposed_changes[-1]["original_clause"] == "clause 29"
+
+
+def test_risk_percentage_of_the_summary_total():
+    index = AnalysisIndex({"summary": {"high_risk": 1, "ok": 2, "total": 3}})
+
+    assert index.risk_percentage("high_risk") == 33.3
+    assert index.risk_percentage("medium_risk") == 0.0
+    assert AnalysisIndex({}).risk_percentage("high_risk") == 0.0
@@ -0,0 +1,106 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from server.repository.artifact_index import ArtifactIndex
+from server.util.serialization import write_json
+
+
+@pytest.fixture
+def dashboard(tmp_path):
+    path = tmp_path / "dashboard.json"
+    write_json(
+        path,
+        {
+            "artifacts": [
+                {"id": "summary", "url": "summary.pdf"},
+                {"id": "rider", "url": "rider.pdf"},
+                {"id": "summary", "url": "duplicate.pdf"},
+            ]
+        },
+    )
+    return path
+
+
+@pytest.fixture
+def index(dashboard, tmp_path):
+    # A long interval, so only invalidate() or a due re-check reloads
+    return ArtifactIndex(dashboard, lambda url: tmp_path / url, check_interval=3600)
+
+
+def rewrite(path: Path, artifacts) -> None:
+    write_json(path, {"artifacts": artifacts})
+
+
+def test_snapshot_lists_artifacts_and_first_id_wins(index):
+    snapshot = index.current()
+
+    assert [a["url"] for a in snapshot.artifacts] == [
+        "summary.pdf",
+        "rider.pdf",
+        "duplicate.pdf",
+    ]
+    assert index.get("summary")["url"] == "summary.pdf"
+    assert index.get("missing") is None
+    assert snapshot.etag.startswith('"') and snapshot.listing.startswith(b"{")
+
+
+def test_snapshot_is_reused_until_invalidated(index, dashboard):
+    first = index.current()
+    rewrite(dashboard, [{"id": "planner", "url": "planner.pdf"}])
+
+    assert index.current() is first
+
+    index.invalidate()
+    reloaded = index.current()
+
+    assert reloaded is not first
+    assert index.get("planner")["url"] == "planner.pdf"
+    assert reloaded.etag != first.etag
+
+
+def test_dashboard_rewrite_is_picked_up_on_the_next_check(dashboard, tmp_path):
+    index = ArtifactIndex(dashboard, lambda url: tmp_path / url, check_interval=0)
+    first = index.current()
+
+    rewrite(dashboard, [{"id": "planner", "url": "planner.pdf"}])
+
+    assert index.current() is not first
+    assert index.get("summary") is None
+
+
+def test_unchanged_dashboard_keeps_its_snapshot(dashboard, tmp_path):
+    index = ArtifactIndex(dashboard, lambda url: tmp_path / url, check_interval=0)
+
+    assert index.current() is index.current()
+
+
+def test_missing_dashboard_raises(index, dashboard):
+    index.current()
+    dashboard.unlink()
+    index.invalidate()
+
+    with pytest.raises(FileNotFoundError):
+        index.current()
+
+
+def test_local_file_stats_are_cached_until_invalidated(index, tmp_path):
+    pdf = tmp_path / "summary.pdf"
+    pdf.write_bytes(b"%PDF-1")
+
+    path, st = index.local_file("summary.pdf")
+    assert path == pdf and st.st_size == 6
+
+    pdf.write_bytes(b"%PDF-1.4 longer")
+    assert index.local_file("summary.pdf")[1].st_size == 6
+
+    index.invalidate()
+    assert index.local_file("summary.pdf")[1].st_size == 15
+
+
+def test_local_file_is_none_for_missing_files_and_directories(index, tmp_path):
+    os.mkdir(tmp_path / "folder")
+
+    assert index.local_file("absent.pdf") is None
+    assert index.local_file("folder") is None
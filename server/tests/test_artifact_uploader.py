@@ -0,0 +1,143 @@
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from server.service.artifact_uploader import (
+    ArtifactUploader,
+    LocalBackend,
+    content_type_for,
+    file_digest,
+)
+
+
+class FlakyBackend(LocalBackend):
+    """LocalBackend whose first failures uploads raise a connection error."""
+
+    def __init__(self, root, failures=0):
+        super().__init__(root)
+        self.failures = failures
+        self.calls = 0
+        self._count_lock = threading.Lock()
+
+    def _maybe_fail(self):
+        with self._count_lock:
+            self.calls += 1
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("connection reset")
+
+    def upload(self, destination, data, content_type):
+        self._maybe_fail()
+        super().upload(destination, data, content_type)
+
+    def upload_chunks(self, destination, path, content_type, chunk_size):
+        self._maybe_fail()
+        super().upload_chunks(destination, path, content_type, chunk_size)
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for n in range(5):
+        path = tmp_path / f"artifact_{n}.json"
+        path.write_text(f'{{"n": {n}}}')
+        paths.append(path)
+    large = tmp_path / "report.pdf"
+    large.write_bytes(os.urandom(300_000))
+    paths.append(large)
+    return paths
+
+
+def uploader(backend, tmp_path, **kwargs):
+    options = {"base_delay": 0.001, "chunk_size": 64 * 1024}
+    options.update(kwargs)
+    return ArtifactUploader(backend, manifest_path=tmp_path / "uploads.json", **options)
+
+
+def test_uploads_by_content_address_and_skips_unchanged_files(files, tmp_path):
+    backend = LocalBackend(tmp_path / "bucket")
+    first = uploader(backend, tmp_path)
+
+    urls = first.upload_many(files)
+
+    for path, url in urls.items():
+        assert url == str(tmp_path / "bucket" / file_digest(path)[:16] / path.name)
+        assert file_digest(path) == file_digest(tmp_path / url)
+    assert first.metrics()["uploaded"] == len(files)
+
+    # A new uploader reads the manifest and sends nothing again
+    second = uploader(backend, tmp_path)
+    assert second.upload_many(files) == urls
+    assert second.metrics() == {
+        "uploaded": 0,
+        "skipped": len(files),
+        "retried": 0,
+        "failed": 0,
+    }
+
+
+def test_retries_transient_failures(files, tmp_path):
+    backend = FlakyBackend(tmp_path / "bucket", failures=3)
+    up = uploader(backend, tmp_path, max_retries=3, workers=1)
+
+    urls = up.upload_many(files)
+
+    assert all(url is not None for url in urls.values())
+    assert up.metrics()["retried"] == 3
+
+
+def test_gives_up_after_the_last_retry(files, tmp_path):
+    backend = FlakyBackend(tmp_path / "bucket", failures=10)
+    up = uploader(backend, tmp_path, max_retries=2)
+
+    assert up.upload(files[0]) is None
+    assert up.metrics()["failed"] == 1
+    # Not recorded, so the next run tries again
+    assert not (tmp_path / "uploads.json").exists()
+
+
+def test_chunked_upload_resumes_from_the_part_file(tmp_path):
+    source = tmp_path / "report.pdf"
+    source.write_bytes(os.urandom(200_000))
+    backend = LocalBackend(tmp_path / "bucket")
+    part = tmp_path / "bucket" / "abc" / "report.pdf.part"
+    part.parent.mkdir(parents=True)
+    part.write_bytes(source.read_bytes()[:70_000])
+
+    backend.upload_chunks("abc/report.pdf", source, "application/pdf", 16 * 1024)
+
+    assert (tmp_path / "bucket" / "abc" / "report.pdf").read_bytes() == (
+        source.read_bytes()
+    )
+    assert not part.exists()
+
+
+def test_concurrent_chunked_uploads_to_one_destination(tmp_path):
+    source = tmp_path / "report.pdf"
+    source.write_bytes(os.urandom(1_000_000))
+    backend = LocalBackend(tmp_path / "bucket")
+    errors = []
+
+    def upload():
+        try:
+            backend.upload_chunks("abc/report.pdf", source, "application/pdf", 4096)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=upload) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    target = tmp_path / "bucket" / "abc" / "report.pdf"
+    assert file_digest(target) == file_digest(source)
+
+
+def test_content_types():
+    assert content_type_for(Path("a.PDF")) == "application/pdf"
+    assert content_type_for(Path("a.ics")) == "text/calendar"
+    assert content_type_for(Path("a.bin")) == "application/octet-stream"
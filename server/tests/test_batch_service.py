@@ -0,0 +1,92 @@
+import pytest
+
+from server.agents.analyser_agent import AnalyserAgent
+from server.agents.intake_agent import IntakeAgent
+from server.agents.packager_v2 import PackagerV2Agent
+from server.agents.schema import AnalysisResult, IntakeAgentOutput, Issue, Summary
+from server.service.batch_service import BatchService
+
+LEASES = {
+    "unit-1": "# Lease One\n\n1. The tenant shall pay a deposit of four months rent.",
+    "unit-2": "# Lease Two\n\n1. The tenant shall not keep pets without consent.",
+}
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """BatchService over real agents whose model calls are faked."""
+    monkeypatch.chdir(tmp_path)
+    intake = IntakeAgent()
+    analyser = AnalyserAgent()
+    packager = PackagerV2Agent()
+    packager.output_dir = tmp_path / "outputs"
+    packager.output_file = packager.output_dir / "dashboard_data.json"
+
+    def fake_intake(system_prompt, document, schema, **kwargs):
+        title, clause = document.split("\n\n1. ")
+        return IntakeAgentOutput(
+            title=title.lstrip("# "), date="2025-01-01", clauses=[clause]
+        )
+
+    def fake_analysis(clauses, deadline=None):
+        issues = [
+            Issue(
+                clause=clause,
+                risk="HIGH" if "deposit" in clause else "OK",
+                category="Financial",
+                rationale="r",
+                recommendation="r",
+                reference="r",
+            )
+            for clause in clauses
+        ]
+        return AnalysisResult(
+            summary=Summary(high_risk=0, medium_risk=0, ok=0, total=0),
+            issues=issues,
+            buckets=["Financial"],
+        )
+
+    monkeypatch.setattr(intake, "run", fake_intake)
+    monkeypatch.setattr(analyser, "_analyze_clauses", fake_analysis)
+    service = BatchService(intake, analyser, packager, batches_dir=tmp_path / "b")
+    monkeypatch.setattr(service, "_start", lambda batch_id: None)
+    return service
+
+
+def test_batch_saves_results_only_under_the_batch(service, tmp_path):
+    batch = service.submit(
+        [{"id": doc_id, "markdown": markdown} for doc_id, markdown in LEASES.items()]
+    )
+    service._run(batch["id"])
+
+    assert service.status(batch["id"])["done"] == 2
+    first = service.dashboard(batch["id"], "unit-1")
+    assert first["title"] == "Lease One"
+    assert first["dashboard"]["riskCounts"] == {"high": 1, "medium": 0, "ok": 0}
+    assert first["dashboard"]["artifacts"] == []
+    report = service.report(batch["id"])
+    assert [d["id"] for d in report["documents"]] == ["unit-1", "unit-2"]
+
+    # Neither the interactive outputs nor the cwd-relative intake path are used
+    assert not (tmp_path / "outputs").exists()
+    assert not (tmp_path / "agents").exists()
+
+
+def test_build_dashboard_writes_nothing(service, tmp_path):
+    analysis = {
+        "summary": {"high_risk": 1, "medium_risk": 0, "ok": 1, "total": 2},
+        "issues": [
+            {
+                "clause": "Deposit of four months",
+                "risk": "HIGH",
+                "category": "financial",
+            },
+            {"clause": "Quiet enjoyment", "risk": "OK", "category": "rights"},
+        ],
+    }
+
+    dashboard = service.packager_agent.build_dashboard(analysis)
+
+    assert dashboard.riskCounts.high == 1
+    assert [c.category for c in dashboard.flaggedClauses] == ["Financial Terms"]
+    assert not (tmp_path / "outputs").exists()
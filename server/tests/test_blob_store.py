@@ -0,0 +1,139 @@
+import hashlib
+import os
+
+import pytest
+
+from server.agents import pdf_render
+from server.repository.blob_store import BlobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(tmp_path / "blobs", ttl=100, gc_interval=10**9, grace=0)
+
+
+def sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_write_materializes_paths_as_links_to_one_blob(store, tmp_path):
+    first, second = tmp_path / "a.json", tmp_path / "out" / "b.json"
+
+    digest = store.write("package", b"{}", [first, second])
+
+    blob = store.blob_path(digest)
+    assert digest == sha(b"{}")
+    assert first.read_bytes() == second.read_bytes() == b"{}"
+    assert os.path.samefile(blob, first) and os.path.samefile(blob, second)
+    assert store.resolve("package") == blob
+
+
+def test_republishing_unchanged_content_keeps_the_same_file(store, tmp_path):
+    target = tmp_path / "package.json"
+    store.write("package", b"v1", [target])
+    inode = target.stat().st_ino
+
+    store.write("package", b"v1", [target])
+
+    assert target.stat().st_ino == inode
+    assert store.stats()["blobs"] == 1
+
+
+def test_republishing_new_content_replaces_the_link(store, tmp_path):
+    target = tmp_path / "package.json"
+    old = store.write("package", b"v1", [target])
+
+    new = store.write("package", b"v2", [target])
+
+    assert target.read_bytes() == b"v2"
+    assert store.blob_path(old).read_bytes() == b"v1"
+    assert store.names()["package"]["digest"] == new
+
+
+def test_republishing_to_fewer_paths_removes_the_stale_ones(store, tmp_path):
+    kept, dropped = tmp_path / "kept.json", tmp_path / "dropped.json"
+    store.write("package", b"v1", [kept, dropped])
+
+    store.write("package", b"v1", [kept])
+
+    assert kept.exists() and not dropped.exists()
+
+
+def test_adopt_moves_the_file_into_the_store(store, tmp_path):
+    target = tmp_path / "summary.pdf"
+    target.write_bytes(b"%PDF-1")
+
+    digest = store.adopt("summary", target)
+
+    assert digest == sha(b"%PDF-1")
+    assert os.path.samefile(store.blob_path(digest), target)
+    assert [p.name for p in tmp_path.iterdir() if p.is_file()] == ["summary.pdf"]
+
+
+def test_adopting_known_content_reuses_the_blob(store, tmp_path):
+    first, second = tmp_path / "one.pdf", tmp_path / "two.pdf"
+    first.write_bytes(b"%PDF-1")
+    second.write_bytes(b"%PDF-1")
+
+    assert store.adopt("one", first) == store.adopt("two", second)
+    assert store.stats()["blobs"] == 1
+    assert os.path.samefile(first, second)
+
+
+def test_rerendering_an_adopted_pdf_leaves_its_blob_intact(store, tmp_path):
+    target = tmp_path / "summary.pdf"
+    target.write_bytes(b"%PDF-1")
+    old = store.adopt("summary", target)
+
+    pdf_render._write(str(target), b"%PDF-2")
+
+    assert store.blob_path(old).read_bytes() == b"%PDF-1"
+    assert sha(store.blob_path(old).read_bytes()) == old
+    assert store.adopt("summary", target) == sha(b"%PDF-2")
+    assert target.read_bytes() == b"%PDF-2"
+
+
+def test_writing_to_a_link_elsewhere_does_not_change_the_blob(store, tmp_path):
+    # Another publisher of the same bytes must not see them change either
+    first, second = tmp_path / "one.json", tmp_path / "two.json"
+    digest = store.write("one", b"shared", [first])
+    store.write("two", b"shared", [second])
+
+    store.write("one", b"changed", [first])
+
+    assert second.read_bytes() == b"shared"
+    assert store.blob_path(digest).read_bytes() == b"shared"
+
+
+def test_gc_expires_old_names_with_their_paths_and_blobs(store, tmp_path):
+    old, fresh, kept = (tmp_path / f"{n}.json" for n in ("old", "fresh", "kept"))
+    old_digest = store.write("old", b"old", [old])
+    store.write("kept", b"kept", [kept], keep=True)
+    now = store.names()["old"]["updated_at"] + 150
+    store.write("fresh", b"fresh", [fresh])
+    store._names["fresh"]["updated_at"] = now - 10
+
+    result = store.gc(now=now)
+
+    assert result["expired_names"] == 1 and result["removed_blobs"] == 1
+    assert set(store.names()) == {"fresh", "kept"}
+    assert not old.exists() and fresh.exists() and kept.exists()
+    assert not store.blob_path(old_digest).exists()
+
+
+def test_gc_spares_unreferenced_blobs_within_the_grace_period(tmp_path):
+    store = BlobStore(tmp_path / "blobs", gc_interval=10**9, grace=60)
+    digest = store.put(b"about to be linked")
+
+    assert store.gc()["removed_blobs"] == 0
+    assert store.blob_path(digest).exists()
+
+
+def test_index_survives_a_restart(store, tmp_path):
+    target = tmp_path / "package.json"
+    digest = store.write("package", b"v1", [target], keep=True)
+
+    reopened = BlobStore(store.root)
+
+    assert reopened.names()["package"]["digest"] == digest
+    assert reopened.resolve("package") == store.blob_path(digest)
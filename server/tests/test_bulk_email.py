@@ -0,0 +1,175 @@
+import time
+
+import pytest
+
+from server.service.bulk_email import BulkJob, BulkSender, MessageTemplate
+
+
+class FakeOutbound:
+    """Outbound queue that reports every message as sent straight away."""
+
+    def __init__(self):
+        self.messages = []
+
+    def enqueue(self, message, on_result=None):
+        self.messages.append(message)
+        if on_result is not None:
+            on_result("id", "sent", None)
+        return "id"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def wait_done(job: BulkJob) -> dict:
+    for _ in range(200):
+        report = job.report()
+        if report["done"]:
+            return report
+        time.sleep(0.01)
+    raise AssertionError("bulk job did not finish")
+
+
+def test_template_renders_plain_fields():
+    template = MessageTemplate("Unit {unit}", "Dear {name},\nUnit {unit} is ready.")
+
+    assert template.render({"name": "Ann", "unit": 4}) == (
+        "Unit 4",
+        "Dear Ann,\nUnit 4 is ready.",
+    )
+
+
+@pytest.mark.parametrize("body", ["{name!r}", "{name:>10}", "{0}", "{user.__class__}"])
+def test_template_rejects_anything_but_plain_names(body):
+    with pytest.raises(ValueError):
+        MessageTemplate("Subject", body)
+
+
+def test_sends_one_message_per_address_and_reports_failures():
+    outbound = FakeOutbound()
+    sender = BulkSender(outbound, "tenant-analyzer@example.com", chunk_size=2)
+
+    job = sender.send(
+        "Lease review for {name}",
+        "Dear {name}",
+        [
+            {"email": "a@example.com", "name": "A"},
+            {"email": "b@example.com", "name": "B"},
+            {"email": "a@example.com", "name": "Duplicate"},
+            {"email": "c@example.com"},
+        ],
+    )
+    report = wait_done(job)
+
+    assert report["total"] == 3
+    assert report["counts"] == {"sent": 2, "render_failed": 1}
+    assert report["failures"] == {"c@example.com": "Missing template field 'name'"}
+    assert [m["Subject"] for m in outbound.messages] == [
+        "Lease review for A",
+        "Lease review for B",
+    ]
+
+
+def test_rejects_recipients_without_an_email():
+    sender = BulkSender(FakeOutbound(), "tenant-analyzer@example.com")
+
+    with pytest.raises(ValueError):
+        sender.send("Subject", "Body", [{"name": "No address"}])
+    with pytest.raises(ValueError):
+        sender.send("Subject", "Body", [])
+
+
+def test_finished_jobs_expire_after_the_ttl():
+    clock = FakeClock()
+    sender = BulkSender(FakeOutbound(), "x@example.com", job_ttl=60, clock=clock)
+    job = sender.send("Subject", "Body", [{"email": "a@example.com"}])
+    wait_done(job)
+
+    clock.now += 59
+    assert sender.job(job.id) is job
+    clock.now += 2
+    assert sender.job(job.id) is None
+    assert sender.jobs == {}
+
+
+def test_oldest_finished_jobs_make_room_under_the_cap():
+    clock = FakeClock()
+    sender = BulkSender(FakeOutbound(), "x@example.com", max_jobs=2, clock=clock)
+    jobs = []
+    for n in range(4):
+        clock.now += 1
+        jobs.append(sender.send("Subject", "Body", [{"email": f"{n}@example.com"}]))
+        wait_done(jobs[-1])
+
+    assert list(sender.jobs) == [jobs[2].id, jobs[3].id]
+
+
+def test_refuses_new_jobs_while_the_cap_is_all_in_progress():
+    class SilentOutbound(FakeOutbound):
+        def enqueue(self, message, on_result=None):
+            self.messages.append(message)
+            return "id"
+
+    sender = BulkSender(SilentOutbound(), "x@example.com", max_jobs=1)
+    sender.send("Subject", "Body", [{"email": "a@example.com"}])
+
+    with pytest.raises(ValueError, match="Too many bulk jobs"):
+        sender.send("Subject", "Body", [{"email": "b@example.com"}])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from server import main
+
+    monkeypatch.setattr(main.config, "get_notifications_api_key", lambda: "s3cret")
+    sent = []
+
+    def send_bulk(subject, body, recipients):
+        sent.append(recipients)
+        return BulkJob(recipients)
+
+    monkeypatch.setattr(main.EmailServiceMain, "send_bulk", send_bulk)
+    monkeypatch.setattr(main.EmailServiceMain, "bulk_report", lambda job_id: None)
+    return TestClient(main.app), sent
+
+
+def test_bulk_endpoints_need_the_api_key(client):
+    client, sent = client
+    payload = {"subject": "S", "body": "B", "recipients": [{"email": "a@x.com"}]}
+
+    assert client.post("/notifications/bulk", json=payload).status_code == 401
+    wrong = {"X-API-Key": "guess"}
+    assert (
+        client.post("/notifications/bulk", json=payload, headers=wrong).status_code
+        == 401
+    )
+    assert client.get("/notifications/bulk/abc").status_code == 401
+    assert sent == []
+
+    headers = {"X-API-Key": "s3cret"}
+    response = client.post("/notifications/bulk", json=payload, headers=headers)
+    assert response.status_code == 202
+    assert response.json()["total"] == 1
+    assert client.get("/notifications/bulk/abc", headers=headers).status_code == 404
+
+
+def test_bulk_endpoints_are_disabled_without_a_key(client, monkeypatch):
+    from server import main
+
+    client, sent = client
+    monkeypatch.setattr(main.config, "get_notifications_api_key", lambda: "")
+
+    response = client.post(
+        "/notifications/bulk",
+        json={"subject": "S", "body": "B", "recipients": [{"email": "a@x.com"}]},
+        headers={"X-API-Key": ""},
+    )
+    assert response.status_code == 503
+    assert sent == []
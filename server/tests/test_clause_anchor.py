@@ -0,0 +1,88 @@
+import random
+from typing import List
+
+from server.agents.clause_anchor import ClauseAnchorIndex
+from server.agents.clause_diff import clause_key
+
+VOCABULARY = (
+    "tenant landlord shall pay rent deposit premises repair notice term "
+    "month agreement utilities damage keys furniture inspection period"
+).split()
+
+
+def scan(text: str, clauses: List[str]) -> int:
+    # The former PackagerAgent._transform_issues_to_clauses lookup
+    key = clause_key(text)
+    for j, clause in enumerate(clauses):
+        clause = clause_key(clause)
+        if key in clause or clause in key:
+            return j
+    return -1
+
+
+def test_short_quotes_anchor_to_their_clause():
+    index = ClauseAnchorIndex(
+        [
+            "The tenant shall pay rent of 2000 dollars monthly on the first day.",
+            "Landlord repairs the roof.",
+        ]
+    )
+
+    assert index.find("rent of 2000 dollars") == 0
+    assert index.find("Landlord repairs") == 1
+    assert index.find("landlord  REPAIRS the roof.") == 1
+    assert index.find("Landlord repairs the roof. The tenant waters the garden.") == 1
+    assert index.find("Pets are not allowed") == -1
+    assert index.find("   ") == -1
+
+
+def test_reworded_quote_anchors_by_overlap():
+    clauses = [
+        "The deposit is returned within thirty days of the end of the term.",
+        "The tenant shall keep the premises clean and in good repair at all times.",
+    ]
+    index = ClauseAnchorIndex(clauses)
+
+    assert (
+        index.find(
+            "The tenant shall keep the premises clean and in good order at all times."
+        )
+        == 1
+    )
+    assert index.find("Utilities are paid by the landlord every single month.") == -1
+
+
+def test_agrees_with_the_linear_scan():
+    rng = random.Random(7)
+    clauses = []
+    for n in range(300):
+        length = rng.randint(1, 4) if n % 10 == 0 else rng.randint(15, 60)
+        clauses.append(
+            f"({n}) " + " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        )
+    index = ClauseAnchorIndex(clauses)
+
+    # Issues quote a clause whole, in part, a few words of it, or reworded
+    quotes = []
+    for _ in range(1000):
+        words = rng.choice(clauses).split()
+        kind = rng.random()
+        if kind < 0.2:
+            quotes.append(" ".join(words))
+        elif kind < 0.5:
+            start = rng.randrange(max(1, len(words) // 2))
+            quotes.append(" ".join(words[start : start + 10]))
+        elif kind < 0.8:
+            start = rng.randrange(len(words))
+            quotes.append(" ".join(words[start : start + rng.randint(1, 4)]))
+        else:
+            words[rng.randrange(len(words))] = "reworded"
+            quotes.append(" ".join(words))
+
+    hits = 0
+    for quote in quotes:
+        expected = scan(quote, clauses)
+        if expected >= 0:
+            hits += 1
+            assert index.find(quote) == expected, quote
+    assert hits > 700
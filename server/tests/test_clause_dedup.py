@@ -0,0 +1,185 @@
+import pytest
+
+from server.agents.analyser_agent import AnalyserAgent
+from server.agents.clause_dedup import (
+    cluster_clauses,
+    fan_out,
+    guard,
+    jaccard,
+    shingles,
+)
+from server.agents.schema import AnalysisResult, Issue, Summary
+
+SERVICE_CHARGE = (
+    "The tenant shall pay a service charge of {n} pounds per month to the "
+    "landlord for upkeep of the common parts of building {n}."
+)
+
+
+def issue(clause: str, risk: str = "HIGH") -> Issue:
+    return Issue(
+        clause=clause,
+        risk=risk,
+        category="Fees",
+        rationale="r",
+        recommendation="r",
+        reference="r",
+    )
+
+
+def test_shingles_ignore_numbering_case_and_punctuation():
+    clause = "The Tenant shall keep the premises clean and tidy at all times."
+
+    assert shingles(clause) == shingles(f"4.2) {clause.upper()}")
+    assert jaccard(shingles(clause), shingles("Rent is due monthly.")) == 0.0
+
+
+def test_clusters_restated_copies_with_their_first_occurrence():
+    base = [SERVICE_CHARGE.format(n=n) for n in range(50)]
+    copies = [f"{i + 1}. " + clause for i, clause in enumerate(base[:10])]
+
+    clusters = cluster_clauses(base + copies)
+
+    assert len(clusters) == 50
+    for i in range(10):
+        assert clusters[i] == [i, 50 + i]
+    assert all(len(members) == 1 for members in clusters[10:])
+
+
+def test_keeps_clauses_below_the_threshold_apart():
+    a = "The tenant shall not keep any pets in the premises without consent."
+    b = "The landlord shall repair the roof and external walls at its own cost."
+
+    assert cluster_clauses([a, b, a]) == [[0, 2], [1]]
+
+
+def test_fan_out_copies_verdicts_to_every_member_in_clause_order():
+    clauses = [
+        "1. Pay rent monthly in advance.",
+        "No pets.",
+        "2. Pay rent monthly in advance.",
+    ]
+    clusters = [[0, 2], [1]]
+    verdicts = [issue("No pets.", "MEDIUM"), issue("Pay rent monthly in advance.")]
+
+    issues = fan_out(clauses, clusters, verdicts)
+
+    assert [(i.clause, i.risk) for i in issues] == [
+        ("Pay rent monthly in advance.", "HIGH"),
+        ("No pets.", "MEDIUM"),
+        ("2. Pay rent monthly in advance.", "HIGH"),
+    ]
+
+
+@pytest.fixture
+def analyser(monkeypatch):
+    agent = AnalyserAgent()
+    monkeypatch.setattr(agent.config, "get_clause_dedup", lambda: True)
+    monkeypatch.setattr(agent.config, "get_clause_dedup_threshold", lambda: 0.85)
+    return agent
+
+
+def test_summary_counts_clauses_after_fan_out(analyser, monkeypatch):
+    clauses = [SERVICE_CHARGE.format(n=n) for n in range(3)]
+    clauses += [f"{i + 1}. {clause}" for i, clause in enumerate(clauses)]
+    clauses.append("The tenant may keep a small pet with the landlord's consent.")
+
+    def analyse_unique(unique, deadline=None):
+        # Two findings on the first clause, nothing on the others
+        found = [issue(unique[0]), issue(unique[0], "MEDIUM")]
+        return AnalysisResult(
+            summary=Summary(high_risk=1, medium_risk=1, ok=0, total=2),
+            issues=found,
+            buckets=["Fees"],
+        )
+
+    monkeypatch.setattr(analyser, "_analyze_unique", analyse_unique)
+
+    summary = analyser._analyze_clauses(clauses).summary
+
+    # The first clause and its restated copy are HIGH; the rest have no issue
+    assert summary == Summary(high_risk=2, medium_risk=0, ok=5, total=7)
+
+
+def test_summary_counts_reused_and_fresh_clauses(analyser, monkeypatch):
+    clauses = [
+        "The tenant shall pay rent of 2000 dollars on the first day of each month.",
+        "The landlord shall repair the roof and external walls at its own cost.",
+        "The tenant shall not sublet the premises without written consent.",
+    ]
+    known = {0: [issue(clauses[0], "OK")]}
+
+    def analyse(pending, deadline=None):
+        return AnalysisResult(
+            summary=Summary(high_risk=0, medium_risk=1, ok=0, total=1),
+            issues=[issue(pending[1], "MEDIUM")],
+            buckets=["Subletting"],
+        )
+
+    monkeypatch.setattr(analyser, "_analyze_clauses", analyse)
+
+    summary = analyser._analyze_reusing(clauses, known).summary
+
+    assert summary == Summary(high_risk=0, medium_risk=1, ok=2, total=3)
+
+
+LATE_INTEREST = (
+    "If the tenant fails to pay any rent or other sum due under this agreement "
+    "within fourteen days of the date on which it falls due, whether formally "
+    "demanded or not, the tenant shall pay interest on the outstanding amount "
+    "at the rate of {rate} per cent per annum calculated on a daily basis from "
+    "the date on which payment was due until the date on which payment is "
+    "received by the landlord, both before and after any judgment, and the "
+    "landlord may recover such interest as if it were rent in arrear, together "
+    "with all reasonable costs and expenses incurred by the landlord in "
+    "recovering or attempting to recover the outstanding amount from the tenant."
+)
+
+
+def test_guard_picks_out_numbers_amounts_and_negations():
+    assert guard("3.1) The tenant shall pay $2,000 within 14 days.") == (
+        "$",
+        "2,000",
+        "14",
+    )
+    assert guard("The tenant can't sublet without consent.") == ("not", "without")
+
+
+def test_keeps_clauses_with_different_rates_apart():
+    ten = LATE_INTEREST.format(rate="ten")
+    thirty = LATE_INTEREST.format(rate="thirty")
+    assert jaccard(shingles(ten), shingles(thirty)) >= 0.85
+
+    assert cluster_clauses([ten, thirty]) == [[0], [1]]
+
+
+def test_keeps_clauses_with_different_amounts_apart():
+    clause = LATE_INTEREST.replace("{rate} per cent", "{rate} dollars")
+
+    assert cluster_clauses([clause.format(rate=500), clause.format(rate=5000)]) == [
+        [0],
+        [1],
+    ]
+
+
+def test_keeps_a_clause_and_its_negation_apart():
+    shall = LATE_INTEREST.format(rate="ten")
+    shall_not = shall.replace("the tenant shall pay", "the tenant shall not pay")
+    assert jaccard(shingles(shall), shingles(shall_not)) >= 0.85
+
+    assert cluster_clauses([shall, shall_not]) == [[0], [1]]
+
+
+def test_members_must_match_the_first_clause_of_their_cluster():
+    words = LATE_INTEREST.format(rate="ten").split()
+    # Each step rewrites a different stretch, so a~b and b~c but not a~c
+    a = " ".join(words)
+    b = " ".join(words[:-10] + ["landlord"] * 10)
+    c = " ".join(["tenant"] * 10 + words[10:-10] + ["landlord"] * 10)
+    assert jaccard(shingles(a), shingles(b)) >= 0.85
+    assert jaccard(shingles(b), shingles(c)) >= 0.85
+    assert jaccard(shingles(a), shingles(c)) < 0.85
+
+    clusters = cluster_clauses([a, b, c])
+
+    assert clusters == [[0, 1], [2]]
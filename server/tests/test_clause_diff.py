@@ -0,0 +1,69 @@
+from server.agents.clause_diff import clause_key, diff_clauses
+
+RENT = "The tenant shall pay rent monthly in advance."
+PETS = "No pets may be kept in the premises."
+REPAIRS = "The landlord shall repair the roof and external walls."
+DEPOSIT = "A deposit of two months' rent is payable on signing."
+
+
+def test_clause_key_ignores_case_and_whitespace():
+    assert (
+        clause_key("  The Tenant\n shall   PAY rent. ") == "the tenant shall pay rent."
+    )
+
+
+def test_identical_versions_are_all_unchanged():
+    clauses = [RENT, PETS, REPAIRS]
+
+    diff = diff_clauses(clauses, [c.upper() for c in clauses])
+
+    assert diff == {
+        "unchanged": {0: 0, 1: 1, 2: 2},
+        "changed": [],
+        "added": [],
+        "removed": [],
+    }
+
+
+def test_moved_clause_is_unchanged():
+    diff = diff_clauses([RENT, PETS, REPAIRS], [PETS, REPAIRS, RENT])
+
+    assert diff["unchanged"] == {0: 1, 1: 2, 2: 0}
+    assert diff["changed"] == diff["added"] == diff["removed"] == []
+
+
+def test_edit_in_place_is_changed():
+    edited = RENT.replace("monthly", "quarterly")
+
+    diff = diff_clauses([RENT, PETS, REPAIRS], [edited, PETS, REPAIRS])
+
+    assert diff["unchanged"] == {1: 1, 2: 2}
+    assert diff["changed"] == [(0, 0)]
+
+
+def test_added_and_removed_clauses():
+    diff = diff_clauses([RENT, PETS, REPAIRS], [RENT, REPAIRS, DEPOSIT])
+
+    assert diff["unchanged"] == {0: 0, 1: 2}
+    assert diff["changed"] == []
+    assert diff["added"] == [2]
+    assert diff["removed"] == [1]
+
+
+def test_moved_and_edited_clause_is_paired_by_similarity():
+    edited = PETS.replace("No pets", "No dogs or cats")
+
+    diff = diff_clauses([PETS, RENT, REPAIRS], [RENT, REPAIRS, DEPOSIT, edited])
+
+    assert diff["unchanged"] == {0: 1, 1: 2}
+    assert diff["changed"] == [(0, 3)]
+    assert diff["added"] == [2]
+    assert diff["removed"] == []
+
+
+def test_dissimilar_clauses_are_not_paired():
+    diff = diff_clauses([PETS, RENT], [RENT, DEPOSIT], similarity=0.9)
+
+    assert diff["changed"] == []
+    assert diff["added"] == [1]
+    assert diff["removed"] == [0]
@@ -0,0 +1,76 @@
+import pytest
+
+from server.repository.document_versions import DocumentVersions
+
+
+@pytest.fixture
+def versions(tmp_path):
+    return DocumentVersions(tmp_path / "versions")
+
+
+def test_add_numbers_versions_and_skips_repeats(versions):
+    assert versions.add("lease-1", "h1", ["a"], {"summary": {}}) == 1
+    assert versions.add("lease-1", "h1", ["a"], {"summary": {}}) == 1
+    assert versions.add("lease-1", "h2", ["a", "b"], {"summary": {}}, "v3") == 2
+
+    history = versions.history("lease-1")
+    assert [v["version"] for v in history] == [1, 2]
+    assert versions.latest("lease-1")["clauses"] == ["a", "b"]
+    assert versions.latest("lease-1")["registry_version"] == "v3"
+
+
+def test_unknown_document_has_no_history(versions):
+    assert versions.history("other") == []
+    assert versions.latest("other") is None
+
+
+@pytest.mark.parametrize("document_id", ["../escape", "a/b", "", "x" * 129])
+def test_rejects_unsafe_document_ids(versions, document_id):
+    with pytest.raises(ValueError):
+        versions.history(document_id)
+    with pytest.raises(ValueError):
+        versions.add(document_id, "h", [], {})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from server import main
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the pipeline should not run")
+
+    monkeypatch.setattr(main, "_run_pipeline_coalesced", fail)
+    monkeypatch.setattr(main.OCRService, "pdf_to_markdown", fail)
+    return TestClient(main.app)
+
+
+def test_analyze_rejects_a_bad_document_id(client):
+    response = client.post(
+        "/analyze",
+        json={
+            "name": "Ann",
+            "email": "ann@example.com",
+            "markdown": "lease",
+            "document_id": "../lease",
+        },
+    )
+
+    assert response.status_code == 400
+    assert "document_id" in response.json()["detail"]
+
+
+def test_convert_and_analyze_rejects_a_bad_document_id(client):
+    response = client.post(
+        "/convert-and-analyze",
+        files={"file": ("lease.pdf", b"%PDF-1.4", "application/pdf")},
+        data={"name": "Ann", "email": "ann@example.com", "document_id": "a/b"},
+    )
+
+    assert response.status_code == 400
+    assert "document_id" in response.json()["detail"]
+
+
+def test_versions_endpoint_rejects_a_bad_document_id(client):
+    assert client.get("/documents/bad%20id/versions").status_code == 400
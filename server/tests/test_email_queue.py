@@ -0,0 +1,153 @@
+import json
+import smtplib
+import threading
+from email.mime.text import MIMEText
+
+import pytest
+
+from server.service.email_queue import EmailQueue
+from server.service.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """
+    Stand-in for smtplib.SMTP. replies maps a recipient to the exception
+    raised the first time a message to it is sent.
+    """
+
+    def __init__(self, server, host, port, timeout=None):
+        self.server = server
+        self.closed = False
+        server.connections.append(self)
+
+    def starttls(self):
+        pass
+
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def has_extn(self, name):
+        return False
+
+    def noop(self):
+        return (250, b"OK")
+
+    def send_message(self, message):
+        assert not self.closed, "message sent on a closed connection"
+        with self.server.lock:
+            error = self.server.replies.pop(message["To"], None)
+        if error is not None:
+            if error.smtp_code == 421:
+                self.closed = True
+            raise error
+        with self.server.lock:
+            self.server.delivered.append((message["To"], self))
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeServer:
+    def __init__(self, replies=None):
+        self.replies = dict(replies or {})
+        self.connections = []
+        self.delivered = []
+        self.lock = threading.Lock()
+
+    def factory(self, host, port, timeout=None):
+        return FakeSMTP(self, host, port, timeout)
+
+
+def message(n: int) -> MIMEText:
+    msg = MIMEText(f"Message {n}")
+    msg["From"] = "tenant-analyzer@example.com"
+    msg["To"] = f"tenant{n}@example.com"
+    msg["Subject"] = "Test"
+    return msg
+
+
+def make_queue(server, tmp_path, **kwargs) -> EmailQueue:
+    pool = SMTPConnectionPool(
+        "smtp.test", 25, size=1, starttls=False, factory=server.factory
+    )
+    options = {"workers": 1, "base_delay": 0.01, "max_delay": 0.05}
+    options.update(kwargs)
+    return EmailQueue(pool, dead_letter_path=tmp_path / "dead.jsonl", **options)
+
+
+@pytest.fixture
+def results():
+    return []
+
+
+def send(outbound, count, results):
+    for n in range(count):
+        outbound.enqueue(message(n), lambda *result: results.append(result))
+    assert outbound.drain(timeout=5)
+    outbound.stop()
+
+
+def test_sends_batches_over_one_pooled_connection(tmp_path, results):
+    server = FakeServer()
+    outbound = make_queue(server, tmp_path)
+
+    send(outbound, 30, results)
+
+    assert len(server.delivered) == 30
+    assert len(server.connections) == 1
+    assert outbound.metrics()["sent"] == 30
+    assert all(status == "sent" for _, status, _ in results)
+
+
+def test_discards_the_connection_after_a_421_reply(tmp_path, results):
+    closing = smtplib.SMTPResponseException(421, b"Service closing channel")
+    server = FakeServer({"tenant3@example.com": closing})
+    outbound = make_queue(server, tmp_path)
+
+    send(outbound, 10, results)
+
+    # Everything is delivered, and nothing went over the closed connection
+    assert sorted(to for to, _ in server.delivered) == sorted(
+        f"tenant{n}@example.com" for n in range(10)
+    )
+    assert len(server.connections) == 2
+    assert server.connections[0].closed
+    metrics = outbound.metrics()
+    assert (metrics["sent"], metrics["retried"], metrics["dead"]) == (10, 1, 0)
+
+
+def test_permanent_failure_is_dead_lettered_without_failing_the_batch(
+    tmp_path, results
+):
+    refused = smtplib.SMTPResponseException(550, b"Mailbox unavailable")
+    server = FakeServer({"tenant2@example.com": refused})
+    outbound = make_queue(server, tmp_path)
+
+    send(outbound, 5, results)
+
+    assert len(server.delivered) == 4
+    dead = [json.loads(line) for line in (tmp_path / "dead.jsonl").open()]
+    assert [(record["to"], record["attempts"]) for record in dead] == [
+        ("tenant2@example.com", 1)
+    ]
+    assert sorted(status for _, status, _ in results) == ["dead"] + ["sent"] * 4
+
+
+def test_gives_up_after_max_retries(tmp_path, results):
+    server = FakeServer()
+    outbound = make_queue(server, tmp_path, max_retries=2)
+
+    def unreachable(host, port, timeout=None):
+        raise ConnectionRefusedError("connection refused")
+
+    outbound.pool.factory = unreachable
+
+    send(outbound, 1, results)
+
+    dead = json.loads((tmp_path / "dead.jsonl").read_text())
+    assert dead["attempts"] == 3
+    assert "ConnectionRefusedError" in dead["error"]
+    assert results[0][1] == "dead"
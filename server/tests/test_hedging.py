@@ -0,0 +1,200 @@
+import threading
+import time
+
+import pytest
+
+from server.util.deadline import Deadline, DeadlineExceeded
+from server.util.hedging import LatencyTracker, hedged_call
+from server.util.rate_limiter import CallCancelled, RateLimiter, call_cancelled
+
+
+class Unavailable(Exception):
+    code = 503
+
+
+def warmed_tracker(key: str, seconds: float = 0.02) -> LatencyTracker:
+    """Tracker whose p95 for key is seconds, so hedges fire almost at once."""
+    tracker = LatencyTracker()
+    for _ in range(20):
+        tracker.record_primary(key, seconds)
+    return tracker
+
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_returns_the_result_without_hedging():
+    tracker = LatencyTracker()
+
+    assert hedged_call(lambda: "ok", "intake", tracker=tracker) == "ok"
+    assert tracker.metrics()["intake"]["samples"] == 1
+
+
+def test_hedge_answers_when_the_primary_is_slow():
+    tracker = warmed_tracker("analyse")
+    release = threading.Event()
+    calls = []
+
+    def model():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(2)
+            return "slow"
+        return "fast"
+
+    try:
+        assert hedged_call(model, "analyse", hedge=True, tracker=tracker) == "fast"
+    finally:
+        release.set()
+    counters = tracker.metrics()["analyse"]
+    assert (counters["hedged"], counters["hedge_wins"]) == (1, 1)
+
+
+def test_losing_hedge_leaves_the_limiter_queue():
+    tracker = warmed_tracker("analyse")
+    # One request a minute: the hedge has to queue behind the primary
+    limiter = RateLimiter(rpm=1, tpm=10_000)
+    attempts = []
+
+    def model():
+        attempts.append(1)
+        time.sleep(0.3)
+        return "primary"
+
+    result = hedged_call(model, "analyse", hedge=True, tracker=tracker, limiter=limiter)
+
+    assert result == "primary"
+    assert tracker.metrics()["analyse"]["hedged"] == 1
+    # The loser gave up its place without taking a request slot
+    assert wait_until(lambda: limiter.metrics()["lanes"]["interactive"]["waiting"] == 0)
+    assert limiter.metrics()["calls"] == 1
+    assert len(attempts) == 1
+
+
+class QueueingLimiter(RateLimiter):
+    """Limiter whose every slot takes queue_seconds to come free."""
+
+    def __init__(self, queue_seconds: float):
+        super().__init__(rpm=600, tpm=100_000)
+        self.queue_seconds = queue_seconds
+        self.slots = 0
+
+    def acquire(self, tokens: int = 1, priority: str = "interactive") -> float:
+        self.slots += 1
+        time.sleep(self.queue_seconds)
+        return super().acquire(tokens, priority)
+
+
+def test_time_queued_for_quota_does_not_trigger_a_hedge():
+    tracker = warmed_tracker("analyse")
+    limiter = QueueingLimiter(0.3)
+
+    result = hedged_call(
+        lambda: "ok", "analyse", hedge=True, tracker=tracker, limiter=limiter
+    )
+
+    assert result == "ok"
+    assert limiter.slots == 1
+    assert "hedged" not in tracker.metrics()["analyse"]
+    # Queue delay is recorded on its own, not as model latency
+    assert wait_until(lambda: tracker.samples("analyse") == 21)
+    assert tracker.metrics()["analyse"]["p95_queue"] >= 0.3
+    assert tracker.p95("analyse") < 0.1
+
+
+def test_hedge_takes_its_own_slot():
+    tracker = warmed_tracker("analyse")
+    limiter = QueueingLimiter(0)
+    release = threading.Event()
+    calls = []
+
+    def model():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(2)
+            return "slow"
+        return "fast"
+
+    try:
+        result = hedged_call(
+            model, "analyse", hedge=True, tracker=tracker, limiter=limiter
+        )
+    finally:
+        release.set()
+
+    assert result == "fast"
+    assert limiter.slots == 2
+    assert limiter.metrics()["calls"] == 2
+
+
+def test_cancelled_call_is_not_retried():
+    limiter = RateLimiter(rpm=60, tpm=10_000, base_delay=0.01)
+    cancelled = threading.Event()
+    calls = []
+
+    def model():
+        calls.append(1)
+        cancelled.set()
+        raise Unavailable("503 UNAVAILABLE")
+
+    token = call_cancelled.set(cancelled)
+    try:
+        with pytest.raises(Unavailable):
+            limiter.call(model)
+    finally:
+        call_cancelled.reset(token)
+    assert len(calls) == 1
+
+
+def test_queued_call_raises_once_cancelled():
+    limiter = RateLimiter(rpm=1, tpm=10_000)
+    limiter.acquire()
+    cancelled = threading.Event()
+    cancelled.set()
+
+    token = call_cancelled.set(cancelled)
+    try:
+        with pytest.raises(CallCancelled):
+            limiter.acquire()
+    finally:
+        call_cancelled.reset(token)
+    assert limiter.metrics()["lanes"]["interactive"]["waiting"] == 0
+
+
+def test_deadline_abandons_the_call():
+    tracker = LatencyTracker()
+    release = threading.Event()
+
+    with pytest.raises(DeadlineExceeded):
+        hedged_call(
+            lambda: release.wait(2), "planner", deadline=Deadline(0.05), tracker=tracker
+        )
+    release.set()
+    # The abandoned attempt still reports its latency once it returns
+    assert wait_until(lambda: "planner" in tracker.metrics())
+    assert tracker.metrics()["planner"]["deadline_exceeded"] == 1
+
+
+def test_expired_deadline_fails_before_calling():
+    calls = []
+
+    with pytest.raises(DeadlineExceeded):
+        hedged_call(lambda: calls.append(1), "intake", deadline=Deadline(0))
+    assert calls == []
+
+
+def test_deadline_reports_remaining_time():
+    now = [100.0]
+    deadline = Deadline(10, clock=lambda: now[0])
+
+    assert deadline.remaining() == 10
+    now[0] += 4
+    assert deadline.remaining() == pytest.approx(6)
+    now[0] += 7
+    assert deadline.expired and deadline.remaining() == 0
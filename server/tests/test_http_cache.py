@@ -0,0 +1,117 @@
+import os
+from email.utils import formatdate
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from server.util.http_cache import etag_for, file_response, is_not_modified
+from server.util.precompress import precompress, variant_path
+
+ETAG = '"1a-2b"'
+MODIFIED = 1_700_000_000.0
+
+
+@pytest.mark.parametrize(
+    "header",
+    [ETAG, f"W/{ETAG}", f'"other", {ETAG}', f'"other", W/{ETAG}', "*"],
+)
+def test_if_none_match_matches_strong_weak_and_any_tags(header):
+    assert is_not_modified({"if-none-match": header}, ETAG, MODIFIED)
+
+
+def test_weak_etag_matches_its_strong_form():
+    assert is_not_modified({"if-none-match": ETAG}, f"W/{ETAG}", MODIFIED)
+
+
+def test_if_none_match_decides_over_if_modified_since():
+    headers = {
+        "if-none-match": '"other"',
+        "if-modified-since": formatdate(MODIFIED + 60, usegmt=True),
+    }
+
+    assert not is_not_modified(headers, ETAG, MODIFIED)
+
+
+def test_if_modified_since_is_used_without_if_none_match():
+    def since(ts):
+        return {"if-modified-since": formatdate(ts, usegmt=True)}
+
+    # HTTP dates drop the fraction of a second
+    assert is_not_modified(since(MODIFIED), ETAG, MODIFIED + 0.5)
+    assert is_not_modified(since(MODIFIED + 60), ETAG, MODIFIED)
+    assert not is_not_modified(since(MODIFIED - 60), ETAG, MODIFIED)
+    assert not is_not_modified({"if-modified-since": "yesterday"}, ETAG, MODIFIED)
+    assert not is_not_modified({}, ETAG, MODIFIED)
+
+
+@pytest.fixture
+def served(tmp_path):
+    path = tmp_path / "frontend_package.json"
+    path.write_bytes(b'{"issues": [' + b'{"risk": "HIGH"},' * 400 + b"{}]}")
+    app = FastAPI()
+
+    @app.get("/file")
+    def get_file(request: Request):
+        return file_response(request, path, os.stat(path), "application/json")
+
+    return TestClient(app), path
+
+
+def test_304_carries_validators_and_vary(served):
+    client, path = served
+    first = client.get("/file", headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    assert first.headers["etag"] == etag_for(os.stat(path))
+
+    again = client.get(
+        "/file",
+        headers={"If-None-Match": first.headers["etag"], "Accept-Encoding": "identity"},
+    )
+
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == first.headers["etag"]
+    assert again.headers["last-modified"] == first.headers["last-modified"]
+    assert again.headers["cache-control"] == "no-cache"
+    assert again.headers["vary"] == "Accept-Encoding"
+
+
+def test_serves_the_precompressed_variant_with_its_own_etag(served):
+    client, path = served
+    precompress(path)
+    gz = variant_path(path, "gzip")
+
+    response = client.get("/file", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == etag_for(os.stat(gz))
+    assert response.headers["etag"] != etag_for(os.stat(path))
+    assert response.content == path.read_bytes()
+
+
+def test_range_on_a_precompressed_variant_covers_the_compressed_bytes(served):
+    client, path = served
+    precompress(path)
+    gz = variant_path(path, "gzip").read_bytes()
+
+    response = client.get(
+        "/file", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-9"}
+    )
+
+    assert response.status_code == 206
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-range"] == f"bytes 0-9/{len(gz)}"
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_stale_variant_is_not_served(served):
+    client, path = served
+    precompress(path)
+    path.write_bytes(path.read_bytes() + b" ")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+
+    response = client.get("/file", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.content == path.read_bytes()
@@ -0,0 +1,86 @@
+import pytest
+
+from server.agents.intake_agent import IntakeAgent, extract_date, normalize_date
+from server.util.serialization import read_json
+
+LEASE = """# ROOM RENTAL AGREEMENT
+
+The tenancy commences on 01/01/2026 for a term of twelve months.
+
+This Agreement is made on the 15th day of March, 2025 between the Landlord and the Tenant.
+
+1. The Tenant shall pay a monthly rent of S$2,000 on the first day of each month.
+2. The Tenant shall pay a security deposit of S$4,000 before moving in.
+"""
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("2025-12-27", "2025-12-27"),
+        ("27/12/2025", "2025-12-27"),
+        ("27.12.2025", "2025-12-27"),
+        ("27th December 2025", "2025-12-27"),
+        ("27th day of December, 2025", "2025-12-27"),
+        ("December 27, 2025", "2025-12-27"),
+        ("Dec 3rd 2025", "2025-12-03"),
+        ("31/02/2025", ""),
+        (" ", ""),
+    ],
+)
+def test_normalize_date(text, expected):
+    assert normalize_date(text) == expected
+
+
+def test_extract_date_prefers_the_agreement_date():
+    assert extract_date(LEASE) == "2025-03-15"
+
+
+def test_extract_date_falls_back_to_the_first_date():
+    assert extract_date("Rent is due from 02/02/2024.") == "2024-02-02"
+    assert extract_date("No dates in here.") == ""
+
+
+def test_stream_clauses_returns_the_record_with_the_agreement_date(
+    tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "agents" / "outputs").mkdir(parents=True)
+    agent = IntakeAgent()
+    record = {}
+
+    batches = list(agent.stream_clauses(LEASE, batch_size=2, record=record))
+
+    clauses = [clause for batch in batches for clause in batch]
+    assert clauses == [
+        "The tenancy commences on 01/01/2026 for a term of twelve months.",
+        "This Agreement is made on the 15th day of March, 2025 between the "
+        "Landlord and the Tenant.",
+        "The Tenant shall pay a monthly rent of S$2,000 on the first day of each month.",
+        "The Tenant shall pay a security deposit of S$4,000 before moving in.",
+    ]
+    content = record["summary"]["content"]
+    assert content["date"] == "2025-03-15"
+    assert content["clauses"] == clauses
+    assert read_json(tmp_path / "agents" / "outputs" / "intake_agent.json") == record
+
+
+def test_stream_clauses_leaves_the_shared_output_alone_unless_saving(
+    tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "agents" / "outputs").mkdir(parents=True)
+    agent = IntakeAgent()
+    first, second = {}, {}
+
+    list(agent.stream_clauses(LEASE, record=first, save=False))
+    list(
+        agent.stream_clauses(
+            "# Other lease\n\nRent is S$900.", record=second, save=False
+        )
+    )
+
+    assert first["summary"]["content"]["date"] == "2025-03-15"
+    assert second["summary"]["content"]["title"] == "Other lease"
+    assert first["summary"]["id"] != second["summary"]["id"]
+    assert not (tmp_path / "agents" / "outputs" / "intake_agent.json").exists()
@@ -0,0 +1,139 @@
+import json
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from server.agents.json_repair import (
+    PartialOutputError,
+    parse_lenient,
+    recover,
+    repair_json,
+    salvage,
+)
+from server.agents.schema import AnalysisResult
+
+
+class Clause(BaseModel):
+    clause: str
+    risk: str
+
+
+class Report(BaseModel):
+    title: str
+    issues: List[Clause]
+
+
+def repaired(text: str):
+    return json.loads(repair_json(text))
+
+
+def test_parses_fenced_output_with_python_literals_and_trailing_commas():
+    text = 'Here you go:\n```json\n{"ok": True, "skip": None, "items": [1, 2,],}\n```'
+
+    assert parse_lenient(text) == {"ok": True, "skip": None, "items": [1, 2]}
+
+
+def test_closes_output_truncated_mid_string():
+    assert repaired('{"title": "Lease", "issues": [{"clause": "Tenant pa') == {
+        "title": "Lease",
+        "issues": [{"clause": "Tenant pa"}],
+    }
+    assert repaired('{"note": "ends on an escape \\') == {"note": "ends on an escape "}
+
+
+def test_closes_output_truncated_mid_array():
+    assert repaired('{"issues": [{"clause": "a", "risk": "OK"}, {"clause": "b",') == {
+        "issues": [{"clause": "a", "risk": "OK"}, {"clause": "b"}]
+    }
+    assert repaired('{"buckets": ["Fees", "Repairs"') == {
+        "buckets": ["Fees", "Repairs"]
+    }
+
+
+def test_drops_a_key_truncated_before_its_value():
+    assert repaired('{"title": "Lease", "iss') == {"title": "Lease"}
+    assert repaired('{"title": "Lease", "issues":') == {"title": "Lease"}
+    assert repaired('{"title": "Lease", "issues": [{"clause": "a", "ri') == {
+        "title": "Lease",
+        "issues": [{"clause": "a"}],
+    }
+
+
+def test_smart_quotes_inside_values_are_text():
+    text = (
+        '{"issues": [{"clause": "Tenant must pay “reasonable” fees", '
+        '"risk": "HIGH"}, {"clause": "x'
+    )
+
+    assert repaired(text) == {
+        "issues": [
+            {"clause": "Tenant must pay “reasonable” fees", "risk": "HIGH"},
+            {"clause": "x"},
+        ]
+    }
+
+
+def test_smart_quotes_as_delimiters_are_straightened():
+    assert repaired("{“clause”: “No pets”}") == {"clause": "No pets"}
+    # A smart-quoted string may be closed by a straight quote
+    assert repaired('{“risk": "OK"}') == {"risk": "OK"}
+
+
+def test_non_ascii_bare_words_fail_cleanly():
+    # Not valid JSON, but repair must not crash on it
+    with pytest.raises(json.JSONDecodeError):
+        repaired('{"a": é}')
+    with pytest.raises(json.JSONDecodeError):
+        repaired('{"a": None, "b": Ñandú}')
+    assert repaired('{"a": None, "b": "Ñandú"}') == {"a": None, "b": "Ñandú"}
+
+    with pytest.raises(PartialOutputError) as error:
+        recover(Report, SimpleNamespace(content='{"title": é}'))
+    assert error.value.partial == {}
+
+
+def test_recover_returns_the_model_when_repair_is_enough():
+    raw = SimpleNamespace(
+        content='```json\n{"title": "Lease", "issues": [{"clause": "a", "risk": "OK"},]}'
+    )
+
+    assert recover(Report, raw) == Report(
+        title="Lease", issues=[Clause(clause="a", risk="OK")]
+    )
+
+
+def test_recover_prefers_tool_call_arguments():
+    raw = SimpleNamespace(
+        tool_calls=[{"args": {"title": "Lease", "issues": []}}], content="ignored"
+    )
+
+    assert recover(Report, raw) == Report(title="Lease", issues=[])
+
+
+def test_recover_salvages_valid_items_of_a_truncated_output():
+    raw = SimpleNamespace(
+        content='{"summary": {"high_risk": 1, "medium_risk": 0, "ok": 0, "total": 1}, '
+        '"issues": [{"clause": "No pets.", "risk": "HIGH", "category": "Pets", '
+        '"rationale": "r", "recommendation": "r", "reference": "r"}, '
+        '{"clause": "Rent is due mon'
+    )
+
+    with pytest.raises(PartialOutputError) as error:
+        recover(AnalysisResult, raw)
+
+    partial = error.value.partial
+    assert error.value.missing == ["buckets"]
+    assert partial["summary"].total == 1
+    assert [issue.clause for issue in partial["issues"]] == ["No pets."]
+
+
+def test_salvage_keeps_valid_fields_and_items():
+    partial, missing = salvage(
+        Report, {"issues": [{"clause": "a", "risk": "OK"}, {"clause": "b"}]}
+    )
+
+    assert partial == {"issues": [Clause(clause="a", risk="OK")]}
+    assert missing == ["title"]
+    assert salvage(Report, ["not", "a", "dict"]) == ({}, ["title", "issues"])
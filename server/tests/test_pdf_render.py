@@ -0,0 +1,120 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+
+from server.agents import pdf_render
+from server.util.config import Config
+
+
+def echo(path: str, text: str) -> str:
+    Path(path).write_text(text)
+    return path
+
+
+def fail(path: str) -> str:
+    raise ValueError("layout failed")
+
+
+class BrokenPool:
+    def submit(self, fn, *args):
+        raise BrokenProcessPool("worker died")
+
+
+def test_submit_renders_inline_without_a_pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_render, "get_pdf_pool", lambda: None)
+    target = tmp_path / "out.txt"
+
+    future = pdf_render.submit(echo, str(target), "hello")
+
+    assert future.done()
+    assert future.result() == str(target)
+    assert target.read_text() == "hello"
+
+
+def test_submit_falls_back_to_inline_when_the_pool_is_broken(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_render, "get_pdf_pool", lambda: BrokenPool())
+    target = tmp_path / "out.txt"
+
+    assert pdf_render.submit(echo, str(target), "hi").result() == str(target)
+
+
+def test_inline_errors_surface_through_the_future(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_render, "get_pdf_pool", lambda: None)
+
+    future = pdf_render.submit(fail, str(tmp_path / "out.pdf"))
+
+    with pytest.raises(ValueError, match="layout failed"):
+        future.result()
+
+
+def test_write_falls_back_to_a_unique_name_when_locked(monkeypatch, tmp_path):
+    target = tmp_path / "summary.pdf"
+    original = os.replace
+
+    def replace(src, dst):
+        if Path(dst) == target:
+            raise PermissionError("file is open in a viewer")
+        return original(src, dst)
+
+    monkeypatch.setattr(pdf_render.os, "replace", replace)
+
+    written = Path(pdf_render._write(str(target), b"%PDF-1.4"))
+
+    assert written != target and written.parent == tmp_path
+    assert written.name.startswith("summary_") and written.suffix == ".pdf"
+    assert written.read_bytes() == b"%PDF-1.4"
+    assert [p.name for p in tmp_path.iterdir()] == [written.name]
+
+
+def test_write_replaces_a_hard_linked_path_instead_of_rewriting_it(tmp_path):
+    blob = tmp_path / "blob"
+    blob.write_bytes(b"%PDF-old")
+    target = tmp_path / "summary.pdf"
+    os.link(blob, target)
+
+    pdf_render._write(str(target), b"%PDF-new")
+
+    assert target.read_bytes() == b"%PDF-new"
+    assert blob.read_bytes() == b"%PDF-old"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["blob", "summary.pdf"]
+
+
+def test_pool_is_disabled_by_zero_workers(monkeypatch):
+    monkeypatch.setattr(Config, "PDF_WORKERS", 0)
+    pdf_render.get_pdf_pool.cache_clear()
+    try:
+        assert pdf_render.get_pdf_pool() is None
+    finally:
+        pdf_render.get_pdf_pool.cache_clear()
+
+
+def test_renders_summary_and_planner_reports(tmp_path):
+    pytest.importorskip("reportlab")
+    issues = [
+        {
+            "category": "Deposit",
+            "risk": "HIGH",
+            "clause": "The deposit is non-refundable.",
+            "rationale": "Deposits must be returned less lawful deductions.",
+            "recommendation": "Make the deposit refundable.",
+        }
+    ]
+
+    summary = pdf_render.render_summary_pdf(
+        str(tmp_path / "summary.pdf"),
+        "Rental Agreement Summary",
+        "2025-01-01",
+        {"high_risk": 1, "medium_risk": 0, "ok": 3, "total": 4},
+        issues,
+    )
+    planner = pdf_render.render_planner_pdf(
+        str(tmp_path / "planner.pdf"),
+        "Next steps",
+        "Hello,\n\nPlease review the deposit clause.",
+        ["Make the deposit refundable."],
+    )
+
+    for path in (summary, planner):
+        assert Path(path).read_bytes().startswith(b"%PDF")
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from server import main
+from server.util.deadline import Deadline, DeadlineExceeded
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Replace the pipeline with a slow fake that records its options."""
+    calls = []
+
+    def fake_pipeline(document, **options):
+        calls.append(options)
+        time.sleep(0.2)
+        return document, threading.get_ident()
+
+    monkeypatch.setattr(main, "_run_pipeline", fake_pipeline)
+    return calls
+
+
+def gather(*requests):
+    async def run():
+        return await asyncio.gather(
+            *(main._run_pipeline_coalesced(doc, **options) for doc, options in requests)
+        )
+
+    return asyncio.run(run())
+
+
+def test_identical_requests_share_one_run(runs):
+    first, second = gather(("lease", {}), ("lease", {}))
+
+    assert first == second
+    assert len(runs) == 1
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"document_id": "unit-4b"},
+        {"pipelined": True},
+        {"stream_llm": True},
+        {"force": True},
+    ],
+)
+def test_requests_with_other_options_run_separately(runs, options):
+    gather(("lease", {}), ("lease", options))
+
+    assert len(runs) == 2
+    assert {**runs[0], **options} in runs
+
+
+def test_forced_requests_never_share(runs):
+    gather(("lease", {"force": True}), ("lease", {"force": True}))
+
+    assert len(runs) == 2
+
+
+def test_joiner_stops_waiting_at_its_own_deadline(runs):
+    async def run():
+        leader = asyncio.ensure_future(main._run_pipeline_coalesced("lease"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(DeadlineExceeded):
+            await main._run_pipeline_coalesced("lease", deadline=Deadline(0.05))
+        # The leader's run is not cancelled by the joiner giving up
+        return await leader
+
+    assert asyncio.run(run())[0] == "lease"
+    assert len(runs) == 1
@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from server.util import precompress
+from server.util.precompress import (
+    accepted_encodings,
+    is_variant,
+    precompress_later,
+    remove_variants,
+    select_variant,
+    variant_path,
+)
+
+
+@pytest.fixture
+def package(tmp_path):
+    path = tmp_path / "frontend_package.json"
+    clauses = [
+        {"id": f"clause_{i}", "risk": "HIGH", "description": "The tenant pays " * 20}
+        for i in range(50)
+    ]
+    path.write_text(json.dumps({"flagged_clauses": clauses}))
+    return path
+
+
+def test_builds_variants_that_decode_to_the_source(package):
+    sizes = precompress.precompress(package)
+
+    source = package.read_bytes()
+    gz = variant_path(package, "gzip")
+    assert gzip.decompress(gz.read_bytes()) == source
+    assert sizes["gzip"] == gz.stat().st_size < len(source)
+    assert gz.stat().st_mtime_ns == package.stat().st_mtime_ns
+    if precompress.brotli is not None:
+        br = variant_path(package, "br")
+        assert precompress.brotli.decompress(br.read_bytes()) == source
+        assert sizes["br"] == br.stat().st_size
+
+
+def test_brotli_is_preferred_when_installed():
+    pytest.importorskip("brotli")
+
+    assert precompress.available_encodings() == ["br", "gzip"]
+
+
+def test_current_variants_are_not_rebuilt(package, monkeypatch):
+    first = precompress.precompress(package)
+
+    def compress(encoding, data):
+        raise AssertionError("variant rebuilt")
+
+    monkeypatch.setattr(precompress, "_compress", compress)
+    assert precompress.precompress(package) == first
+
+
+def test_rewritten_source_serves_uncompressed_until_rebuilt(package):
+    precompress.precompress(package)
+    st = package.stat()
+    os.utime(package, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    st = package.stat()
+
+    assert select_variant(package, st, "gzip, br") == (package, st, None)
+
+    precompress.precompress(package)
+    path, _, encoding = select_variant(package, st, "gzip")
+    assert (path, encoding) == (variant_path(package, "gzip"), "gzip")
+
+
+def test_small_and_incompressible_files_get_no_variants(tmp_path, package):
+    small = tmp_path / "small.json"
+    small.write_text("{}")
+    variant_path(small, "gzip").write_bytes(b"stale")
+    noise = tmp_path / "report.pdf"
+    noise.write_bytes(os.urandom(8192))
+
+    assert precompress.precompress(small) == {}
+    assert not variant_path(small, "gzip").exists()
+    assert precompress.precompress(noise) == {}
+    assert list(tmp_path.glob("report.pdf.*")) == []
+    assert precompress.precompress(tmp_path / "missing.json") == {}
+
+
+def test_precompress_later_builds_in_the_background(package):
+    precompress_later([package]).result(timeout=10)
+
+    assert variant_path(package, "gzip").exists()
+    remove_variants(package)
+    assert not any(is_variant(p) for p in package.parent.iterdir())
+
+
+def test_accepted_encodings_follow_q_values(monkeypatch):
+    monkeypatch.setattr(precompress, "brotli", object())
+
+    assert accepted_encodings("gzip, deflate, br") == ["br", "gzip"]
+    assert accepted_encodings("br;q=0.5, gzip") == ["gzip", "br"]
+    assert accepted_encodings("br;q=0, gzip;q=0.8") == ["gzip"]
+    assert accepted_encodings("*;q=0.1, gzip;q=0") == ["br"]
+    assert accepted_encodings("identity") == []
+    assert accepted_encodings("gzip;q=bad") == []
+
+    monkeypatch.setattr(precompress, "brotli", None)
+    assert accepted_encodings("br, gzip") == ["gzip"]
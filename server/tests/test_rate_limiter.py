@@ -0,0 +1,173 @@
+import threading
+import time
+
+import pytest
+
+from server.util.deadline import DeadlineExceeded
+from server.util.rate_limiter import RateLimiter, is_retryable, is_throttle
+
+
+class APIError(Exception):
+    """Client library error carrying an HTTP status, like google.genai's."""
+
+    def __init__(self, code: int, message: str = ""):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class ResourceExhausted(Exception):
+    """Stands in for google.api_core.exceptions.ResourceExhausted."""
+
+
+ResourceExhausted.__module__ = "google.api_core.exceptions"
+
+
+class FakeClock:
+    """Simulated time: sleeping advances the clock instead of waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def limiter(clock: FakeClock, **kwargs) -> RateLimiter:
+    options = {"rpm": 10, "tpm": 10_000, "base_delay": 0.5}
+    options.update(kwargs)
+    return RateLimiter(clock=clock, sleep=clock.sleep, **options)
+
+
+def failing(errors):
+    """Fake model raising the given errors in turn, then answering "ok"."""
+    errors = list(errors)
+
+    def model():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return model
+
+
+def test_classifies_provider_errors():
+    throttled = APIError(429, "RESOURCE_EXHAUSTED")
+    assert is_throttle(throttled) and is_retryable(throttled)
+    assert is_throttle(ResourceExhausted("quota exceeded"))
+    for code in (500, 503, 504):
+        assert is_retryable(APIError(code)) and not is_throttle(APIError(code))
+    assert not is_retryable(APIError(400, "INVALID_ARGUMENT"))
+    assert not is_retryable(ValueError("invalid schema"))
+
+
+def test_ignores_error_text():
+    # Validation errors and the pipeline's own deadline mention retryable
+    # words but are not provider errors
+    assert not is_retryable(ValueError("internal field 'timeout' is invalid"))
+    assert not is_retryable(RuntimeError("429 RESOURCE_EXHAUSTED: quota exceeded"))
+    assert not is_retryable(DeadlineExceeded("Deadline exceeded before analysis"))
+
+
+def test_classifies_wrapped_provider_errors():
+    try:
+        try:
+            raise APIError(503, "UNAVAILABLE")
+        except APIError as e:
+            raise RuntimeError("chain invocation failed") from e
+    except RuntimeError as wrapped:
+        assert is_retryable(wrapped)
+
+    try:
+        try:
+            raise APIError(503, "UNAVAILABLE")
+        except APIError:
+            # Raised while handling, not from, the provider error
+            raise ValueError("could not parse the fallback response")
+    except ValueError as unrelated:
+        assert not is_retryable(unrelated)
+
+
+def test_paces_calls_to_the_request_quota():
+    clock = FakeClock()
+    rl = limiter(clock, rpm=2)
+
+    assert rl.acquire() == 0.0
+    assert rl.acquire() == 0.0
+    # The bucket refills at 2 per minute: the third call waits 30 seconds
+    assert rl.acquire() == pytest.approx(30.0, abs=0.01)
+
+
+def test_retries_throttled_calls_and_backs_off_the_rate():
+    clock = FakeClock()
+    rl = limiter(clock)
+    quota = APIError(429, "RESOURCE_EXHAUSTED")
+
+    assert rl.call(failing([quota, quota]), tokens=500) == "ok"
+
+    metrics = rl.metrics()
+    assert (metrics["calls"], metrics["retries"], metrics["throttled"]) == (3, 2, 2)
+    assert metrics["failures"] == 0
+    # Halved twice, then recovered by one successful call
+    assert metrics["rate_scale"] == pytest.approx(0.25 + 0.05)
+
+
+def test_gives_up_on_fatal_errors_and_after_max_retries():
+    clock = FakeClock()
+    rl = limiter(clock, max_retries=2)
+
+    with pytest.raises(ValueError):
+        rl.call(failing([ValueError("invalid schema")]))
+    with pytest.raises(APIError):
+        rl.call(failing([APIError(503, "UNAVAILABLE")] * 3))
+
+    metrics = rl.metrics()
+    assert (metrics["calls"], metrics["retries"], metrics["failures"]) == (4, 2, 2)
+
+
+def test_interactive_calls_go_before_queued_batch_calls():
+    clock = FakeClock()
+    # The clock only moves when the test moves it
+    rl = RateLimiter(rpm=1, tpm=10_000, clock=clock, sleep=lambda _: time.sleep(0.001))
+    rl.acquire()
+    order = []
+
+    def waiter(lane):
+        rl.acquire(priority=lane)
+        order.append(lane)
+
+    batch = threading.Thread(target=waiter, args=("batch",))
+    batch.start()
+    while not rl._waiting["batch"]:
+        time.sleep(0.001)
+    interactive = threading.Thread(target=waiter, args=("interactive",))
+    interactive.start()
+    while not rl._waiting["interactive"]:
+        time.sleep(0.001)
+
+    clock.now += 60
+    interactive.join(5)
+    clock.now += 60
+    batch.join(5)
+
+    assert order == ["interactive", "batch"]
+
+
+def test_counts_calls_from_concurrent_threads():
+    rl = RateLimiter(rpm=1_000_000, tpm=1_000_000_000)
+
+    def run():
+        for _ in range(500):
+            rl.call(lambda: None)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    metrics = rl.metrics()
+    assert metrics["calls"] == 4000
+    assert metrics["lanes"]["interactive"]["samples"] == 1000
@@ -0,0 +1,132 @@
+import asyncio
+import gzip
+import os
+import zlib
+
+import pytest
+
+from server.util import request_decompression
+from server.util.request_decompression import RequestDecompressionMiddleware
+
+BODY = b'{"markdown": "' + b"The Tenant shall pay rent monthly. " * 2000 + b'"}'
+
+
+async def echo(scope, receive, send):
+    """Responds with the body length it received and the content-length header."""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    headers = dict(scope["headers"])
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"x-content-length", headers.get(b"content-length", b""))],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def post(middleware, data, encoding, chunk_size=4096, content_length=None):
+    """
+    Send data through middleware in chunks; returns the response status, body
+    and headers and the number of body bytes the middleware read.
+    """
+    chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+    received = []
+
+    async def receive():
+        chunk = chunks.pop(0) if chunks else b""
+        received.append(len(chunk))
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [(b"content-encoding", encoding.encode())]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers}
+    asyncio.run(middleware(scope, receive, send))
+    start, body = sent[0], b"".join(m.get("body", b"") for m in sent[1:])
+    return start["status"], body, dict(start["headers"]), sum(received)
+
+
+@pytest.mark.parametrize(
+    "encoding, compress",
+    [
+        ("gzip", gzip.compress),
+        ("deflate", zlib.compress),
+        ("deflate", lambda data: zlib.compress(data, wbits=-zlib.MAX_WBITS)),
+    ],
+)
+def test_decompresses_body(encoding, compress):
+    status, body, headers, _ = post(
+        RequestDecompressionMiddleware(echo), compress(BODY), encoding
+    )
+
+    assert status == 200
+    assert body == BODY
+    assert headers[b"x-content-length"] == str(len(BODY)).encode()
+
+
+def test_decompresses_brotli_body():
+    brotli = pytest.importorskip("brotli")
+    if not request_decompression.BROTLI_BOUNDED:
+        pytest.skip("brotli < 1.2 has no bounded decompression")
+
+    status, body, _, _ = post(
+        RequestDecompressionMiddleware(echo), brotli.compress(BODY), "br"
+    )
+
+    assert status == 200
+    assert body == BODY
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "deflate", "br"])
+def test_refuses_decompression_bomb(encoding):
+    bomb = b"\0" * (8 * 1024 * 1024)
+    if encoding == "br":
+        brotli = pytest.importorskip("brotli")
+        if not request_decompression.BROTLI_BOUNDED:
+            pytest.skip("brotli < 1.2 has no bounded decompression")
+        data = brotli.compress(bomb)
+    else:
+        data = gzip.compress(bomb) if encoding == "gzip" else zlib.compress(bomb)
+    middleware = RequestDecompressionMiddleware(echo, max_size=1024 * 1024)
+
+    status, body, _, _ = post(middleware, data, encoding)
+
+    assert status == 413
+    assert b"Decompressed request body exceeds" in body
+
+
+def test_refuses_oversized_compressed_body_without_reading_it():
+    data = gzip.compress(os.urandom(8192))
+    middleware = RequestDecompressionMiddleware(echo, max_compressed_size=1024)
+
+    status, _, _, received = post(middleware, data, "gzip", content_length=len(data))
+    assert (status, received) == (413, 0)
+
+    # Without a Content-Length, reading stops once the limit is passed
+    status, _, _, received = post(middleware, data, "gzip", chunk_size=512)
+    assert status == 413
+    assert received <= 1024 + 512
+
+
+def test_rejects_corrupt_and_unsupported_bodies():
+    middleware = RequestDecompressionMiddleware(echo)
+
+    assert post(middleware, b"not gzip at all", "gzip")[0] == 400
+    assert post(middleware, gzip.compress(BODY), "compress")[0] == 415
+
+
+def test_passes_uncompressed_requests_through():
+    status, body, _, _ = post(RequestDecompressionMiddleware(echo), BODY, "identity")
+
+    assert (status, body) == (200, BODY)
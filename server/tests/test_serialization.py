@@ -0,0 +1,122 @@
+import json
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from server.util import serialization
+from server.util.config import Config
+from server.util.serialization import (
+    JSONBytesResponse,
+    dumps,
+    loads,
+    read_json,
+    write_json,
+)
+
+
+class Issue(BaseModel):
+    clause: str
+    risk: str
+    tags: List[str] = []
+
+
+PAYLOAD = {
+    "title": "Tenancy Agreement – Blk 123 ✓",
+    "generated_at": datetime(2025, 1, 2, 3, 4, 5, 600, tzinfo=timezone.utc),
+    "date": date(2025, 1, 1),
+    "path": Path("agents/outputs/summary.pdf"),
+    "tags": {"deposit"},
+    "counts": {1: 2, "total": 3},
+    "issue": Issue(clause="The deposit is non-refundable.", risk="HIGH"),
+    "issues": [],
+    "score": 0.5,
+    "flag": None,
+}
+
+EXPECTED = {
+    "title": "Tenancy Agreement – Blk 123 ✓",
+    "generated_at": "2025-01-02T03:04:05.000600+00:00",
+    "date": "2025-01-01",
+    "path": "agents/outputs/summary.pdf",
+    "tags": ["deposit"],
+    "counts": {"1": 2, "total": 3},
+    "issue": {"clause": "The deposit is non-refundable.", "risk": "HIGH", "tags": []},
+    "issues": [],
+    "score": 0.5,
+    "flag": None,
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+def test_round_trips_supported_types(backend):
+    assert loads(dumps(PAYLOAD, pretty=False)) == EXPECTED
+    assert loads(dumps(PAYLOAD, pretty=True).decode("utf-8")) == EXPECTED
+
+
+def test_compact_and_pretty_layouts(backend):
+    compact = dumps({"a": [1, 2], "b": "ü"}, pretty=False)
+    pretty = dumps({"a": [1, 2], "b": "ü"}, pretty=True)
+
+    assert compact == '{"a":[1,2],"b":"ü"}'.encode("utf-8")
+    assert pretty == json.dumps(
+        {"a": [1, 2], "b": "ü"}, ensure_ascii=False, indent=2
+    ).encode("utf-8")
+
+
+def test_backends_produce_the_same_bytes(monkeypatch):
+    orjson = pytest.importorskip("orjson")
+    monkeypatch.setattr(serialization, "orjson", orjson)
+    fast = [dumps(PAYLOAD, pretty=False), dumps(PAYLOAD, pretty=True)]
+    monkeypatch.setattr(serialization, "orjson", None)
+
+    assert [dumps(PAYLOAD, pretty=False), dumps(PAYLOAD, pretty=True)] == fast
+
+
+def test_unsupported_types_raise_type_error(backend):
+    with pytest.raises(TypeError):
+        dumps({"value": object()}, pretty=False)
+
+
+def test_models_use_pydantic_serializer(backend):
+    issue = Issue(clause="Rent is due monthly.", risk="OK", tags=["rent"])
+
+    assert dumps(issue, pretty=False) == issue.model_dump_json().encode("utf-8")
+    assert loads(dumps(issue, pretty=True)) == issue.model_dump(mode="json")
+
+
+def test_pretty_defaults_to_config(monkeypatch):
+    monkeypatch.setattr(Config, "JSON_PRETTY", True)
+    assert b"\n" in dumps({"a": 1})
+
+    monkeypatch.setattr(Config, "JSON_PRETTY", False)
+    assert dumps({"a": 1}) == b'{"a":1}'
+
+
+def test_write_json_replaces_the_file_whole(tmp_path, backend):
+    path = tmp_path / "frontend_package.json"
+    path.write_text("stale")
+
+    written = write_json(path, PAYLOAD, pretty=False)
+
+    assert written == path.stat().st_size
+    assert read_json(path) == EXPECTED
+    assert [p.name for p in tmp_path.iterdir()] == ["frontend_package.json"]
+
+
+def test_bytes_response_sends_stored_json_unchanged():
+    stored = b'{"stored": true}'
+
+    assert JSONBytesResponse(stored).body == stored
+    assert JSONBytesResponse({"a": [1]}).body == b'{"a":[1]}'
+    assert JSONBytesResponse({}).media_type == "application/json"
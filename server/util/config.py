@@ -10,6 +10,35 @@ class Config:
     GEMINI_API_KEY: SecretStr = SecretStr(os.getenv("GEMINI_API_KEY", ""))
     GMAIL_ACC: SecretStr = SecretStr(os.getenv("GMAIL_ACC", ""))
     GMAIL_PW: SecretStr = SecretStr(os.getenv("GMAIL_PW", ""))
+    GEMINI_RPM: int = int(os.getenv("GEMINI_RPM", "15"))
+    GEMINI_TPM: int = int(os.getenv("GEMINI_TPM", "1000000"))
+    GEMINI_MAX_RETRIES: int = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+    ANALYZE_DEADLINE_SECONDS: float = float(
+        os.getenv("ANALYZE_DEADLINE_SECONDS", "180")
+    )
+    HEDGE_REQUESTS: bool = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+    GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+    ANALYSER_ESCALATION: bool = (
+        os.getenv("ANALYSER_ESCALATION", "false").lower() == "true"
+    )
+    ANALYSER_FAST_MODEL: str = os.getenv("ANALYSER_FAST_MODEL", "gemini-2.0-flash-lite")
+    ESCALATION_CONFIDENCE: float = float(os.getenv("ESCALATION_CONFIDENCE", "0.7"))
+    CLAUSE_DEDUP: bool = os.getenv("CLAUSE_DEDUP", "false").lower() == "true"
+    CLAUSE_DEDUP_THRESHOLD: float = float(os.getenv("CLAUSE_DEDUP_THRESHOLD", "0.85"))
+    BATCH_WORKERS: int = int(os.getenv("BATCH_WORKERS", "4"))
+    GUARDRAIL_CHUNK_SIZE: int = int(os.getenv("GUARDRAIL_CHUNK_SIZE", "262144"))
+    SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
+    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "2"))
+    EMAIL_MAX_RETRIES: int = int(os.getenv("EMAIL_MAX_RETRIES", "5"))
+    EMAIL_RATE_PER_MINUTE: int = int(os.getenv("EMAIL_RATE_PER_MINUTE", "60"))
+    SMTP_BULK_SESSIONS: int = int(os.getenv("SMTP_BULK_SESSIONS", "4"))
+    NOTIFICATIONS_API_KEY: SecretStr = SecretStr(os.getenv("NOTIFICATIONS_API_KEY", ""))
+    BULK_JOB_TTL_HOURS: float = float(os.getenv("BULK_JOB_TTL_HOURS", "24"))
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", "2"))
+    ARTIFACT_TTL_HOURS: float = float(os.getenv("ARTIFACT_TTL_HOURS", "168"))
+    JSON_PRETTY: bool = os.getenv("JSON_PRETTY", "false").lower() == "true"
 
     @classmethod
     def validate_config(cls) -> None:
@@ -43,6 +72,107 @@ class Config:
     def get_gmail_acc(cls) -> str:
         return cls.GMAIL_ACC.get_secret_value()
 
+    @classmethod
+    def get_gemini_rpm(cls) -> int:
+        return cls.GEMINI_RPM
+
+    @classmethod
+    def get_gemini_tpm(cls) -> int:
+        return cls.GEMINI_TPM
+
+    @classmethod
+    def get_gemini_max_retries(cls) -> int:
+        return cls.GEMINI_MAX_RETRIES
+
+    @classmethod
+    def get_analyze_deadline(cls) -> float:
+        return cls.ANALYZE_DEADLINE_SECONDS
+
+    @classmethod
+    def get_hedge_requests(cls) -> bool:
+        return cls.HEDGE_REQUESTS
+
+    @classmethod
+    def get_agent_model(cls, agent_type: str) -> str:
+        """Model for an agent, e.g. GEMINI_MODEL_ANALYSER_AGENT, else GEMINI_MODEL."""
+        return os.getenv(f"GEMINI_MODEL_{agent_type.upper()}", cls.GEMINI_MODEL)
+
+    @classmethod
+    def get_analyser_escalation(cls) -> bool:
+        return cls.ANALYSER_ESCALATION
+
+    @classmethod
+    def get_analyser_fast_model(cls) -> str:
+        return cls.ANALYSER_FAST_MODEL
+
+    @classmethod
+    def get_escalation_confidence(cls) -> float:
+        return cls.ESCALATION_CONFIDENCE
+
+    @classmethod
+    def get_clause_dedup(cls) -> bool:
+        return cls.CLAUSE_DEDUP
+
+    @classmethod
+    def get_clause_dedup_threshold(cls) -> float:
+        return cls.CLAUSE_DEDUP_THRESHOLD
+
+    @classmethod
+    def get_batch_workers(cls) -> int:
+        return cls.BATCH_WORKERS
+
+    @classmethod
+    def get_guardrail_chunk_size(cls) -> int:
+        return cls.GUARDRAIL_CHUNK_SIZE
+
+    @classmethod
+    def get_smtp_host(cls) -> str:
+        return cls.SMTP_HOST
+
+    @classmethod
+    def get_smtp_port(cls) -> int:
+        return cls.SMTP_PORT
+
+    @classmethod
+    def get_smtp_starttls(cls) -> bool:
+        return cls.SMTP_STARTTLS
+
+    @classmethod
+    def get_smtp_pool_size(cls) -> int:
+        return cls.SMTP_POOL_SIZE
+
+    @classmethod
+    def get_email_max_retries(cls) -> int:
+        return cls.EMAIL_MAX_RETRIES
+
+    @classmethod
+    def get_email_rate_per_minute(cls) -> int:
+        return cls.EMAIL_RATE_PER_MINUTE
+
+    @classmethod
+    def get_smtp_bulk_sessions(cls) -> int:
+        return cls.SMTP_BULK_SESSIONS
+
+    @classmethod
+    def get_notifications_api_key(cls) -> str:
+        return cls.NOTIFICATIONS_API_KEY.get_secret_value()
+
+    @classmethod
+    def get_bulk_job_ttl_hours(cls) -> float:
+        return cls.BULK_JOB_TTL_HOURS
+
+    @classmethod
+    def get_pdf_workers(cls) -> int:
+        return cls.PDF_WORKERS
+
+    @classmethod
+    def get_artifact_ttl_hours(cls) -> float:
+        return cls.ARTIFACT_TTL_HOURS
+
+    @classmethod
+    def get_json_pretty(cls) -> bool:
+        return cls.JSON_PRETTY
+
 
 @lru_cache(maxsize=1)
 def getConfig() -> Config:
@@ -0,0 +1,33 @@
+import time
+from typing import Callable
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request runs past its end-to-end time budget."""
+
+
+class Deadline:
+    """
+    End-to-end time budget for one request. Created once at the endpoint and
+    passed down through intake, analysis and planning so each stage can stop
+    starting new work once the budget is spent.
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.seconds = seconds
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self.clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.clock() >= self.expires_at
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded if the budget is spent before stage starts."""
+        if self.expired:
+            raise DeadlineExceeded(
+                f"Deadline of {self.seconds:.0f}s exceeded before {stage}"
+            )
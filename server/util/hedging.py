@@ -0,0 +1,260 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from server.util.deadline import Deadline, DeadlineExceeded
+from server.util.rate_limiter import (
+    CANCEL_POLL_SECONDS,
+    CallCancelled,
+    RateLimiter,
+    call_cancelled,
+)
+
+# Model calls are I/O bound; primaries and hedges share this pool
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-call")
+
+
+def _percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LatencyTracker:
+    """
+    Rolling latency samples per call type. "primary" is how long the model
+    took to answer the first attempt, once it held a rate limiter slot;
+    "queue" is how long that attempt waited for the slot; "effective" is how
+    long the caller actually waited, so the primary and effective p99s show
+    the tail before and after hedging.
+    """
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._primary: Dict[str, Deque[float]] = {}
+        self._effective: Dict[str, Deque[float]] = {}
+        self._queue: Dict[str, Deque[float]] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _series(self, table: Dict[str, Deque[float]], key: str) -> Deque[float]:
+        if key not in table:
+            table[key] = deque(maxlen=self.window)
+        return table[key]
+
+    def record_primary(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._series(self._primary, key).append(seconds)
+
+    def record_effective(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._series(self._effective, key).append(seconds)
+
+    def record_queue(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._series(self._queue, key).append(seconds)
+
+    def count(self, key: str, event: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(
+                key, {"hedged": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+            )
+            counters[event] += 1
+
+    def p95(self, key: str) -> Optional[float]:
+        with self._lock:
+            samples = list(self._primary.get(key, ()))
+        return _percentile(samples, 0.95) if samples else None
+
+    def samples(self, key: str) -> int:
+        with self._lock:
+            return len(self._primary.get(key, ()))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = set(self._primary) | set(self._effective)
+            return {
+                key: {
+                    "samples": len(self._effective.get(key, ())),
+                    "p50_primary": _percentile(self._primary.get(key, ()), 0.50),
+                    "p95_primary": _percentile(self._primary.get(key, ()), 0.95),
+                    "p99_primary": _percentile(self._primary.get(key, ()), 0.99),
+                    "p50_effective": _percentile(self._effective.get(key, ()), 0.50),
+                    "p95_effective": _percentile(self._effective.get(key, ()), 0.95),
+                    "p99_effective": _percentile(self._effective.get(key, ()), 0.99),
+                    "p95_queue": _percentile(self._queue.get(key, ()), 0.95),
+                    **self._counters.get(key, {}),
+                }
+                for key in sorted(keys)
+            }
+
+
+latency_tracker = LatencyTracker()
+
+
+class Attempt:
+    """
+    One submission of a call to the pool, which can be withdrawn. With a
+    limiter the attempt takes its own slot first (and is retried by it);
+    only the model call itself is timed.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[], Any],
+        limiter: Optional[RateLimiter] = None,
+        tokens: int = 1,
+        priority: str = "interactive",
+    ):
+        self.cancelled = threading.Event()
+        self.submitted_at = time.monotonic()
+        # When the model call in progress started; None while queued for a
+        # slot or backing off before a retry
+        self.started_at: Optional[float] = None
+        self.queue_seconds: Optional[float] = None
+        self.model_seconds: Optional[float] = None
+        self.future: Future = _executor.submit(self._run, fn, limiter, tokens, priority)
+
+    def _invoke(self, fn: Callable[[], Any]) -> Any:
+        started = time.monotonic()
+        if self.queue_seconds is None:
+            self.queue_seconds = started - self.submitted_at
+        self.started_at = started
+        try:
+            return fn()
+        finally:
+            self.model_seconds = time.monotonic() - started
+            self.started_at = None
+
+    def _run(
+        self,
+        fn: Callable[[], Any],
+        limiter: Optional[RateLimiter],
+        tokens: int,
+        priority: str,
+    ) -> Any:
+        token = call_cancelled.set(self.cancelled)
+        try:
+            if limiter is None:
+                return self._invoke(fn)
+            return limiter.call(
+                lambda: self._invoke(fn), tokens=tokens, priority=priority
+            )
+        finally:
+            call_cancelled.reset(token)
+
+    def cancel(self) -> None:
+        """
+        Drop the attempt if it has not started, or make it leave the limiter
+        queue (and skip retries) if it is still waiting there. A request
+        already sent to the model cannot be recalled; its result is ignored.
+        """
+        self.cancelled.set()
+        self.future.cancel()
+
+
+def _due_for_hedge(
+    primary: Attempt, threshold: float, deadline: Optional[Deadline]
+) -> bool:
+    """
+    Wait until the primary has been with the model for threshold seconds.
+    Time spent queued for a limiter slot or backing off does not count.
+    False if the primary finishes or the deadline passes first.
+    """
+    while not primary.future.done():
+        budget = deadline.remaining() if deadline is not None else None
+        if budget is not None and budget <= 0:
+            return False
+        started = primary.started_at
+        if started is None:
+            timeout = CANCEL_POLL_SECONDS
+        else:
+            timeout = threshold - (time.monotonic() - started)
+            if timeout <= 0:
+                return True
+        if budget is not None:
+            timeout = min(timeout, budget)
+        wait([primary.future], timeout=timeout)
+    return False
+
+
+def hedged_call(
+    fn: Callable[[], Any],
+    key: str,
+    deadline: Optional[Deadline] = None,
+    hedge: bool = False,
+    min_samples: int = 20,
+    tracker: LatencyTracker = latency_tracker,
+    limiter: Optional[RateLimiter] = None,
+    tokens: int = 1,
+    priority: str = "interactive",
+) -> Any:
+    """
+    Run fn in the call pool and wait for it within the deadline. With a
+    limiter, each attempt runs under limiter.call, so it queues for its own
+    slot and is retried there. With hedge set, once the model call has run
+    longer than the p95 model latency seen for key a duplicate is started
+    and whichever answer arrives first is used. Queueing for quota is not
+    model latency: it neither counts toward the p95 nor triggers a hedge,
+    so throttling does not turn into duplicate requests. At most one hedge
+    is sent.
+
+    Attempts that are no longer needed, the loser of a hedge or everything
+    still running when the deadline passes, are cancelled: dropped if they
+    have not started, taken out of the rate limiter's queue if they are
+    waiting for capacity. Requests already sent keep running in the
+    background, but their result is discarded and no later stage starts.
+    """
+    if deadline is not None:
+        deadline.check(key)
+
+    start = time.monotonic()
+
+    def record_primary(future: Future) -> None:
+        if future.cancelled() or isinstance(future.exception(), CallCancelled):
+            return
+        if primary.queue_seconds is not None:
+            tracker.record_queue(key, primary.queue_seconds)
+        if primary.model_seconds is not None:
+            tracker.record_primary(key, primary.model_seconds)
+
+    primary = Attempt(fn, limiter, tokens, priority)
+    primary.future.add_done_callback(record_primary)
+    attempts = {primary.future: primary}
+    pending = {primary.future}
+
+    threshold = tracker.p95(key) if hedge else None
+    if threshold is not None and tracker.samples(key) >= min_samples:
+        if _due_for_hedge(primary, threshold, deadline):
+            tracker.count(key, "hedged")
+            print(f"Hedging {key} after {threshold:.2f}s")
+            hedge_attempt = Attempt(fn, limiter, tokens, priority)
+            attempts[hedge_attempt.future] = hedge_attempt
+            pending.add(hedge_attempt.future)
+
+    try:
+        while pending:
+            timeout = deadline.remaining() if deadline is not None else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                tracker.count(key, "deadline_exceeded")
+                raise DeadlineExceeded(f"Deadline exceeded while waiting for {key}")
+
+            succeeded = [future for future in done if future.exception() is None]
+            if not succeeded and pending:
+                # One attempt failed while another is still running; keep waiting
+                continue
+
+            winner = succeeded[0] if succeeded else next(iter(done))
+            tracker.record_effective(key, time.monotonic() - start)
+            if winner is not primary.future:
+                tracker.count(key, "hedge_wins")
+            return winner.result()
+    finally:
+        for future in pending:
+            attempts[future].cancel()
+
+    raise RuntimeError(f"No attempt completed for {key}")
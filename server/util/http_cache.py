@@ -0,0 +1,116 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+from server.util.precompress import select_variant
+
+
+def etag_for(st: os.stat_result) -> str:
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def cache_headers(etag: str, last_modified: float) -> Dict[str, str]:
+    # Cacheable, but revalidated on every use: the same name can be rebuilt
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+
+def is_not_modified(
+    headers: Mapping[str, str], etag: str, last_modified: float
+) -> bool:
+    """
+    Whether a conditional GET can be answered with 304 (RFC 9110 13.2.2):
+    If-None-Match decides when present, otherwise If-Modified-Since.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole-second precision
+        return int(last_modified) <= since
+    return False
+
+
+def _not_modified(
+    request: Request,
+    etag: str,
+    last_modified: float,
+    headers: Optional[Dict[str, str]] = None,
+) -> Optional[Response]:
+    if request.method in ("GET", "HEAD") and is_not_modified(
+        request.headers, etag, last_modified
+    ):
+        return Response(
+            status_code=304,
+            headers={**cache_headers(etag, last_modified), **(headers or {})},
+        )
+    return None
+
+
+def bytes_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    last_modified: float,
+    media_type: str = "application/json",
+) -> Response:
+    """body with validators, or 304 when the client's copy is current."""
+    return _not_modified(request, etag, last_modified) or Response(
+        body, media_type=media_type, headers=cache_headers(etag, last_modified)
+    )
+
+
+def file_response(
+    request: Request,
+    path: Path,
+    st: os.stat_result,
+    media_type: str,
+    filename: Optional[str] = None,
+    precompressed: bool = True,
+) -> Response:
+    """
+    FileResponse for an already stat()ed file, or 304 when the client's copy
+    is current. FileResponse answers Range and If-Range requests itself
+    using the same ETag and Last-Modified.
+
+    With precompressed set, a gzip or brotli variant built at packaging time
+    is sent instead when Accept-Encoding allows it (see precompress). The
+    variant has its own ETag, and ranges apply to the compressed bytes.
+    FileResponse streams the file in chunks, or hands the path to the
+    server for a zero-copy sendfile where it supports the ASGI pathsend
+    extension.
+    """
+    vary: Dict[str, str] = {}
+    encoding = None
+    if precompressed:
+        path, st, encoding = select_variant(
+            path, st, request.headers.get("accept-encoding", "")
+        )
+        vary["Vary"] = "Accept-Encoding"
+    etag = etag_for(st)
+    not_modified = _not_modified(request, etag, st.st_mtime, vary)
+    if not_modified is not None:
+        return not_modified
+    headers = {**cache_headers(etag, st.st_mtime), **vary}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(
+        path=str(path),
+        media_type=media_type,
+        filename=filename,
+        stat_result=st,
+        headers=headers,
+    )
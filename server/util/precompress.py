@@ -0,0 +1,165 @@
+"""
+Precompressed variants of packaged files.
+
+Packaging writes gzip and brotli copies next to the files the API serves
+(gzip only if brotli cannot be imported), at the highest compression levels
+since this happens once per file rather than once per download: <name>.gz
+and <name>.br. A variant carries its source's mtime and is only served
+while the two still match, so a rewritten file falls back to the
+uncompressed bytes until its variants have been built again. Variants
+that would not be meaningfully smaller (e.g. already compressed PDFs) are
+not kept.
+"""
+
+import gzip
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except Exception:
+    brotli = None
+
+# Content-Encoding -> file suffix, in order of preference
+SUFFIXES: Dict[str, str] = {"br": ".br", "gzip": ".gz"}
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# Smaller files are not worth a variant
+MIN_SIZE = 1024
+# Keep a variant only below this fraction of the original size
+MAX_RATIO = 0.9
+
+
+def _compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def available_encodings() -> List[str]:
+    return [e for e in SUFFIXES if e != "br" or brotli is not None]
+
+
+def variant_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + SUFFIXES[encoding])
+
+
+def is_variant(path: Path) -> bool:
+    return path.suffix in SUFFIXES.values()
+
+
+def precompress(path: Path) -> Dict[str, int]:
+    """Build the missing or stale variants of path; returns their sizes."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    if st.st_size < MIN_SIZE:
+        remove_variants(path)
+        return {}
+    sizes: Dict[str, int] = {}
+    data: Optional[bytes] = None
+    for encoding in available_encodings():
+        target = variant_path(path, encoding)
+        try:
+            current = os.stat(target)
+            if current.st_mtime_ns == st.st_mtime_ns:
+                sizes[encoding] = current.st_size
+                continue
+        except FileNotFoundError:
+            pass
+
+        if data is None:
+            data = path.read_bytes()
+        compressed = _compress(encoding, data)
+        if len(compressed) > len(data) * MAX_RATIO:
+            target.unlink(missing_ok=True)
+            continue
+        tmp = target.with_name(f".{target.name}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(compressed)
+        # Stamped with the source's mtime as read before compressing: if the
+        # source was replaced meanwhile, the variant is already stale
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        tmp.replace(target)
+        sizes[encoding] = len(compressed)
+    return sizes
+
+
+@lru_cache(maxsize=1)
+def _executor() -> ThreadPoolExecutor:
+    # One worker: compression is CPU-bound and never urgent
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="precompress")
+
+
+def precompress_later(paths: Iterable[Path]) -> "Future[None]":
+    """Build variants in the background so packaging does not wait for them."""
+    paths = list(paths)
+
+    def run() -> None:
+        for path in paths:
+            try:
+                precompress(path)
+            except Exception as e:
+                print(f"Failed to precompress {path}: {e}")
+
+    return _executor().submit(run)
+
+
+def remove_variants(path: Path) -> None:
+    for encoding in SUFFIXES:
+        variant_path(Path(path), encoding).unlink(missing_ok=True)
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """
+    Encodings we have variants for that Accept-Encoding allows, best first
+    (by q-value, then our own preference).
+    """
+    weights: Dict[str, float] = {}
+    wildcard: Optional[float] = None
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding == "*":
+            wildcard = q
+        else:
+            weights[coding] = q
+
+    ranked = []
+    for preference, encoding in enumerate(available_encodings()):
+        q = weights.get(encoding, wildcard if wildcard is not None else 0.0)
+        if q > 0:
+            ranked.append((-q, preference, encoding))
+    return [encoding for _, _, encoding in sorted(ranked)]
+
+
+def select_variant(
+    path: Path, st: os.stat_result, accept_encoding: str
+) -> Tuple[Path, os.stat_result, Optional[str]]:
+    """
+    The best current variant of path the client accepts, as (path, stat,
+    Content-Encoding); the file itself with encoding None otherwise.
+    """
+    for encoding in accepted_encodings(accept_encoding):
+        target = variant_path(path, encoding)
+        try:
+            variant = os.stat(target)
+        except OSError:
+            continue
+        if variant.st_mtime_ns == st.st_mtime_ns:
+            return target, variant, encoding
+    return path, st, None
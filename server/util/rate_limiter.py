@@ -0,0 +1,290 @@
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Set
+
+from server.util.config import getConfig
+
+LANES = ("interactive", "batch")
+
+# Lane used by model calls that do not pass a priority explicitly
+current_lane: ContextVar[str] = ContextVar("current_lane", default="interactive")
+
+# Set when the current call is no longer wanted, e.g. the losing attempt of a
+# hedged call; a call still queued in the limiter then leaves without taking
+# a slot, and a failed one is not retried
+call_cancelled: ContextVar[Optional[threading.Event]] = ContextVar(
+    "call_cancelled", default=None
+)
+# How often a cancellable waiter re-checks its event
+CANCEL_POLL_SECONDS = 0.05
+
+# HTTP statuses worth retrying: quota exhaustion and transient server errors
+RETRYABLE_STATUSES = {429, 500, 503, 504}
+THROTTLE_STATUSES = {429}
+# The same cases as raised by the Google client libraries (google.api_core,
+# google.genai), matched by class name within those modules only: the
+# pipeline's own DeadlineExceeded must not be retried
+RETRYABLE_ERRORS = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "ServerError",
+}
+THROTTLE_ERRORS = {"ResourceExhausted", "TooManyRequests"}
+
+
+@contextmanager
+def lane(priority: str) -> Iterator[None]:
+    """Run the enclosed model calls in the given limiter lane."""
+    token = current_lane.set(priority)
+    try:
+        yield
+    finally:
+        current_lane.reset(token)
+
+
+class CallCancelled(Exception):
+    """Raised in a call that was cancelled while it waited in the limiter."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) for TPM accounting."""
+    return max(1, len(text) // 4)
+
+
+def _status(error: BaseException) -> Optional[int]:
+    """HTTP status carried by a client library error, if any."""
+    for name in ("code", "status_code"):
+        value = getattr(error, name, None)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    value = getattr(getattr(error, "response", None), "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def _matches(error: BaseException, statuses: Set[int], names: Set[str]) -> bool:
+    """Whether error, or an error it was raised from, is one of these cases."""
+    seen = set()
+    current: Optional[BaseException] = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if _status(current) in statuses:
+            return True
+        if type(current).__module__.startswith("google.") and any(
+            cls.__name__ in names for cls in type(current).__mro__
+        ):
+            return True
+        # Wrappers such as langchain's chain errors raise ... from the cause
+        current = current.__cause__
+    return False
+
+
+def is_retryable(error: BaseException) -> bool:
+    return _matches(error, RETRYABLE_STATUSES, RETRYABLE_ERRORS)
+
+
+def is_throttle(error: BaseException) -> bool:
+    return _matches(error, THROTTLE_STATUSES, THROTTLE_ERRORS)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate_per_minute."""
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float]):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def refill(self, scale: float = 1.0) -> None:
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate * scale
+        )
+        self.updated = now
+
+    def time_until(self, amount: float, scale: float = 1.0) -> float:
+        """Seconds until amount tokens are available (0 when they already are)."""
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount - 1e-9:
+            return 0.0
+        return max(0.001, (amount - self.tokens) / (self.rate * scale))
+
+
+class RateLimiter:
+    """
+    Shared limiter for Gemini calls.
+
+    Requests and tokens are metered by two token buckets sized to the RPM and
+    TPM quotas. Waiters are served FIFO within a lane and the interactive lane
+    always goes before the batch lane. Throttling errors halve the effective
+    refill rate, which then recovers gradually on successful calls (AIMD), and
+    retryable errors are retried with exponential backoff and full jitter.
+
+    clock and sleep are injectable so the limiter can be driven by a fake
+    model and a fake clock.
+    """
+
+    def __init__(
+        self,
+        rpm: int,
+        tpm: int,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.clock = clock
+        self.sleep = sleep
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        self.scale = 1.0
+
+        self._cond = threading.Condition()
+        self._tickets = itertools.count()
+        self._waiting: Dict[str, Deque[int]] = {lane: deque() for lane in LANES}
+
+        # Metrics are updated from every calling thread
+        self._lock = threading.Lock()
+        self._delays: Dict[str, Deque[float]] = {
+            lane: deque(maxlen=1000) for lane in LANES
+        }
+        self._counters = {"calls": 0, "retries": 0, "throttled": 0, "failures": 0}
+
+    def acquire(self, tokens: int = 1, priority: str = "interactive") -> float:
+        """Block until a request slot and tokens are available; returns queueing delay."""
+        lane = priority if priority in LANES else "interactive"
+        cancelled = call_cancelled.get()
+        start = self.clock()
+        with self._cond:
+            ticket = next(self._tickets)
+            self._waiting[lane].append(ticket)
+            try:
+                while True:
+                    if cancelled is not None and cancelled.is_set():
+                        raise CallCancelled("Call cancelled while queued")
+                    timeout: Optional[float] = None
+                    if self._is_next(lane, ticket):
+                        self.requests.refill(self.scale)
+                        self.tokens.refill(self.scale)
+                        timeout = max(
+                            self.requests.time_until(1, self.scale),
+                            self.tokens.time_until(tokens, self.scale),
+                        )
+                        if timeout <= 0:
+                            self.requests.tokens -= 1
+                            self.tokens.tokens -= min(tokens, self.tokens.capacity)
+                            break
+                    if cancelled is not None:
+                        timeout = min(
+                            timeout or CANCEL_POLL_SECONDS, CANCEL_POLL_SECONDS
+                        )
+                    self._wait(timeout)
+            finally:
+                self._waiting[lane].remove(ticket)
+                self._cond.notify_all()
+
+        delay = self.clock() - start
+        with self._lock:
+            self._delays[lane].append(delay)
+        return delay
+
+    def _is_next(self, lane: str, ticket: int) -> bool:
+        if self._waiting[lane][0] != ticket:
+            return False
+        return lane == "interactive" or not self._waiting["interactive"]
+
+    def _wait(self, timeout: Optional[float]) -> None:
+        if self.sleep is time.sleep:
+            self._cond.wait(timeout)
+        else:
+            # Fake clocks cannot wake a Condition; advance them explicitly
+            self._cond.release()
+            try:
+                self.sleep(timeout if timeout is not None else 0.01)
+            finally:
+                self._cond.acquire()
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        tokens: int = 1,
+        priority: str = "interactive",
+    ) -> Any:
+        """Run fn under the limiter, retrying retryable errors with backoff."""
+        attempt = 0
+        while True:
+            self.acquire(tokens, priority)
+            self._count("calls")
+            try:
+                result = fn()
+            except Exception as e:
+                if is_throttle(e):
+                    self._count("throttled")
+                    with self._cond:
+                        self.scale = max(0.1, self.scale / 2)
+                cancelled = call_cancelled.get()
+                if (
+                    attempt >= self.max_retries
+                    or not is_retryable(e)
+                    or (cancelled is not None and cancelled.is_set())
+                ):
+                    self._count("failures")
+                    raise
+                delay = random.uniform(
+                    0, min(self.max_delay, self.base_delay * 2**attempt)
+                )
+                attempt += 1
+                self._count("retries")
+                print(f"Retrying model call in {delay:.1f}s ({attempt}): {e}")
+                self.sleep(delay)
+                continue
+
+            with self._cond:
+                self.scale = min(1.0, self.scale + 0.05)
+            return result
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            samples = {lane: sorted(delays) for lane, delays in self._delays.items()}
+        lanes = {}
+        for lane, ordered in samples.items():
+            lanes[lane] = {
+                "samples": len(ordered),
+                "waiting": len(self._waiting[lane]),
+                "avg_queue_delay": sum(ordered) / len(ordered) if ordered else 0.0,
+                "p95_queue_delay": (
+                    ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0
+                ),
+                "max_queue_delay": ordered[-1] if ordered else 0.0,
+            }
+        return {**counters, "rate_scale": self.scale, "lanes": lanes}
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter shared by every agent."""
+    config = getConfig()
+    return RateLimiter(
+        rpm=config.get_gemini_rpm(),
+        tpm=config.get_gemini_tpm(),
+        max_retries=config.get_gemini_max_retries(),
+    )
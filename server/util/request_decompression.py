@@ -0,0 +1,184 @@
+import json
+import zlib
+
+try:
+    import brotli
+except Exception:
+    brotli = None
+
+# Upper bound on a decompressed request body, to refuse zip bombs
+MAX_DECOMPRESSED_BYTES = 64 * 1024 * 1024
+# Upper bound on the compressed body as received
+MAX_COMPRESSED_BYTES = 16 * 1024 * 1024
+
+# Bounded brotli output (output_buffer_limit) needs brotli >= 1.2
+BROTLI_BOUNDED = brotli is not None and hasattr(
+    brotli.Decompressor, "can_accept_more_data"
+)
+
+
+class BodyTooLarge(ValueError):
+    pass
+
+
+class BoundedDecoder:
+    """
+    Decompresses a request body chunk by chunk and raises BodyTooLarge as
+    soon as the output would exceed max_size, without ever producing more
+    than max_size + 1 bytes at once.
+    """
+
+    def __init__(self, encoding: str, max_size: int):
+        self.encoding = encoding
+        self.max_size = max_size
+        self.size = 0
+        self._decompressor = brotli.Decompressor() if encoding == "br" else None
+        # Leading bytes held back until the deflate header can be checked
+        self._head = b""
+
+    def feed(self, data: bytes) -> bytes:
+        if self._decompressor is None:
+            data = self._head + data
+            if len(data) < 2:
+                self._head = data
+                return b""
+            self._decompressor = zlib.decompressobj(self._wbits(data))
+        if not data:
+            return b""
+        limit = self.max_size - self.size + 1
+        if self.encoding == "br":
+            out = self._decompressor.process(data, output_buffer_limit=limit)
+        else:
+            out = self._decompressor.decompress(data, limit)
+        return self._count(out)
+
+    def finish(self) -> bytes:
+        if self._decompressor is None:
+            if self._head:
+                raise ValueError("truncated stream")
+            return b""
+        if self.encoding == "br":
+            return b""
+        return self._count(self._decompressor.flush())
+
+    def _wbits(self, data: bytes) -> int:
+        if self.encoding == "gzip":
+            # MAX_WBITS|32 auto-detects gzip and zlib headers
+            return zlib.MAX_WBITS | 32
+        # deflate bodies are meant to carry a zlib header, but raw streams are
+        # common enough to accept
+        if data[0] & 0x0F == 8 and (data[0] << 8 | data[1]) % 31 == 0:
+            return zlib.MAX_WBITS
+        return -zlib.MAX_WBITS
+
+    def _count(self, out: bytes) -> bytes:
+        self.size += len(out)
+        if self.size > self.max_size:
+            raise BodyTooLarge(
+                f"Decompressed request body exceeds {self.max_size} bytes"
+            )
+        return out
+
+
+class RequestDecompressionMiddleware:
+    """
+    ASGI middleware that transparently decompresses request bodies sent with
+    Content-Encoding gzip, deflate or br (when brotli >= 1.2 is installed),
+    so endpoints can read them as if they were uploaded uncompressed.
+
+    The body is decompressed as it arrives. Requests whose compressed body
+    exceeds max_compressed_size, or whose decompressed body would exceed
+    max_size, are refused with 413 without reading or inflating the rest.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_size: int = MAX_DECOMPRESSED_BYTES,
+        max_compressed_size: int = MAX_COMPRESSED_BYTES,
+    ):
+        self.app = app
+        self.max_size = max_size
+        self.max_compressed_size = max_compressed_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = headers.get(b"content-encoding", b"").decode("latin-1").lower()
+        if encoding in ("", "identity"):
+            await self.app(scope, receive, send)
+            return
+
+        if encoding not in ("gzip", "deflate", "br") or (
+            encoding == "br" and not BROTLI_BOUNDED
+        ):
+            await self._reject(send, 415, f"Unsupported Content-Encoding: {encoding}")
+            return
+
+        too_large = f"Compressed request body exceeds {self.max_compressed_size} bytes"
+        try:
+            declared = int(headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        if declared > self.max_compressed_size:
+            await self._reject(send, 413, too_large)
+            return
+
+        decoder = BoundedDecoder(encoding, self.max_size)
+        body = bytearray()
+        received = 0
+        more_body = True
+        try:
+            while more_body:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                chunk = message.get("body", b"")
+                received += len(chunk)
+                if received > self.max_compressed_size:
+                    raise BodyTooLarge(too_large)
+                body += decoder.feed(chunk)
+                more_body = message.get("more_body", False)
+            body += decoder.finish()
+        except BodyTooLarge as e:
+            await self._reject(send, 413, str(e))
+            return
+        except Exception as e:
+            await self._reject(send, 400, f"Invalid {encoding} request body: {e}")
+            return
+        body = bytes(body)
+
+        scope = dict(scope)
+        scope["headers"] = [
+            (key, value)
+            for key, value in scope["headers"]
+            if key not in (b"content-encoding", b"content-length")
+        ] + [(b"content-length", str(len(body)).encode("latin-1"))]
+
+        sent = False
+
+        async def receive_decompressed():
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(scope, receive_decompressed, send)
+
+    async def _reject(self, send, status: int, detail: str) -> None:
+        payload = json.dumps({"detail": detail}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": payload})
@@ -0,0 +1,94 @@
+"""
+JSON encoding shared by the pipeline's output files and the API.
+
+orjson is a dependency; if it cannot be imported the standard library is
+used instead, and both produce the same documents. Output is compact unless pretty is requested,
+either per call or with JSON_PRETTY=true for reading outputs while debugging.
+Pydantic models are encoded by pydantic's own serializer, without building
+an intermediate dict first.
+"""
+
+import json
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+from server.util.config import getConfig
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, pretty: Optional[bool] = None) -> bytes:
+    """Encode obj as UTF-8 JSON; pretty defaults to JSON_PRETTY."""
+    if pretty is None:
+        pretty = getConfig().get_json_pretty()
+    if isinstance(obj, BaseModel):
+        return obj.model_dump_json(indent=2 if pretty else None).encode("utf-8")
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    if pretty:
+        text = json.dumps(obj, default=_default, ensure_ascii=False, indent=2)
+    else:
+        text = json.dumps(
+            obj, default=_default, ensure_ascii=False, separators=(",", ":")
+        )
+    return text.encode("utf-8")
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_json(path: Union[str, Path]) -> Any:
+    return loads(Path(path).read_bytes())
+
+
+def write_json(path: Union[str, Path], obj: Any, pretty: Optional[bool] = None) -> int:
+    """
+    Write obj to path through a temporary file, so readers never see a
+    partial document; returns the number of bytes written.
+    """
+    path = Path(path)
+    data = dumps(obj, pretty)
+    tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return len(data)
+
+
+class JSONBytesResponse(Response):
+    """
+    JSON response encoded with dumps(). Bytes are sent as they are, so an
+    endpoint can return a stored JSON file without parsing it first.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return dumps(content, pretty=False)